@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from .models import ResponsibleStudent, Student
+
+ACCESS_CACHE_PREFIX = "avisos:access:"
+# el cache por defecto es LocMem (por proceso): la invalidación de signals solo limpia el worker
+# que hizo el cambio. Vencimiento corto, y lo que decide acceso usa owned_students
+ACCESS_CACHE_TIMEOUT = 5 * 60
+
+
+@dataclass(frozen=True)
+class AccessProfile:
+    """Lo que cada página necesita saber del usuario: sus alumnos y si es personal de escuela."""
+    student_ids: frozenset
+    active_student_ids: frozenset
+    is_school_staff: bool
+
+    @property
+    def has_active_students(self):
+        return bool(self.active_student_ids)
+
+
+def _cache_key(user_id):
+    return f"{ACCESS_CACHE_PREFIX}{user_id}"
+
+
+def _build_profile(user):
+    links = ResponsibleStudent.objects.filter(responsible_id=user.pk).values_list("student_id", "student__active")
+    student_ids, active_ids = set(), set()
+    for student_id, active in links:
+        student_ids.add(student_id)
+        if active:
+            active_ids.add(student_id)
+    return AccessProfile(
+        student_ids=frozenset(student_ids),
+        active_student_ids=frozenset(active_ids),
+        is_school_staff=bool(user.is_superuser or getattr(user, "is_school_staff", False)),
+    )
+
+
+def get_access_profile(user):
+    """Perfil cacheado (cache de Django + memo en el propio objeto user para el request)."""
+    profile = getattr(user, "_access_profile", None)
+    if profile is not None:
+        return profile
+    key = _cache_key(user.pk)
+    profile = cache.get(key)
+    if profile is None:
+        profile = _build_profile(user)
+        cache.set(key, profile, ACCESS_CACHE_TIMEOUT)
+    user._access_profile = profile
+    return profile
+
+
+def owned_students(user):
+    """
+    Alumnos del responsable, consultados en la base. Para todo lo que decide acceso (listar,
+    buscar, editar, borrar, avisar): el perfil cacheado solo se invalida en el proceso que hizo el
+    cambio y en otro worker puede seguir viejo hasta ACCESS_CACHE_TIMEOUT. El perfil queda para
+    la navegación (qué menús mostrar).
+    """
+    return Student.objects.filter(responsiblestudent__responsible=user)
+
+
+def invalidate_access_profiles(user_ids):
+    keys = [_cache_key(uid) for uid in set(user_ids) if uid is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def user_is_school(user):
+    return user.is_authenticated and (user.is_superuser or getattr(user, "is_school_staff", False))
+
+
+def scope_late_arrivals_for(user, qs):
+    return qs if user_is_school(user) else qs.filter(responsible=user)
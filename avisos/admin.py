@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
-from .models import User, Student, ResponsibleStudent, LateArrival
+from .models import User, Student, ResponsibleStudent, LateArrival, OutboxEmail, LatenessRule, LatenessAlert
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -24,3 +24,26 @@ class UserAdmin(BaseUserAdmin):
 admin.site.register(Student)
 admin.site.register(ResponsibleStudent)
 admin.site.register(LateArrival)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "recipients")
+    exclude = ("raw",)
+    readonly_fields = ("created_at", "from_email", "recipients", "subject", "sent_at", "last_error")
+
+
+@admin.register(LatenessRule)
+class LatenessRuleAdmin(admin.ModelAdmin):
+    # al crear o cambiar reglas, correr backfill_lateness_alerts para revisar lo ya cargado
+    list_display = ("name", "scope", "threshold", "window_days", "level", "grade", "active")
+    list_filter = ("scope", "active")
+
+
+@admin.register(LatenessAlert)
+class LatenessAlertAdmin(admin.ModelAdmin):
+    list_display = ("day", "rule", "subject", "count", "acknowledged_at")
+    list_filter = ("rule",)
+    raw_id_fields = ("student", "acknowledged_by")
@@ -0,0 +1,173 @@
+# Alertas de impuntualidad crónica. Cada alumno y cada grado tiene una ventana móvil de avisos
+# por día (LateWindowState); al llegar un aviso se suma a su día y las reglas activas se evalúan
+# contra esa ventana, sin releer el historial. backfill_lateness_alerts rearma todo desde cero.
+from datetime import date, timedelta
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (GRADE_AT_REPORT, LATENESS_STATE_DAYS, ArchivedLateArrival, LateArrival, LatenessAlert,
+                     LatenessRule, LateWindowState)
+
+
+def student_key(student_id):
+    return f"s:{student_id}"
+
+
+def grade_key(level, grade):
+    return f"g:{level}:{grade}"
+
+
+class WindowEngine:
+    """
+    Ventanas en memoria + reglas. Se usa igual al insertar (pocas claves, cargadas de la base)
+    que en el backfill (todas, en orden cronológico). Los días van como "AAAA-MM-DD": se comparan
+    como texto.
+    """
+
+    def __init__(self, rules, states=None, last_alerts=None):
+        self.rules = list(rules)
+        self.states = states if states is not None else {}  # clave -> {día: n}
+        self.last_alerts = last_alerts if last_alerts is not None else {}  # (regla, clave) -> día
+        self.changed = set()
+        self.alerts = []
+
+    def add(self, student_id, level, grade, day, n=1):
+        for key, scope in ((student_key(student_id), LatenessRule.SCOPE_STUDENT),
+                           (grade_key(level, grade), LatenessRule.SCOPE_GRADE)):
+            days = self._bump(key, day, n)
+            for rule in self.rules:
+                if rule.scope == scope and rule.applies_to(level, grade):
+                    self._check(rule, key, days, day, student_id if scope == LatenessRule.SCOPE_STUDENT else None,
+                                level, grade)
+
+    def remove(self, student_id, level, grade, day, n=1):
+        for key in (student_key(student_id), grade_key(level, grade)):
+            self._bump(key, day, -n)
+
+    def _bump(self, key, day, n):
+        days = self.states.setdefault(key, {})
+        iso = day.isoformat()
+        days[iso] = days.get(iso, 0) + n
+        if days[iso] <= 0:
+            del days[iso]
+        if days:
+            oldest = (date.fromisoformat(max(days)) - timedelta(days=LATENESS_STATE_DAYS)).isoformat()
+            for d in [d for d in days if d <= oldest]:
+                del days[d]
+        self.changed.add(key)
+        return days
+
+    def _check(self, rule, key, days, day, student_id, level, grade):
+        start = (day - timedelta(days=rule.window_days)).isoformat()
+        end = day.isoformat()
+        count = sum(n for d, n in days.items() if start < d <= end)
+        if count < rule.threshold:
+            return
+        last = self.last_alerts.get((rule.pk, key))
+        if last is not None and last > day - timedelta(days=rule.window_days):
+            return  # ya se avisó dentro de esta ventana
+        self.last_alerts[(rule.pk, key)] = day
+        self.alerts.append(LatenessAlert(rule=rule, subject=key, student_id=student_id, level=level,
+                                         grade=grade, count=count, day=day))
+
+
+def apply_late_changes(arrivals, delta):
+    """
+    Llamado por record_late_changes, dentro de su transacción. Usa el nivel/grado guardado en cada
+    aviso: una baja se descuenta de la misma ventana de grado donde se sumó.
+    """
+    items = [(a, (a.level, a.grade)) for a in arrivals if a.level is not None]
+    if not items:
+        return
+    keys = {k for a, (level, grade) in items for k in (student_key(a.student_id), grade_key(level, grade))}
+    # las ventanas son JSON (no se suman en SQL): las claves nuevas se crean vacías (ON CONFLICT DO
+    # NOTHING) y recién después se bloquean. Dos altas concurrentes de una clave nueva se esperan:
+    # la segunda lee lo que dejó la primera, en vez de chocar con ella al insertar
+    LateWindowState.objects.bulk_create([LateWindowState(key=k) for k in keys], ignore_conflicts=True)
+    rows = {s.key: s for s in LateWindowState.objects.select_for_update().filter(key__in=keys)}
+    rules = list(LatenessRule.objects.filter(active=True)) if delta > 0 else []
+    last_alerts = {}
+    if rules:
+        last_alerts = {
+            (rule_id, subject): day for rule_id, subject, day in LatenessAlert.objects
+            .filter(subject__in=keys).values("rule_id", "subject").annotate(day=Max("day"))
+            .values_list("rule_id", "subject", "day")
+        }
+    engine = WindowEngine(rules, {k: row.days for k, row in rows.items()}, last_alerts)
+    for a, (level, grade) in sorted(items, key=lambda item: item[0].reported_at):
+        day = timezone.localdate(a.reported_at)
+        if delta > 0:
+            engine.add(a.student_id, level, grade, day)
+        else:
+            engine.remove(a.student_id, level, grade, day)
+    _save_states(engine, rows)
+    LatenessAlert.objects.bulk_create(engine.alerts)
+
+
+def _save_states(engine, rows):
+    for key in engine.changed:
+        rows[key].days = engine.states[key]
+    LateWindowState.objects.bulk_update([rows[key] for key in engine.changed], ["days"], batch_size=500)
+
+
+def replay_history(reset_alerts=False, chunk_size=5000):
+    """
+    Rearma las ventanas recorriendo todos los avisos (archivo y tabla caliente) en orden, y crea
+    las alertas que correspondan sin duplicar las existentes. Devuelve (avisos, alertas nuevas).
+
+    La pasada larga es solo lectura, fuera de transacción (con IMMEDIATE tomaría el lock de
+    escritura y las altas fallarían con "database is locked"). Al final, en una transacción corta,
+    se suman los avisos que entraron mientras tanto y se reemplazan las ventanas. Las bajas de ese
+    intervalo no se ven hasta la próxima corrida: mejor correrlo fuera del horario de entrada.
+    """
+    rules = list(LatenessRule.objects.filter(active=True))
+    started = timezone.now()
+    last_alerts = {} if reset_alerts else _last_alert_days(LatenessAlert.objects.all())
+    last_id = LateArrival.objects.aggregate(m=Max("id"))["m"] or 0
+    engine = WindowEngine(rules, last_alerts=last_alerts)
+    # una pasada en bloque por tabla; lo archivado es siempre más viejo
+    n = _replay(engine, chain.from_iterable(
+        qs.order_by("reported_at", "id").annotate(**GRADE_AT_REPORT)
+        .values_list("student_id", "level_at", "grade_at", "reported_at")
+        .iterator(chunk_size=chunk_size)
+        for qs in (ArchivedLateArrival.objects.all(), LateArrival.objects.filter(id__lte=last_id))
+    ))
+
+    with transaction.atomic():
+        if reset_alerts:
+            LatenessAlert.objects.filter(created_at__lt=started).delete()
+        # alertas que creó el alta en vivo durante la pasada: no se repiten
+        live = _last_alert_days(LatenessAlert.objects.filter(created_at__gte=started))
+        engine.alerts = [a for a in engine.alerts if not _covered(a, live)]
+        for key, day in live.items():
+            engine.last_alerts[key] = max(day, engine.last_alerts.get(key, day))
+        n += _replay(engine, LateArrival.objects.filter(id__gt=last_id).order_by("reported_at", "id")
+                     .annotate(**GRADE_AT_REPORT).values_list("student_id", "level_at", "grade_at", "reported_at"))
+        LateWindowState.objects.all().delete()
+        LateWindowState.objects.bulk_create(
+            [LateWindowState(key=k, days=d) for k, d in engine.states.items() if d], batch_size=500)
+        LatenessAlert.objects.bulk_create(engine.alerts, batch_size=500)
+    return n, len(engine.alerts)
+
+
+def _replay(engine, rows):
+    n = 0
+    for student_id, level, grade, reported_at in rows:
+        engine.add(student_id, level, grade, timezone.localdate(reported_at))
+        n += 1
+    return n
+
+
+def _last_alert_days(qs):
+    return {
+        (rule_id, subject): day for rule_id, subject, day in
+        qs.values("rule_id", "subject").annotate(day=Max("day")).values_list("rule_id", "subject", "day")
+    }
+
+
+def _covered(alert, live):
+    day = live.get((alert.rule.pk, alert.subject))
+    return day is not None and abs((day - alert.day).days) < alert.rule.window_days
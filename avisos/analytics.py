@@ -0,0 +1,51 @@
+# Tablero de tendencias: todo sale de LateSlotCounts (unas pocas filas por día), con tres
+# consultas agrupadas; el resultado se cachea con ReportCacheMixin.
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import SLOT_MINUTES, LateSlotCounts, Student
+
+WEEKDAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+LEVEL_ORDER = {level: i for i, (level, _) in enumerate(Student.LEVEL_CHOICES)}
+
+
+def late_analytics(date_from, date_to):
+    """Totales por día de la semana, franja horaria, nivel/grado y semana en [date_from, date_to]."""
+    qs = LateSlotCounts.objects.filter(day__gte=date_from, day__lte=date_to).order_by()
+    by_day = dict(qs.values_list("day").annotate(n=Sum("count")))
+    by_slot = dict(qs.values_list("slot").annotate(n=Sum("count")))
+    by_grade = list(qs.values_list("level", "grade").annotate(n=Sum("count")))
+
+    weekdays = [0] * 7
+    for day, n in by_day.items():
+        weekdays[day.weekday()] += n
+
+    weeks, start = [], date_from - timedelta(days=date_from.weekday())
+    last = min(date_to, timezone.localdate())
+    while start <= last:
+        weeks.append((start, sum(by_day.get(start + timedelta(days=i), 0) for i in range(7))))
+        start += timedelta(days=7)
+
+    return {
+        "total": sum(by_day.values()),
+        "days_with_lates": len(by_day),
+        "weekdays": _bars((name, n) for i, (name, n) in enumerate(zip(WEEKDAYS, weekdays)) if i < 5 or n),
+        "slots": _bars((_slot_label(slot), n) for slot, n in sorted(by_slot.items())),
+        "grades": _bars((f"{level} {grade}", n) for level, grade, n in
+                        sorted(by_grade, key=lambda r: (LEVEL_ORDER.get(r[0], 99), r[1]))),
+        "weeks": _bars((week.strftime("%d/%m"), n) for week, n in weeks),
+    }
+
+
+def _slot_label(slot):
+    minutes = slot * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _bars(rows):
+    # ancho relativo al máximo de la serie, listo para el template
+    rows = list(rows)
+    top = max((n for _, n in rows), default=0) or 1
+    return [{"label": label, "count": n, "pct": round(100 * n / top)} for label, n in rows]
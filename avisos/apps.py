@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AvisosConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "avisos"
+
+    def ready(self):
+        from . import db, signals  # noqa: F401
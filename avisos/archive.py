@@ -0,0 +1,58 @@
+# Archivo de ciclos lectivos cerrados: los avisos pasan de LateArrival a ArchivedLateArrival
+# por lotes. La tabla caliente (índices, listados, "hoy", exportaciones del año) queda con el
+# ciclo actual; el historial por alumno y los totales siguen viendo todo.
+from django.db import transaction
+from django.utils import timezone
+
+from .db import raw_delete
+from .models import LAST30_WINDOW, ArchivedLateArrival, LateArrival, school_year_bounds, school_year_of
+
+ARCHIVE_FIELDS = ["id", "responsible_id", "student_id", "reason", "reported_at", "reviewed_by_id", "reviewed_at",
+                  "level", "grade"]
+
+
+class ArchiveError(Exception):
+    """Ciclo lectivo que todavía no se puede archivar."""
+
+
+def last_archivable_year(today=None):
+    # cerrado hace más de 30 días: así "últimos 30 días" sale siempre de la tabla caliente
+    today = today or timezone.localdate()
+    year = school_year_of(today) - 1
+    if school_year_bounds(year)[1] + LAST30_WINDOW >= today:
+        year -= 1
+    return year
+
+
+def archive_school_year(year, batch_size=2000, on_batch=None):
+    """Mueve los avisos del ciclo `year` al archivo; devuelve cuántos movió."""
+    if year > last_archivable_year():
+        raise ArchiveError(f"El ciclo {year} no está cerrado hace más de {LAST30_WINDOW.days} días.")
+    d1, d2 = school_year_bounds(year)
+    pending = LateArrival.objects.for_local_range(d1, d2)
+    moved = 0
+    while True:
+        # una transacción corta por lote: los avisos nuevos no esperan al archivo completo
+        with transaction.atomic():
+            rows = list(pending.order_by("id").values_list(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            now = timezone.now()
+            ArchivedLateArrival.objects.bulk_create(
+                [ArchivedLateArrival(**dict(zip(ARCHIVE_FIELDS, row)), archived_at=now) for row in rows],
+                ignore_conflicts=True,  # lote a medio mover por un corte anterior
+            )
+            # en crudo, sin señales: no es una baja (los contadores y la sincronización no se enteran)
+            raw_delete(LateArrival, "id", [row[0] for row in rows])
+        moved += len(rows)
+        if on_batch:
+            on_batch(moved)
+    return moved
+
+
+def archivable_years():
+    """Ciclos con avisos en la tabla caliente que ya se pueden archivar."""
+    first = LateArrival.objects.order_by("reported_at").values_list("reported_at", flat=True).first()
+    if first is None:
+        return []
+    return list(range(school_year_of(timezone.localdate(first)), last_archivable_year() + 1))
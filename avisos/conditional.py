@@ -0,0 +1,86 @@
+import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils.functional import cached_property
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+
+# nombres de alumnos/usuarios y vínculos: se muestran en casi todas las páginas pero
+# no tienen fecha de modificación, así que llevamos una "generación" en el cache
+CATALOG_VERSION_KEY = "avisos:catalog-version"
+
+
+def catalog_version():
+    return cache.get_or_set(CATALOG_VERSION_KEY, lambda: uuid4().hex, timeout=None)
+
+
+def bump_catalog_version():
+    # ya y de nuevo al commit (mismo motivo que en signals._invalidate)
+    cache.set(CATALOG_VERSION_KEY, uuid4().hex, timeout=None)
+    transaction.on_commit(lambda: cache.set(CATALOG_VERSION_KEY, uuid4().hex, timeout=None))
+
+
+# bajas de avisos: no mueven el id máximo, así que los tableros que se versionan por id
+# también miran esta generación (la sube record_late_changes)
+LATE_COUNTS_VERSION_KEY = "avisos:late-counts-version"
+
+
+def late_counts_version():
+    return cache.get_or_set(LATE_COUNTS_VERSION_KEY, lambda: uuid4().hex, timeout=None)
+
+
+def bump_late_counts_version():
+    cache.set(LATE_COUNTS_VERSION_KEY, uuid4().hex, timeout=None)
+    transaction.on_commit(lambda: cache.set(LATE_COUNTS_VERSION_KEY, uuid4().hex, timeout=None))
+
+
+def late_arrivals_version(qs):
+    """Token barato de un conjunto de avisos: altas, bajas y revisiones lo cambian."""
+    agg = qs.order_by().aggregate(n=Count("id"), max_id=Max("id"), reviewed=Max("reviewed_at"))
+    return agg["n"], agg["max_id"], agg["reviewed"] and agg["reviewed"].isoformat()
+
+
+class ConditionalGetMixin:
+    """
+    ETag por vista y alcance (usuario + URL completa + versión de los datos). Si el
+    navegador ya tiene esa versión se responde 304 sin consultas pesadas ni render.
+    Las vistas implementan get_data_version() con agregados baratos.
+    """
+
+    def get_data_version(self):
+        raise NotImplementedError
+
+    @cached_property
+    def data_version(self):
+        # una sola vez por request (también la usa ReportCacheMixin)
+        return self.get_data_version()
+
+    def dispatch(self, request, *args, **kwargs):
+        # va después de LoginRequiredMixin/SchoolOnlyMixin: acá el usuario ya está validado
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        response["ETag"] = etag
+        # el navegador guarda la página pero revalida siempre (y nunca la comparte)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self):
+        request = self.request
+        get_token(request)  # asegura el secreto CSRF antes de usarlo en el ETag
+        parts = (
+            type(self).__name__,
+            request.user.pk,
+            # el token CSRF de los formularios depende del secreto de la cookie
+            request.META.get("CSRF_COOKIE"),
+            request.get_full_path(),
+            catalog_version(),
+            self.data_version,
+        )
+        return quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
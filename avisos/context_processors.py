@@ -1,11 +1,10 @@
-from .models import Student
+from .access import get_access_profile
 
 def ui_flags(request):
     if not request.user.is_authenticated:
         return {"has_active_students": False, "is_school_staff": False}
+    profile = get_access_profile(request.user)
     return {
-        "has_active_students": Student.objects.filter(
-            responsiblestudent__responsible=request.user, active=True
-        ).exists(),
-        "is_school_staff": getattr(request.user, "is_school_staff", False) or request.user.is_superuser,
+        "has_active_students": profile.has_active_students,
+        "is_school_staff": profile.is_school_staff,
     }
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_SQLITE_PRAGMAS = {"busy_timeout": 20000, "journal_mode": "WAL", "synchronous": "NORMAL"}
+
+
+def sqlite_pragmas():
+    """settings.SQLITE_PRAGMAS (opcional) sobre DEFAULT_SQLITE_PRAGMAS."""
+    return {**DEFAULT_SQLITE_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas=None):
+    """Aplica los PRAGMA de sqlite_pragmas() (o los dados) a una conexión sqlite3 (DB-API)."""
+    pragmas = pragmas if pragmas is not None else sqlite_pragmas()
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        apply_sqlite_pragmas(connection.connection)
+
+
+def raw_delete(model, field_name, values, chunk_size=500):
+    """
+    DELETE ... WHERE <campo> IN (values) en SQL, por tramos. A propósito sin QuerySet.delete():
+    no corre señales (post_delete descuenta los contadores y anota la baja para sync) ni cascadas
+    de Django. Solo para filas que no son bajas (archivar) o cuyas tablas derivadas se limpian
+    aparte (seed_benchmark --flush). Llamar dentro de la transacción del cambio. Devuelve cuántas borró.
+    """
+    qn = connection.ops.quote_name
+    table, column = qn(model._meta.db_table), qn(model._meta.get_field(field_name).column)
+    values = list(values)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            deleted += cursor.rowcount
+    return deleted
+
+
+# --- mantenimiento (manage.py db_maintenance) ---
+
+AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+
+def _pragma(cursor, name):
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+
+def sqlite_file_stats(connection):
+    """Tamaño en disco (base + WAL), páginas, páginas libres y modo de auto_vacuum."""
+    with connection.cursor() as cursor:
+        stats = {name: _pragma(cursor, name) for name in ("page_size", "page_count", "freelist_count", "auto_vacuum")}
+    stats["auto_vacuum"] = AUTO_VACUUM_MODES.get(stats["auto_vacuum"], stats["auto_vacuum"])
+    name = str(connection.settings_dict["NAME"])
+    stats["file_bytes"] = sum(os.path.getsize(p) for p in (name, name + "-wal") if os.path.isfile(p))
+    return stats
+
+
+def incremental_vacuum(connection, max_seconds, pages_per_step=256, pause=0.05):
+    """
+    Devuelve páginas libres al sistema de a tramos: cada PRAGMA incremental_vacuum es una
+    transacción corta y entre tramos se suelta el lock para que pasen los que escriben.
+    Corta al vaciar la lista libre o al pasar max_seconds. Requiere auto_vacuum=INCREMENTAL.
+    """
+    deadline = time.monotonic() + max_seconds
+    freed = 0
+    with connection.cursor() as cursor:
+        while time.monotonic() < deadline:
+            before = _pragma(cursor, "freelist_count")
+            if not before:
+                break
+            # con execute() el módulo sqlite3 da un solo paso (= una página); executescript lo corre entero
+            connection.connection.executescript(f"PRAGMA incremental_vacuum({int(pages_per_step)});")
+            after = _pragma(cursor, "freelist_count")
+            if after >= before:
+                break
+            freed += before - after
+            time.sleep(pause)
+    return freed
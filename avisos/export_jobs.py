@@ -0,0 +1,177 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import chain, islice
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .access import scope_late_arrivals_for, user_is_school
+from .exports import EXPORT_CHUNK_SIZE, export_rows, write_csv, write_xlsx
+from .models import GRADE_AT_REPORT, ArchivedLateArrival, ExportJob, LateArrival, LateSlotCounts
+
+logger = logging.getLogger(__name__)
+
+# "running" más viejo que esto = worker caído: el job vuelve a la cola
+STALE_JOB_TIMEOUT = timedelta(hours=1)
+
+
+def exports_root():
+    root = Path(settings.EXPORTS_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def export_workers():
+    return getattr(settings, "EXPORT_WORKERS", 0) or min(4, os.cpu_count() or 1)
+
+
+def job_querysets(job):
+    """Avisos del rango en la tabla caliente y en el archivo (ciclos ya archivados), en ese orden."""
+    return [scope_late_arrivals_for(job.requested_by, model.objects.for_local_range(job.date_from, job.date_to))
+            for model in (LateArrival, ArchivedLateArrival)]
+
+
+def claim_next_job():
+    now = timezone.now()
+    ExportJob.objects.filter(status=ExportJob.RUNNING, started_at__lt=now - STALE_JOB_TIMEOUT).update(
+        status=ExportJob.PENDING, started_at=None)
+    with transaction.atomic():
+        job = (ExportJob.objects.filter(status=ExportJob.PENDING)
+               .order_by("created_at", "id").select_related("requested_by").first())
+        if job is None:
+            return None
+        # status=PENDING otra vez: con dos workers, solo uno se queda con el job
+        if not ExportJob.objects.filter(pk=job.pk, status=ExportJob.PENDING).update(
+                status=ExportJob.RUNNING, started_at=now):
+            return None
+    job.status, job.started_at = ExportJob.RUNNING, now
+    return job
+
+
+def run_job(job, workers=None):
+    """Genera el archivo del job en EXPORTS_ROOT; deja el job en DONE o FAILED."""
+    root = exports_root()
+    name = f"{job.pk}-{uuid.uuid4().hex}.{job.fmt}"
+    partial = root / (name + ".part")
+    try:
+        if job.kind == ExportJob.KIND_SCHOOL_YEAR:
+            count = build_grade_workbook(job, partial, workers or export_workers())
+        else:
+            count = build_range_export(job, partial)
+        partial.rename(root / name)  # el archivo aparece completo o no aparece
+    except Exception as e:
+        logger.exception("Falló la exportación %s", job.pk)
+        partial.unlink(missing_ok=True)
+        job.status, job.error = ExportJob.FAILED, f"{type(e).__name__}: {e}"
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return job
+    job.status, job.file_path, job.row_count = ExportJob.DONE, name, count
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "file_path", "row_count", "finished_at"])
+    return job
+
+
+def build_range_export(job, path):
+    # lo archivado es siempre más viejo: las dos tablas seguidas quedan ordenadas por fecha
+    rows = chain.from_iterable(export_rows(qs.order_by("-reported_at")) for qs in job_querysets(job))
+    if job.fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            return write_csv(f, rows)
+    with open(path, "wb") as f:
+        return write_xlsx(f, [("Llegadas tarde", rows)])
+
+
+def build_grade_workbook(job, path, workers):
+    """
+    Una hoja por nivel/grado. Cada hoja se consulta y formatea en paralelo (procesos aparte,
+    cada uno con su conexión) y se vuelca a un archivo intermedio; openpyxl arma el libro al
+    final, en orden, leyendo esos archivos por bloques (memoria acotada).
+    """
+    groups = list(grade_groups(job))
+    spool_dir = tempfile.mkdtemp(prefix=f"export-{job.pk}-")
+    try:
+        if workers > 1 and len(groups) > 1:
+            # spawn: procesos limpios (sin conexiones ni hilos heredados) que arrancan Django solos
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=min(workers, len(groups)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=django.setup) as pool:
+                spools = list(pool.map(spool_grade_rows, [(job.pk, level, grade, spool_dir) for level, grade in groups]))
+        else:
+            spools = [spool_grade_rows((job.pk, level, grade, spool_dir)) for level, grade in groups]
+        sheets = [(_sheet_title(level, grade), _read_spool(spool)) for (level, grade), spool in zip(groups, spools)]
+        with open(path, "wb") as f:
+            return write_xlsx(f, sheets or [("Sin datos", [])])
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def spool_grade_rows(args):
+    """Corre en un proceso del pool: filas de un grado -> archivo intermedio (pickle por bloques)."""
+    job_id, level, grade, spool_dir = args
+    job = ExportJob.objects.select_related("requested_by").get(pk=job_id)
+    # un ciclo lectivo está entero en una de las dos tablas; el grado es el del aviso, no el actual
+    rows = chain.from_iterable(
+        export_rows(qs.annotate(**GRADE_AT_REPORT).filter(level_at=level, grade_at=grade)
+                    .order_by("student__last_name", "student__first_name", "reported_at"))
+        for qs in job_querysets(job)
+    )
+    fd, path = tempfile.mkstemp(dir=spool_dir, suffix=".rows")
+    with os.fdopen(fd, "wb") as f:
+        while chunk := list(islice(rows, EXPORT_CHUNK_SIZE)):
+            pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_spool(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+def _sheet_title(level, grade):
+    # Excel: máx. 31 caracteres y sin []:*?/\
+    title = f"{level} {grade}"
+    return "".join(c for c in title if c not in "[]:*?/\\")[:31]
+
+
+def grade_groups(job):
+    """
+    Nivel/grado de cada aviso al momento de reportarlo (GRADE_AT_REPORT): en un ciclo pasado, los
+    avisos quedan en el grado que el alumno tenía entonces. La escuela sale de las franjas
+    precalculadas (sin recorrer los avisos); un responsable, de sus avisos.
+    """
+    if user_is_school(job.requested_by):
+        querysets = [LateSlotCounts.objects.filter(day__gte=job.date_from, day__lte=job.date_to)
+                     .values_list("level", "grade")]
+    else:
+        querysets = [qs.annotate(**GRADE_AT_REPORT).values_list("level_at", "grade_at") for qs in job_querysets(job)]
+    return sorted({group for qs in querysets for group in qs.order_by().distinct()})
+
+
+def purge_expired_jobs(days=None):
+    """Borra jobs terminados (y sus archivos) con más de EXPORT_RETENTION_DAYS."""
+    days = days if days is not None else getattr(settings, "EXPORT_RETENTION_DAYS", 7)
+    expired = ExportJob.objects.filter(finished_at__lt=timezone.now() - timedelta(days=days))
+    root = Path(settings.EXPORTS_ROOT)
+    n = 0
+    for job in expired.only("pk", "file_path"):
+        if job.file_path:
+            (root / job.file_path).unlink(missing_ok=True)
+        job.delete()
+        n += 1
+    return n
@@ -0,0 +1,86 @@
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from .models import GRADE_AT_REPORT
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_HEADERS = ["Alumno", "Grado", "Fecha y hora", "Motivo"]
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_rows(qs):
+    """Filas listas para exportar, leídas por lotes sin instanciar modelos. El grado es el del aviso."""
+    values = (qs.select_related(None)
+              .annotate(**GRADE_AT_REPORT)
+              .values_list("student__last_name", "student__first_name",
+                           "level_at", "grade_at",
+                           "reported_at", "reason")
+              .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    for last_name, first_name, level, grade, reported_at, reason in values:
+        yield [
+            f"{last_name}, {first_name}",
+            f"{level} {grade}",
+            timezone.localtime(reported_at).strftime("%d/%m/%Y %H:%M"),
+            reason,
+        ]
+
+
+def write_xlsx(target, sheets):
+    """sheets: [(título, filas)]. write_only vuelca las filas a disco a medida que llegan."""
+    wb = Workbook(write_only=True)
+    total = 0
+    for title, rows in sheets:
+        ws = wb.create_sheet(title=title)
+        for col in range(1, len(EXPORT_HEADERS) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 28
+        ws.append(EXPORT_HEADERS)
+        for row in rows:
+            ws.append(row)
+            total += 1
+    wb.save(target)
+    return total
+
+
+def write_csv(target, rows):
+    """target: archivo de texto abierto con newline=""."""
+    writer = csv.writer(target)
+    target.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    total = 0
+    for row in rows:
+        writer.writerow(row)
+        total += 1
+    return total
+
+
+def xlsx_response(rows, filename, title="Llegadas tarde"):
+    # el archivo final se sirve por bloques con FileResponse (StreamingHttpResponse)
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(tmp, [(title, rows)])
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+class _Echo:
+    """Pseudo-buffer: csv.writer escribe y devolvemos la línea tal cual."""
+    def write(self, value):
+        return value
+
+
+def csv_response(rows, filename):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield "\ufeff"  # BOM para que Excel reconozca UTF-8 (acentos)
+        yield writer.writerow(EXPORT_HEADERS)
+        for row in rows:
+            yield writer.writerow(row)
+
+    resp = StreamingHttpResponse(stream(), content_type="text/csv; charset=utf-8")
+    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
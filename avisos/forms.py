@@ -1,7 +1,9 @@
+from datetime import timedelta
 from django import forms
+from django.utils import timezone
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.forms import UserCreationForm
-from .models import User, Student
+from .models import User, Student, ExportJob, school_year_bounds, school_year_of
 
 class SignupForm(UserCreationForm):
     class Meta:
@@ -106,7 +108,37 @@ class NotifyLateForm(forms.Form):
         user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
         if user:
-            self.fields["students"].queryset = user.students.filter(active=True)
+            from .access import owned_students
+            self.fields["students"].queryset = owned_students(user).filter(active=True)
+
+class LateArrivalBatchItemForm(forms.Form):
+    """Un ítem del lote JSON (la pertenencia del alumno se valida aparte, en bloque)."""
+    student = forms.IntegerField(min_value=1)
+    reason = forms.CharField(max_length=500)
+    reported_at = forms.DateTimeField(required=False)
+
+    def clean_reported_at(self):
+        value = self.cleaned_data.get("reported_at")
+        if value and value > timezone.now() + timedelta(minutes=5):
+            raise forms.ValidationError("La fecha no puede ser futura.")
+        return value
+
+class ImportUploadForm(forms.Form):
+    KIND_CHOICES = [("roster", "Padrón (responsables y alumnos)"), ("lates", "Historial de llegadas tarde")]
+    kind = forms.ChoiceField(label="Tipo", choices=KIND_CHOICES)
+    file = forms.FileField(label="Archivo (CSV o XLSX)")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["kind"].widget.attrs["class"] = "form-select"
+        self.fields["file"].widget.attrs["class"] = "form-control"
+        self.fields["file"].widget.attrs["accept"] = ".csv,.xlsx"
+
+    def clean_file(self):
+        f = self.cleaned_data["file"]
+        if not f.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("El archivo debe ser .csv o .xlsx")
+        return f
 
 class SchoolStaffToggleForm(forms.Form):
     id_number = forms.CharField(label="Documento", max_length=10)
@@ -127,16 +159,74 @@ class LateArrivalReportFilterForm(forms.Form):
         for f in self.fields.values():
             f.widget.attrs["class"] = (f.widget.attrs.get("class", "") + " form-control").strip()
 
+class ExportJobForm(forms.Form):
+    kind = forms.ChoiceField(label="Tipo", choices=ExportJob.KIND_CHOICES, initial=ExportJob.KIND_RANGE)
+    fmt = forms.ChoiceField(label="Formato", choices=ExportJob.FORMAT_CHOICES, initial="xlsx")
+    date_from = forms.DateField(label="Desde", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(label="Hasta", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    school_year = forms.IntegerField(label="Ciclo lectivo", required=False, min_value=2000, max_value=2100)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["school_year"].initial = school_year_of(timezone.localdate())
+        for f in self.fields.values():
+            f.widget.attrs["class"] = (f.widget.attrs.get("class", "") + " form-control").strip()
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("kind") == ExportJob.KIND_SCHOOL_YEAR:
+            if not cleaned.get("school_year"):
+                self.add_error("school_year", "Indicá el ciclo lectivo.")
+                return cleaned
+            # una hoja por grado: solo tiene sentido en Excel
+            cleaned["fmt"] = "xlsx"
+            cleaned["date_from"], cleaned["date_to"] = school_year_bounds(cleaned["school_year"])
+        else:
+            d1, d2 = cleaned.get("date_from"), cleaned.get("date_to")
+            if not d1 or not d2:
+                raise forms.ValidationError("Indicá el rango de fechas.")
+            if d1 > d2:
+                raise forms.ValidationError("La fecha desde no puede ser posterior a la fecha hasta.")
+        return cleaned
+
+
+class LateAnalyticsFilterForm(forms.Form):
+    school_year = forms.IntegerField(label="Ciclo lectivo", required=False, min_value=2000, max_value=2100)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["school_year"].widget.attrs["class"] = "form-control"
+
+    def selected_year(self):
+        return (self.is_valid() and self.cleaned_data["school_year"]) or school_year_of(timezone.localdate())
+
+
 class LateArrivalAggregatedFilterForm(forms.Form):
     q = forms.CharField(
         label="Buscar alumno",
         required=False,
-        widget=forms.TextInput(attrs={"placeholder": "Apellido o nombre"}),
+        widget=forms.TextInput(attrs={"placeholder": "Apellido o nombre", "list": "student-suggestions",
+                                      "autocomplete": "off"}),
     )
 
+    # rango opcional: si se indica, los totales salen de la tabla diaria (StudentDailyLates)
+    date_from = forms.DateField(label="Desde", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to   = forms.DateField(label="Hasta", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["q"].widget.attrs["class"] = "form-control"
+        for f in self.fields.values():
+            f.widget.attrs["class"] = (f.widget.attrs.get("class", "") + " form-control").strip()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        d1 = cleaned_data.get("date_from")
+        d2 = cleaned_data.get("date_to")
+        if bool(d1) != bool(d2):
+            raise forms.ValidationError("Indicá las dos fechas (desde y hasta) o ninguna.")
+        if d1 and d2 and d1 > d2:
+            self.add_error("date_to", "La fecha hasta debe ser posterior a desde.")
+        return cleaned_data
 
 
 
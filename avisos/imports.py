@@ -0,0 +1,338 @@
+"""
+Importación masiva de padrón (responsables + alumnos) e historial de llegadas tarde
+desde CSV o XLSX. Se lee en streaming, se valida por lotes y se guarda con bulk_create.
+"""
+import csv
+import io
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .access import invalidate_access_profiles
+from .conditional import bump_catalog_version
+from .forms import StudentForm
+from .models import User, Student, ResponsibleStudent, LateArrival, SyncChange, id8_validator
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REJECTED_KEPT = 1000
+
+KIND_ROSTER = "roster"
+KIND_LATES = "lates"
+
+# encabezado normalizado -> campo
+HEADER_ALIASES = {
+    "documento": "id_number", "dni": "id_number", "id_number": "id_number",
+    "nombre_completo": "full_name", "responsable": "full_name", "full_name": "full_name",
+    "email": "email", "correo": "email",
+    "nombre": "first_name", "alumno_nombre": "first_name", "first_name": "first_name",
+    "apellido": "last_name", "alumno_apellido": "last_name", "last_name": "last_name",
+    "nivel": "level", "level": "level",
+    "grado": "grade", "ano": "grade", "grade": "grade",
+    "activo": "active", "active": "active",
+    "fecha": "reported_at", "fecha_hora": "reported_at", "reported_at": "reported_at",
+    "motivo": "reason", "reason": "reason",
+}
+REQUIRED_COLUMNS = {
+    KIND_ROSTER: {"id_number", "full_name", "email", "first_name", "last_name", "level", "grade"},
+    KIND_LATES: {"id_number", "first_name", "last_name", "reported_at", "reason"},
+}
+DATE_FORMATS = ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y")
+FALSE_VALUES = {"0", "no", "false", "n", "f", "inactivo"}
+
+
+class ImportFileError(Exception):
+    """Archivo ilegible o sin las columnas necesarias (no es un error de fila)."""
+
+
+@dataclass
+class ImportResult:
+    processed: int = 0
+    created: dict = field(default_factory=dict)
+    rejected: list = field(default_factory=list)  # (número de fila, mensaje)
+    rejected_total: int = 0
+
+    def add_created(self, key, n):
+        self.created[key] = self.created.get(key, 0) + n
+
+    def reject(self, line, message):
+        self.rejected_total += 1
+        if len(self.rejected) < MAX_REJECTED_KEPT:
+            self.rejected.append((line, message))
+
+
+def _normalize_header(value):
+    value = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    return value.strip().lower().replace(" ", "_")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, datetime):
+        return value
+    return str(value).strip()
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def _iter_xlsx(fileobj):
+    from openpyxl import load_workbook
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_records(fileobj, filename, kind):
+    """(número de fila, dict) por cada fila no vacía, con columnas normalizadas."""
+    is_xlsx = filename.lower().endswith((".xlsx", ".xlsm"))
+    rows = _iter_xlsx(fileobj) if is_xlsx else _iter_csv(fileobj)
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFileError("El archivo está vacío.")
+    except Exception as e:  # zip/CSV corrupto
+        raise ImportFileError(f"No se pudo leer el archivo: {e}")
+    columns = [HEADER_ALIASES.get(_normalize_header(h)) for h in header]
+    missing = REQUIRED_COLUMNS[kind] - set(columns)
+    if missing:
+        raise ImportFileError("Faltan columnas: " + ", ".join(sorted(missing)))
+
+    for line, row in enumerate(rows, start=2):
+        record = {col: _cell(v) for col, v in zip(columns, row) if col}
+        if any(v != "" for v in record.values()):
+            yield line, record
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _errors_text(errors):
+    if isinstance(errors, ValidationError):
+        return "; ".join(errors.messages)
+    return "; ".join(f"{k}: {' '.join(v)}" for k, v in errors.items())
+
+
+def _student_key(responsible_id, first_name, last_name):
+    return responsible_id, first_name.strip().lower(), last_name.strip().lower()
+
+
+def _roster_key(first_name, last_name, level, grade):
+    return first_name.strip().lower(), last_name.strip().lower(), level, int(grade)
+
+
+def _parse_datetime(value):
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = parse_datetime(value)
+        for fmt in DATE_FORMATS:
+            if dt is not None:
+                break
+            try:
+                dt = datetime.strptime(value, fmt)
+            except ValueError:
+                pass
+        if dt is None:
+            raise ValidationError("Fecha inválida (usar dd/mm/aaaa hh:mm o ISO).")
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _existing_students(responsible_ids):
+    links = (ResponsibleStudent.objects
+             .filter(responsible_id__in=responsible_ids)
+             .values_list("responsible_id", "student_id", "student__first_name", "student__last_name"))
+    return {_student_key(rid, fn, ln): sid for rid, sid, fn, ln in links}
+
+
+# --- padrón ---
+
+def _validate_roster(record):
+    errors = {}
+    try:
+        id8_validator(record["id_number"])
+    except ValidationError as e:
+        errors["documento"] = e.messages
+    if not record.get("full_name"):
+        errors["nombre_completo"] = ["Obligatorio."]
+    try:
+        email = User.objects.normalize_email(forms.EmailField().clean(record.get("email")))
+    except ValidationError as e:
+        errors["email"] = e.messages
+        email = None
+    active = str(record.get("active", "")).strip().lower() not in FALSE_VALUES
+    # mismas reglas que el alta manual de alumnos
+    student_form = StudentForm(data={
+        "first_name": record.get("first_name"),
+        "last_name": record.get("last_name"),
+        "level": str(record.get("level", "")).upper(),
+        "grade": record.get("grade"),
+        "active": "on" if active else "",
+    })
+    if not student_form.is_valid():
+        errors.update(student_form.errors)
+    if errors:
+        return None, errors
+    return {"id_number": record["id_number"], "full_name": record["full_name"], "email": email,
+            "student": student_form.cleaned_data}, None
+
+
+@transaction.atomic
+def _import_roster_chunk(rows, result):
+    # 1) responsables: los que faltan se crean en bloque (sin contraseña: usan "olvidé mi contraseña")
+    by_doc = {r["id_number"]: r for _, r in rows}
+    users = {u.id_number: u for u in User.objects.filter(id_number__in=by_doc)}
+    new_users = []
+    for doc, r in by_doc.items():
+        if doc not in users:
+            u = User(id_number=doc, full_name=r["full_name"], email=r["email"])
+            u.set_unusable_password()
+            new_users.append(u)
+    if new_users:
+        User.objects.bulk_create(new_users, ignore_conflicts=True)
+        users = {u.id_number: u for u in User.objects.filter(id_number__in=by_doc)}
+        result.add_created("responsables", sum(1 for u in new_users if u.id_number in users))
+
+    # 2) alumnos: primero entre los del propio responsable (nombre + apellido); si no,
+    #    mismo nombre, apellido, nivel y grado (el otro responsable ya lo cargó)
+    existing = _existing_students([u.pk for u in users.values()])
+    last_names = {r["student"]["last_name"].strip().lower() for _, r in rows}
+    global_existing = {
+        _roster_key(s["first_name"], s["last_name"], s["level"], s["grade"]): s["pk"]
+        for s in (Student.objects.annotate(ln=Lower("last_name")).filter(ln__in=last_names)
+                  .values("pk", "first_name", "last_name", "level", "grade"))
+    }
+    to_create, to_update, pending_links = {}, {}, []
+    for line, r in rows:
+        user = users.get(r["id_number"])
+        if user is None:
+            result.reject(line, "email: ya está en uso por otro usuario.")
+            continue
+        data = r["student"]
+        key = _student_key(user.pk, data["first_name"], data["last_name"])
+        gkey = _roster_key(data["first_name"], data["last_name"], data["level"], data["grade"])
+        if key in existing:
+            to_update[existing[key]] = Student(pk=existing[key], **data)
+            continue
+        if gkey not in global_existing and gkey not in to_create:
+            to_create[gkey] = Student(**data)
+        pending_links.append((user.pk, gkey))
+    for student in [*to_create.values(), *to_update.values()]:
+        student.refresh_search_fields()  # bulk_* no pasa por save()
+    Student.objects.bulk_create(to_create.values())
+    Student.objects.bulk_update(to_update.values(), ["level", "grade", "active", *Student.SEARCH_FIELDS])
+    result.add_created("alumnos", len(to_create))
+    result.add_created("alumnos actualizados", len(to_update))
+
+    student_pk = {**global_existing, **{k: s.pk for k, s in to_create.items()}}
+    links = [ResponsibleStudent(responsible_id=uid, student_id=student_pk[gkey]) for uid, gkey in pending_links]
+    ResponsibleStudent.objects.bulk_create(links, ignore_conflicts=True)
+    # bulk_create no dispara señales: invalidamos el perfil de acceso, los ETag y avisamos a la sincronización a mano
+    SyncChange.record_students(list(to_update))
+    SyncChange.record(SyncChange.STUDENT, [(link.responsible_id, link.student_id) for link in links])
+    invalidate_access_profiles([u.pk for u in users.values()])
+    bump_catalog_version()
+
+
+# --- historial ---
+
+def _validate_late(record):
+    errors = {}
+    try:
+        id8_validator(record["id_number"])
+    except ValidationError as e:
+        errors["documento"] = e.messages
+    for col, label in (("first_name", "nombre"), ("last_name", "apellido"), ("reason", "motivo")):
+        if not record.get(col):
+            errors[label] = ["Obligatorio."]
+    if len(str(record.get("reason", ""))) > 500:
+        errors["motivo"] = ["Máximo 500 caracteres."]
+    try:
+        reported_at = _parse_datetime(record.get("reported_at") or "")
+    except ValidationError as e:
+        errors["fecha"] = e.messages
+        reported_at = None
+    if errors:
+        return None, errors
+    return {**record, "reported_at": reported_at}, None
+
+
+@transaction.atomic
+def _import_lates_chunk(rows, result):
+    users = dict(User.objects.filter(id_number__in={r["id_number"] for _, r in rows})
+                 .values_list("id_number", "pk"))
+    students = _existing_students(users.values())
+
+    candidates = []
+    for line, r in rows:
+        uid = users.get(r["id_number"])
+        sid = students.get(_student_key(uid, r["first_name"], r["last_name"])) if uid else None
+        if sid is None:
+            result.reject(line, "No existe el responsable o el alumno asociado (importar el padrón primero).")
+            continue
+        candidates.append(LateArrival(responsible_id=uid, student_id=sid, reason=r["reason"],
+                                      reported_at=r["reported_at"]))
+
+    # re-importar el mismo archivo no duplica: se saltean avisos ya cargados (alumno + fecha/hora)
+    seen = set(LateArrival.objects
+               .filter(student_id__in={c.student_id for c in candidates},
+                       reported_at__in={c.reported_at for c in candidates})
+               .values_list("student_id", "reported_at"))
+    to_create = []
+    for c in candidates:
+        key = (c.student_id, c.reported_at)
+        if key not in seen:
+            seen.add(key)
+            to_create.append(c)
+    LateArrival.objects.bulk_create(to_create)  # actualiza contadores y tabla diaria
+    result.add_created("avisos", len(to_create))
+    result.add_created("avisos repetidos (salteados)", len(candidates) - len(to_create))
+
+
+VALIDATORS = {KIND_ROSTER: _validate_roster, KIND_LATES: _validate_late}
+CHUNK_IMPORTERS = {KIND_ROSTER: _import_roster_chunk, KIND_LATES: _import_lates_chunk}
+
+
+def run_import(fileobj, filename, kind, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Importa el archivo por lotes. Cada lote es una transacción: un lote fallido no pierde los anteriores."""
+    validate, import_chunk = VALIDATORS[kind], CHUNK_IMPORTERS[kind]
+    result = ImportResult()
+    for chunk in _chunks(iter_records(fileobj, filename, kind), chunk_size):
+        valid = []
+        for line, record in chunk:
+            data, errors = validate(record)
+            if errors:
+                result.reject(line, _errors_text(errors))
+            else:
+                valid.append((line, data))
+        if valid:
+            import_chunk(valid, result)
+        result.processed += len(chunk)
+        if progress:
+            progress(result)
+    return result
@@ -0,0 +1,133 @@
+# Avisos de hoy en vivo (Server-Sent Events). El pub/sub en proceso solo despierta a los
+# streams abiertos; los datos siempre se leen de la base desde un cursor (último id enviado),
+# así que con varios workers alcanza el sondeo periódico y Last-Event-ID retoma sin huecos.
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import LateArrival, StudentLateStats
+
+DEFAULT_LIVE_FEED = {
+    "POLL_SECONDS": 5,         # respaldo: avisos creados en otro worker/proceso
+    "HEARTBEAT_SECONDS": 15,   # comentario SSE para que proxies no corten la conexión
+    "MAX_SECONDS": 300,        # se cierra y el navegador reconecta solo (libera el worker)
+    "BATCH": 100,
+}
+
+
+def live_settings():
+    return {**DEFAULT_LIVE_FEED, **getattr(settings, "LIVE_FEED", {})}
+
+
+class Subscription:
+    def __init__(self, feed):
+        self.feed = feed
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.event.clear()
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+
+class LiveFeed:
+    """Pub/sub en proceso; publish() se puede llamar desde cualquier hilo."""
+
+    def __init__(self):
+        self._subs = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        sub = Subscription(self)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self):
+        with self._lock:
+            subs = list(self._subs)
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.event.set)
+            except RuntimeError:  # loop cerrado: el stream ya terminó
+                self.unsubscribe(sub)
+
+
+late_feed = LiveFeed()
+
+
+def new_lates_since(cursor, day=None, limit=100):
+    """Avisos del día con id > cursor, ya con los contadores del alumno, listos para JSON."""
+    day = day or timezone.localdate()
+    lates = list(LateArrival.objects.for_local_day(day)
+                 .filter(pk__gt=cursor)
+                 .select_related("student")
+                 .order_by("pk")[:limit])
+    stats = {
+        sid: (total, last30)
+        for sid, total, last30 in StudentLateStats.objects
+        .filter(student_id__in={l.student_id for l in lates})
+        .values_list("student_id", "total_count", "last30_count")
+    }
+    rows = []
+    for l in lates:
+        total, last30 = stats.get(l.student_id, (0, 0))
+        rows.append({
+            "id": l.pk,
+            "student_id": l.student_id,
+            "student": f"{l.student.last_name}, {l.student.first_name}",
+            "level": l.student.level,
+            "grade": l.student.grade,
+            "time": timezone.localtime(l.reported_at).strftime("%H:%M"),
+            "reason": l.reason,
+            "responsible_id": l.responsible_id,
+            "total_count": total,
+            "last30_count": last30,
+            "history_url": reverse("student_late_history", args=[l.student_id]),
+        })
+    return rows
+
+
+def sse_event(row):
+    return f"id: {row['id']}\nevent: late\ndata: {json.dumps(row, ensure_ascii=False)}\n\n"
+
+
+async def late_event_stream(cursor, conf=None):
+    """Generador SSE: manda lo pendiente desde el cursor y después lo nuevo a medida que llega."""
+    conf = conf or live_settings()
+    fetch = sync_to_async(new_lates_since)
+    loop = asyncio.get_running_loop()
+    sub = late_feed.subscribe()
+    deadline = loop.time() + conf["MAX_SECONDS"]
+    last_sent = loop.time()
+    try:
+        yield f"retry: {conf['POLL_SECONDS'] * 1000}\n\n"
+        while loop.time() < deadline:
+            rows = await fetch(cursor, limit=conf["BATCH"])
+            for row in rows:
+                yield sse_event(row)
+            if rows:
+                cursor, last_sent = rows[-1]["id"], loop.time()
+                if len(rows) == conf["BATCH"]:
+                    continue  # hay más: seguir sin esperar
+            elif loop.time() - last_sent >= conf["HEARTBEAT_SECONDS"]:
+                yield ": ping\n\n"
+                last_sent = loop.time()
+            await sub.wait(max(0, min(conf["POLL_SECONDS"], deadline - loop.time())))
+    finally:
+        sub.close()
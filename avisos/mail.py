@@ -0,0 +1,232 @@
+import logging
+import smtplib
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTBOX = {
+    # con qué se manda de verdad (send_outbox); el request solo escribe en la tabla
+    "SMTP_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+    "BATCH_SIZE": 50,            # mails por conexión SMTP
+    "MAX_PER_MINUTE": 20,        # ritmo parejo: Gmail corta ráfagas
+    "MAX_PER_DAY": 450,          # cupo de Gmail (500/día en cuentas comunes) con margen
+    "MAX_ATTEMPTS": 6,
+    "BACKOFF_SECONDS": 60,       # 1, 2, 4, 8... minutos entre reintentos
+    "MAX_BACKOFF_SECONDS": 3600,
+    "CLAIM_TIMEOUT_SECONDS": 600,  # "enviando" más viejo que esto = worker caído: se reencola
+}
+# respuestas 4xx y estas 5xx de Gmail son transitorias (cupo, límite de ritmo)
+QUOTA_MARKERS = (b"5.4.5", b"4.7.0", b"4.7.28")
+
+
+def outbox_settings():
+    return {**DEFAULT_OUTBOX, **getattr(settings, "OUTBOX", {})}
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """EMAIL_BACKEND que no habla SMTP: encola en OutboxEmail (dentro de la transacción del request)."""
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            recipients = message.recipients()
+            if not recipients:
+                continue
+            encoding = message.encoding or settings.DEFAULT_CHARSET
+            rows.append(OutboxEmail(
+                from_email=sanitize_address(message.from_email, encoding),
+                recipients=[sanitize_address(addr, encoding) for addr in recipients],
+                subject=str(message.subject)[:255],
+                raw=message.message().as_bytes(linesep="\r\n"),
+            ))
+        try:
+            OutboxEmail.objects.bulk_create(rows)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(rows)
+
+
+@dataclass
+class OutboxRun:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    stopped: str = ""  # motivo si se cortó antes de vaciar el lote
+
+
+class _Stop(Exception):
+    pass
+
+
+class OutboxSender:
+    """
+    Vacía la cola por lotes sobre una sola conexión SMTP, respetando el ritmo por minuto y
+    el cupo diario. sleep/clock se inyectan para poder testear el ritmo sin esperar.
+    """
+
+    def __init__(self, conf=None, sleep=time.sleep, clock=time.monotonic):
+        self.conf = {**outbox_settings(), **(conf or {})}
+        self.sleep = sleep
+        self.clock = clock
+        self._last_send = None
+
+    def run_once(self):
+        result = OutboxRun()
+        now = timezone.now()
+        self._reclaim_stale(now)
+        remaining = self.conf["MAX_PER_DAY"] - OutboxEmail.objects.filter(
+            sent_at__gte=now - timedelta(days=1)).count()
+        if remaining <= 0:
+            result.stopped = "cupo diario agotado"
+            return result
+        batch = self._claim(now, min(self.conf["BATCH_SIZE"], remaining))
+        if not batch:
+            return result
+
+        connection = get_connection(self.conf["SMTP_BACKEND"], fail_silently=False)
+        pending = list(batch)
+        try:
+            self._open(connection)
+            while pending:
+                email = pending[0]
+                self._pace()
+                try:
+                    refused = connection.connection.sendmail(email.from_email, email.recipients, bytes(email.raw))
+                except smtplib.SMTPServerDisconnected as e:
+                    # se cortó la conexión: reintenta este mail en el próximo lote y reconecta para el resto
+                    self._retry(email, e, result)
+                    pending.pop(0)
+                    connection.close()
+                    self._open(connection)
+                    continue
+                except smtplib.SMTPRecipientsRefused as e:
+                    if all(400 <= code < 500 for code, _ in e.recipients.values()):
+                        self._retry(email, e, result)  # casilla llena, greylisting...
+                    else:
+                        self._fail(email, e, result)
+                except smtplib.SMTPResponseException as e:
+                    if _is_quota(e):
+                        self._retry(email, e, result, delay=self.conf["MAX_BACKOFF_SECONDS"])
+                        pending.pop(0)
+                        raise _Stop(f"límite del servidor: {e.smtp_code} {_decode(e.smtp_error)}")
+                    if 400 <= e.smtp_code < 500:
+                        self._retry(email, e, result)
+                    else:
+                        self._fail(email, e, result)
+                except (smtplib.SMTPException, OSError) as e:
+                    self._retry(email, e, result)
+                else:
+                    self._sent(email, refused, result)
+                pending.pop(0)
+        except _Stop as e:
+            result.stopped = str(e)
+        except (smtplib.SMTPException, OSError) as e:
+            # no se pudo (re)conectar: el resto vuelve a la cola con backoff
+            result.stopped = f"sin conexión SMTP: {e}"
+            for email in pending:
+                self._retry(email, e, result)
+            pending = []
+        finally:
+            self._release(pending)
+            connection.close()
+        return result
+
+    # --- cola ---
+
+    def _reclaim_stale(self, now):
+        limit = now - timedelta(seconds=self.conf["CLAIM_TIMEOUT_SECONDS"])
+        OutboxEmail.objects.filter(status=OutboxEmail.SENDING, claimed_at__lt=limit).update(
+            status=OutboxEmail.PENDING, claimed_at=None)
+
+    def _claim(self, now, limit):
+        # transacción corta: el envío SMTP (lento) pasa fuera, sin bloquear la base
+        with transaction.atomic():
+            ids = list(OutboxEmail.objects
+                       .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+                       .order_by("next_attempt_at", "id")
+                       .values_list("id", flat=True)[:limit])
+            # status=PENDING otra vez: si otro worker ganó la carrera, esas filas no se toman
+            OutboxEmail.objects.filter(pk__in=ids, status=OutboxEmail.PENDING).update(
+                status=OutboxEmail.SENDING, claimed_at=now)
+        return list(OutboxEmail.objects.filter(pk__in=ids, status=OutboxEmail.SENDING, claimed_at=now)
+                    .order_by("next_attempt_at", "id"))
+
+    def _release(self, emails):
+        # reclamados pero nunca intentados: vuelven tal cual, sin contar intento
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[e.pk for e in emails], status=OutboxEmail.SENDING).update(
+                status=OutboxEmail.PENDING, claimed_at=None)
+
+    def _sent(self, email, refused, result):
+        email.status, email.sent_at, email.claimed_at = OutboxEmail.SENT, timezone.now(), None
+        email.attempts += 1
+        email.last_error = f"rechazados: {', '.join(refused)}" if refused else ""
+        email.save(update_fields=["status", "sent_at", "claimed_at", "attempts", "last_error"])
+        result.sent += 1
+
+    def _retry(self, email, error, result, delay=None):
+        email.attempts += 1
+        email.last_error = _describe(error)
+        email.claimed_at = None
+        if email.attempts >= self.conf["MAX_ATTEMPTS"]:
+            email.status = OutboxEmail.FAILED
+            result.failed += 1
+            logger.warning("Mail %s descartado tras %s intentos: %s", email.pk, email.attempts, email.last_error)
+        else:
+            if delay is None:
+                delay = min(self.conf["MAX_BACKOFF_SECONDS"], self.conf["BACKOFF_SECONDS"] * 2 ** (email.attempts - 1))
+            email.status = OutboxEmail.PENDING
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            result.retried += 1
+        email.save(update_fields=["status", "attempts", "last_error", "claimed_at", "next_attempt_at"])
+
+    def _fail(self, email, error, result):
+        email.attempts += 1
+        email.status, email.last_error, email.claimed_at = OutboxEmail.FAILED, _describe(error), None
+        email.save(update_fields=["status", "attempts", "last_error", "claimed_at"])
+        result.failed += 1
+        logger.warning("Mail %s rechazado: %s", email.pk, email.last_error)
+
+    # --- SMTP ---
+
+    def _open(self, connection):
+        connection.open()
+        if connection.connection is None:
+            raise smtplib.SMTPServerDisconnected("no se pudo abrir la conexión")
+
+    def _pace(self):
+        interval = 60 / self.conf["MAX_PER_MINUTE"]
+        if self._last_send is not None:
+            wait = self._last_send + interval - self.clock()
+            if wait > 0:
+                self.sleep(wait)
+        self._last_send = self.clock()
+
+
+def _is_quota(error):
+    return any(marker in (error.smtp_error or b"") for marker in QUOTA_MARKERS)
+
+
+def _decode(value):
+    return value.decode(errors="replace") if isinstance(value, bytes) else str(value)
+
+
+def _describe(error):
+    if isinstance(error, smtplib.SMTPResponseException):
+        return f"{error.smtp_code} {_decode(error.smtp_error)}"
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return "; ".join(f"{addr}: {code} {_decode(msg)}" for addr, (code, msg) in error.recipients.items())
+    return f"{type(error).__name__}: {error}"
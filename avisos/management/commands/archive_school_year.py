@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from avisos.archive import ArchiveError, archivable_years, archive_school_year
+
+
+class Command(BaseCommand):
+    help = ("Mueve los avisos de ciclos lectivos cerrados (marzo a febrero) a la tabla de archivo, por lotes. "
+            "El historial por alumno y los reportes totalizados siguen mostrándolos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, action="append",
+                            help="Ciclo a archivar (p. ej. 2023 = mar/2023..feb/2024). Repetible. "
+                                 "Por defecto: todos los ciclos cerrados.")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Avisos por transacción.")
+
+    def handle(self, *args, year, batch_size, **opts):
+        years = year or archivable_years()
+        if not years:
+            self.stdout.write("No hay ciclos cerrados para archivar.")
+            return
+        for y in sorted(years):
+            try:
+                n = archive_school_year(y, batch_size=batch_size,
+                                        on_batch=lambda moved: self.stdout.write(f"  {y}: {moved} aviso(s)..."))
+            except ArchiveError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"Ciclo {y}: {n} aviso(s) archivados."))
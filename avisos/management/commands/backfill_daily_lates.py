@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from avisos.models import ArchivedLateArrival, LateArrival, LateSlotCounts, StudentDailyLates
+
+
+class Command(BaseCommand):
+    help = ("Recalcula las tablas diarias (StudentDailyLates por alumno y LateSlotCounts por grado y franja "
+            "horaria) desde los avisos, por tramos de días.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="AAAA-MM-DD (por defecto: primer aviso)")
+        parser.add_argument("--to", dest="date_to", help="AAAA-MM-DD (por defecto: hoy)")
+        parser.add_argument("--chunk-days", type=int, default=31,
+                            help="Días por transacción (acota el tiempo que se bloquea la base).")
+
+    def handle(self, *args, date_from, date_to, chunk_days, **opts):
+        d1 = self._parse(date_from) if date_from else None
+        d2 = self._parse(date_to) if date_to else timezone.localdate()
+        if d1 is None:
+            firsts = [model.objects.order_by("reported_at").values_list("reported_at", flat=True).first()
+                      for model in (ArchivedLateArrival, LateArrival)]
+            first = min((f for f in firsts if f is not None), default=None)
+            if first is None:
+                self.stdout.write("No hay avisos.")
+                return
+            d1 = timezone.localdate(first)
+        if d1 > d2:
+            raise CommandError("--from debe ser anterior a --to")
+
+        total = 0
+        start = d1
+        while start <= d2:
+            end = min(start + timedelta(days=chunk_days - 1), d2)
+            n = StudentDailyLates.backfill(start, end)
+            slots = LateSlotCounts.backfill(start, end)
+            total += n
+            self.stdout.write(f"{start} .. {end}: {n} fila(s), {slots} por franja")
+            start = end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Listo: {total} fila(s) diarias."))
+
+    @staticmethod
+    def _parse(value):
+        d = parse_date(value)
+        if d is None:
+            raise CommandError(f"Fecha inválida: {value}")
+        return d
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from avisos.alerts import replay_history
+
+
+class Command(BaseCommand):
+    help = ("Rearma las ventanas de impuntualidad (LateWindowState) recorriendo todos los avisos y crea las "
+            "alertas de las reglas activas que falten. Correr después de crear o cambiar reglas, "
+            "fuera del horario de entrada (las bajas de avisos durante la corrida no se ven hasta la próxima).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true",
+                            help="Borra antes todas las alertas (también las ya vistas) y las vuelve a generar.")
+
+    def handle(self, *args, reset, **opts):
+        n, alerts = replay_history(reset_alerts=reset)
+        self.stdout.write(self.style.SUCCESS(f"{n} avisos procesados, {alerts} alertas nuevas."))
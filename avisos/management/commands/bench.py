@@ -0,0 +1,178 @@
+import json
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.models import User, Student, ResponsibleStudent, LateArrival, StudentLateStats
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano (sin interpolar): con pocas corridas no inventa valores."""
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[k]
+
+
+class Command(BaseCommand):
+    help = ("Mide cada vista y exportación con el cliente de test (p50/p95, consultas, memoria pico) "
+            "y emite JSON para comparar corridas entre commits. Pensado para correr después de seed_benchmark.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", nargs="+", metavar="CASO", help="Correr solo estos casos.")
+        parser.add_argument("--output", help="Guardar el JSON en este archivo (además de stdout).")
+        parser.add_argument("--baseline", help="JSON de una corrida anterior: agrega la variación de p50.")
+
+    def handle(self, *args, repeat, warmup, only, output, baseline, **opts):
+        if repeat < 1:
+            raise CommandError("--repeat debe ser al menos 1")
+        staff, resp, student = self._pick_users()
+        cases = self._cases(staff, resp, student)
+        if only:
+            unknown = set(only) - {c["name"] for c in cases}
+            if unknown:
+                raise CommandError(f"Casos desconocidos: {', '.join(sorted(unknown))}")
+            cases = [c for c in cases if c["name"] in only]
+        previous = self._load(baseline) if baseline else {}
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for case in cases:
+                self.stderr.write(f"{case['name']}...")
+                results[case["name"]] = stats = self._run_case(case, repeat, warmup)
+                before = previous.get(case["name"])
+                if before and before.get("p50_ms"):
+                    stats["delta_p50_pct"] = round((stats["p50_ms"] / before["p50_ms"] - 1) * 100, 1)
+
+        report = {"meta": self._meta(repeat, warmup), "cases": results}
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if output:
+            Path(output).write_text(text + "\n", encoding="utf-8")
+        self.stdout.write(text)
+
+    def _pick_users(self):
+        staff = User.objects.filter(is_school_staff=True).order_by("pk").first()
+        # el alumno con más avisos y uno de sus responsables: el peor caso realista
+        top = StudentLateStats.objects.order_by("-total_count").values_list("student_id", flat=True).first()
+        student = Student.objects.filter(pk=top).first() if top else Student.objects.order_by("pk").first()
+        link = ResponsibleStudent.objects.filter(student=student).select_related("responsible").first()
+        if staff is None or student is None or link is None:
+            raise CommandError("Faltan datos: correr antes seed_benchmark.")
+        return staff, link.responsible, student
+
+    def _cases(self, staff, resp, student):
+        today = timezone.localdate()
+        month = {"date_from": (today - timedelta(days=30)).isoformat(), "date_to": today.isoformat()}
+        year = {"date_from": (today - timedelta(days=365)).isoformat(), "date_to": today.isoformat()}
+        detailed = reverse("report_lates_detailed")
+        aggregated = reverse("report_lates_aggregated")
+        notify_data = {
+            "students": list(resp.students.filter(active=True).values_list("pk", flat=True)),
+            "reason": "bench",
+        }
+        return [
+            {"name": "home", "user": resp, "url": reverse("home")},
+            {"name": "notify_form", "user": resp, "url": reverse("notify_late")},
+            {"name": "notify_post", "user": resp, "url": reverse("notify_late"), "data": notify_data},
+            {"name": "notifications_list", "user": resp, "url": reverse("notifications_list")},
+            {"name": "today_list", "user": staff, "url": reverse("school_today_lates")},
+            {"name": "student_history", "user": staff, "url": reverse("student_late_history", args=[student.pk])},
+            {"name": "report_detailed", "user": staff, "url": detailed, "params": month},
+            {"name": "export_xlsx", "user": staff, "url": detailed, "params": {**month, "export": "xlsx"}},
+            {"name": "export_csv_year", "user": staff, "url": detailed, "params": {**year, "export": "csv"}},
+            {"name": "report_aggregated", "user": staff, "url": aggregated},
+            {"name": "report_aggregated_year", "user": staff, "url": aggregated, "params": year},
+            {"name": "report_aggregated_resp", "user": resp, "url": aggregated},
+            {"name": "report_analytics", "user": staff, "url": reverse("report_lates_analytics")},
+        ]
+
+    def _run_case(self, case, repeat, warmup):
+        client = Client()
+        client.force_login(case["user"])
+        for _ in range(warmup):
+            self._request(client, case)
+
+        latencies, queries = [], []
+        status = size = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                status, size = self._request(client, case)
+                latencies.append(time.perf_counter() - t0)
+            queries.append(len(ctx.captured_queries))
+
+        # memoria aparte: tracemalloc frena bastante y ensuciaría las latencias
+        tracemalloc.start()
+        try:
+            self._request(client, case)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "status": status,
+            "bytes": size,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "min_ms": round(min(latencies) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+            "queries": percentile(queries, 50),
+            "queries_max": max(queries),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    @staticmethod
+    def _request(client, case):
+        if "data" in case:
+            # las escrituras se deshacen: cada corrida mide lo mismo y la base queda igual
+            with transaction.atomic():
+                response = client.post(case["url"], case["data"])
+                transaction.set_rollback(True)
+        else:
+            response = client.get(case["url"], case.get("params", {}))
+        if response.status_code >= 400:
+            raise CommandError(f"{case['name']}: HTTP {response.status_code}")
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        response.close()
+        return response.status_code, size
+
+    @staticmethod
+    def _meta(repeat, warmup):
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                    cwd=settings.BASE_DIR, timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": timezone.now().isoformat(timespec="seconds"),
+            "db_vendor": connection.vendor,
+            "repeat": repeat,
+            "warmup": warmup,
+            "rows": {
+                "users": User.objects.count(),
+                "students": Student.objects.count(),
+                "late_arrivals": LateArrival.objects.count(),
+            },
+        }
+
+    @staticmethod
+    def _load(path):
+        try:
+            return json.loads(Path(path).read_text(encoding="utf-8"))["cases"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"No se pudo leer {path}: {e}")
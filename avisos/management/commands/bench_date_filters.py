@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from avisos.models import User, Student, LateArrival
+
+# base SQLite temporal cuando no se pasa --database
+SCRATCH_ALIAS = "bench_date_filters"
+
+
+class Command(BaseCommand):
+    help = ("Compara reported_at__date contra for_local_day/for_local_range sobre N filas sintéticas. "
+            "Nunca sobre la base por defecto: sin --database usa una SQLite temporal (se borra al final); "
+            "con --database, un alias de prueba ya migrado (las filas se descartan al final).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--days", type=int, default=365 * 3, help="Días hacia atrás que cubren las filas.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--database", default=None,
+                            help="Alias de una base de prueba (no 'default'). Sin esto: SQLite temporal.")
+
+    def handle(self, *args, rows, days, repeat, database, **opts):
+        if database == DEFAULT_DB_ALIAS:
+            raise CommandError("No se corre sobre la base por defecto: el millón de filas tomaría el lock de "
+                               "escritura todo el tiempo. Usar otro alias o ninguno (SQLite temporal).")
+        if database is not None and database not in connections.settings:
+            raise CommandError(f"Alias desconocido: {database}")
+        if database is not None:
+            self._run(database, rows, days, repeat)
+            return
+
+        tmpdir = tempfile.mkdtemp(prefix="bench-date-filters-")
+        connections.settings[SCRATCH_ALIAS] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            SCRATCH_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(Path(tmpdir) / "bench.sqlite3")},
+        })[SCRATCH_ALIAS]
+        try:
+            # solo las tablas que usa la comparación (migrate correría las migraciones de datos sobre "default")
+            with connections[SCRATCH_ALIAS].schema_editor() as editor:
+                for model in (User, Student, LateArrival):
+                    editor.create_model(model)
+            self._run(SCRATCH_ALIAS, rows, days, repeat)
+        finally:
+            connections[SCRATCH_ALIAS].close()
+            del connections[SCRATCH_ALIAS]
+            del connections.settings[SCRATCH_ALIAS]
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _run(self, alias, rows, days, repeat):
+        lates = LateArrival.objects.using(alias)
+        with transaction.atomic(using=alias):
+            self._seed(alias, rows, days)
+            today = timezone.localdate()
+            d1 = today - timedelta(days=30)
+            cases = [
+                ("día (hoy)",
+                 lambda: lates.filter(reported_at__date=today).count(),
+                 lambda: lates.for_local_day(today).count()),
+                ("rango 30 días",
+                 lambda: lates.filter(reported_at__date__gte=d1, reported_at__date__lte=today).count(),
+                 lambda: lates.for_local_range(d1, today).count()),
+            ]
+            for label, old, new in cases:
+                n_old, t_old = self._time(old, repeat)
+                n_new, t_new = self._time(new, repeat)
+                if n_old != n_new:
+                    self.stderr.write(self.style.ERROR(f"{label}: resultados distintos ({n_old} vs {n_new})"))
+                self.stdout.write(
+                    f"{label:<14} __date: {t_old * 1000:9.1f} ms   rango: {t_new * 1000:9.1f} ms   "
+                    f"x{t_old / t_new if t_new else float('inf'):.0f}   ({n_new} filas)"
+                )
+            transaction.set_rollback(True, using=alias)
+
+    def _seed(self, alias, rows, days):
+        """
+        Inserta en crudo: sin save() ni LateArrivalQuerySet.bulk_create no pasan por contadores,
+        alertas, sync ni avisos en vivo (que además escriben en la base por defecto).
+        """
+        self.stdout.write(f"Insertando {rows} filas en '{alias}'...")
+        user, = User.objects.using(alias).bulk_create([
+            User(id_number="00000000", full_name="Bench", email="bench@ccm.invalid", password="!")])
+        student, = Student.objects.using(alias).bulk_create([
+            Student(first_name="Bench", last_name="Bench", level="PRIMARIA", grade=1)])
+
+        connection = connections[alias]
+        qn = connection.ops.quote_name
+        fields = [LateArrival._meta.get_field(name) for name in ("responsible", "student", "reason", "reported_at")]
+        sql = (f"INSERT INTO {qn(LateArrival._meta.db_table)} ({', '.join(qn(f.column) for f in fields)}) "
+               f"VALUES ({', '.join(['%s'] * len(fields))})")
+        reported_at = LateArrival._meta.get_field("reported_at")
+        now = timezone.now()
+        step = timedelta(days=days) / max(rows, 1)
+        with connection.cursor() as cursor:
+            for start in range(0, rows, 10_000):
+                cursor.executemany(sql, [
+                    (user.pk, student.pk, "bench", reported_at.get_db_prep_save(now - step * i, connection))
+                    for i in range(start, min(start + 10_000, rows))
+                ])
+
+    @staticmethod
+    def _time(fn, repeat):
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
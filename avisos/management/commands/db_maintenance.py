@@ -0,0 +1,106 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from avisos.db import incremental_vacuum, sqlite_file_stats, sqlite_pragmas
+from avisos.sync import prune_sync_changes
+
+
+class Command(BaseCommand):
+    help = ("Mantenimiento de la base: borra sesiones vencidas y el registro de sincronización viejo, "
+            "actualiza estadísticas del planificador (PRAGMA optimize / ANALYZE), devuelve páginas libres "
+            "con incremental_vacuum por tramos y trunca el WAL. Todo en transacciones cortas: se puede "
+            "correr desde cron en horario escolar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true",
+                            help="ANALYZE completo en vez de PRAGMA optimize (más lento; mejor fuera de horario).")
+        parser.add_argument("--vacuum-seconds", type=float, default=5,
+                            help="Tiempo máximo para incremental_vacuum (0 = no vaciar).")
+        parser.add_argument("--vacuum-pages", type=int, default=256, help="Páginas por tramo de incremental_vacuum.")
+        parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                            help="Pasa la base a auto_vacuum=INCREMENTAL con un VACUUM completo. Bloquea "
+                                 "la base mientras dura: correr una sola vez y fuera de horario.")
+        parser.add_argument("--busy-timeout", type=int, default=2000,
+                            help="ms que cada paso espera un lock antes de rendirse (no frena a la app).")
+
+    def handle(self, *args, analyze, vacuum_seconds, vacuum_pages, enable_incremental_vacuum, busy_timeout, **opts):
+        started = time.monotonic()
+        self.step("Sesiones vencidas", self.clear_sessions)
+        self.step("Registro de sincronización", lambda: f"{prune_sync_changes()} cambio(s) borrados")
+
+        if connection.vendor != "sqlite":
+            self.stdout.write("La base no es SQLite: se omiten los PRAGMA de mantenimiento.")
+            return
+
+        before = sqlite_file_stats(connection)
+        self.report("Antes", before)
+        with connection.cursor() as cursor:
+            # esperar poco por los locks: si la app está escribiendo, se sigue en la próxima corrida
+            cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout)}")
+        try:
+            if enable_incremental_vacuum and before["auto_vacuum"] != "INCREMENTAL":
+                self.step("VACUUM (auto_vacuum=INCREMENTAL)", self.enable_incremental)
+            self.step("ANALYZE" if analyze else "PRAGMA optimize", lambda: self.optimize(analyze))
+            if vacuum_seconds > 0:
+                self.step("incremental_vacuum", lambda: self.vacuum(vacuum_seconds, vacuum_pages))
+            self.step("wal_checkpoint(TRUNCATE)", self.checkpoint)
+        finally:
+            # la conexión puede reutilizarse (CONN_MAX_AGE): vuelve a su configuración
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA busy_timeout = {int(sqlite_pragmas()['busy_timeout'])}")
+
+        self.report("Después", sqlite_file_stats(connection))
+        self.stdout.write(self.style.SUCCESS(f"Listo en {time.monotonic() - started:.2f} s."))
+
+    def step(self, name, func):
+        t0 = time.monotonic()
+        detail = func()
+        self.stdout.write(f"{name}: {detail} ({time.monotonic() - t0:.2f} s)")
+
+    def report(self, label, stats):
+        self.stdout.write(
+            f"{label}: {stats['file_bytes'] / 1024 / 1024:.1f} MiB en disco, {stats['page_count']} páginas "
+            f"de {stats['page_size']} B, {stats['freelist_count']} libres, auto_vacuum={stats['auto_vacuum']}"
+        )
+
+    def clear_sessions(self):
+        engine = import_module(settings.SESSION_ENGINE)
+        try:
+            engine.SessionStore.clear_expired()
+        except NotImplementedError:
+            return "el motor de sesiones no lo soporta"
+        return "borradas"
+
+    def optimize(self, full):
+        with connection.cursor() as cursor:
+            if full:
+                cursor.execute("ANALYZE")
+            else:
+                # analysis_limit acota cuántas filas mira ANALYZE por índice (pasos cortos)
+                cursor.execute("PRAGMA analysis_limit = 1000")
+                cursor.execute("PRAGMA optimize")
+        return "ok"
+
+    def vacuum(self, seconds, pages):
+        mode = sqlite_file_stats(connection)["auto_vacuum"]
+        if mode != "INCREMENTAL":
+            return f"omitido: auto_vacuum={mode} (habilitar una vez con --enable-incremental-vacuum)"
+        return f"{incremental_vacuum(connection, seconds, pages)} página(s) liberadas"
+
+    def enable_incremental(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")  # el cambio de modo recién se aplica al reconstruir el archivo
+        return "ok"
+
+    def checkpoint(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, log_frames, checkpointed = cursor.fetchone()
+        if busy:
+            return f"parcial: había lectores activos ({checkpointed}/{log_frames} páginas)"
+        return f"{checkpointed} página(s) pasadas a la base"
@@ -0,0 +1,43 @@
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from avisos.imports import KIND_LATES, KIND_ROSTER, IMPORT_CHUNK_SIZE, ImportFileError, run_import
+
+
+class Command(BaseCommand):
+    help = ("Importa padrón (responsables + alumnos) o historial de llegadas tarde desde CSV/XLSX. "
+            "Padrón: documento, nombre_completo, email, nombre, apellido, nivel, grado[, activo]. "
+            "Historial: documento, nombre, apellido, fecha, motivo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=[KIND_ROSTER, KIND_LATES])
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--rejects", help="CSV donde guardar las filas rechazadas.")
+
+    def handle(self, *args, kind, path, chunk_size, rejects, **opts):
+        path = Path(path)
+        if not path.exists():
+            raise CommandError(f"No existe {path}")
+
+        def progress(result):
+            self.stdout.write(f"  {result.processed} fila(s) procesadas, {result.rejected_total} rechazada(s)")
+
+        with path.open("rb") as f:
+            try:
+                result = run_import(f, path.name, kind, chunk_size=chunk_size, progress=progress)
+            except ImportFileError as e:
+                raise CommandError(str(e))
+
+        for key, n in result.created.items():
+            self.stdout.write(f"{key}: {n}")
+        if rejects and result.rejected:
+            with open(rejects, "w", newline="", encoding="utf-8") as out:
+                w = csv.writer(out)
+                w.writerow(["fila", "error"])
+                w.writerows(result.rejected)
+            self.stdout.write(f"Filas rechazadas guardadas en {rejects}")
+        style = self.style.WARNING if result.rejected_total else self.style.SUCCESS
+        self.stdout.write(style(f"Listo: {result.processed} fila(s), {result.rejected_total} rechazada(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from avisos.sync import prune_sync_changes, sync_settings
+
+
+class Command(BaseCommand):
+    help = ("Borra del registro de sincronización (SyncChange) los cambios más viejos que SYNC['RETENTION_DAYS']. "
+            "Los clientes con tokens anteriores reciben todo de nuevo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help=f"Días a conservar (default: {sync_settings()['RETENTION_DAYS']}).")
+
+    def handle(self, *args, days, **opts):
+        deleted = prune_sync_changes(days)
+        self.stdout.write(f"Cambios borrados: {deleted}")
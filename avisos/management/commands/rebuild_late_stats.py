@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from avisos.models import StudentLateStats
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero los contadores por alumno (StudentLateStats), o solo corre la ventana de 30 días."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-only", action="store_true",
+                            help="Solo actualizar 'últimos 30 días' (pensado para cron).")
+
+    def handle(self, *args, window_only, **opts):
+        if window_only:
+            n = StudentLateStats.refresh_window(tolerance=0)
+            self.stdout.write(self.style.SUCCESS(f"Ventana de 30 días actualizada ({n} alumno(s) recalculados)."))
+            return
+        n = StudentLateStats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Contadores reconstruidos para {n} alumno(s)."))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from avisos.export_jobs import claim_next_job, purge_expired_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = ("Genera las exportaciones pedidas en segundo plano (ExportJob) y las deja en EXPORTS_ROOT. "
+            "Los libros de ciclo lectivo arman cada grado en un proceso aparte (--workers). "
+            "Con --loop queda corriendo como worker.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="No terminar: volver a mirar la cola cada --interval.")
+        parser.add_argument("--interval", type=float, default=5, help="Segundos entre vueltas con la cola vacía.")
+        parser.add_argument("--workers", type=int, help="Procesos por libro de ciclo lectivo (default: EXPORT_WORKERS).")
+
+    def handle(self, *args, loop, interval, workers, **opts):
+        purged = purge_expired_jobs()
+        if purged:
+            self.stdout.write(f"Exportaciones vencidas borradas: {purged}")
+        while True:
+            job = claim_next_job()
+            if job is not None:
+                run_job(job, workers=workers)
+                self.stdout.write(f"Exportación {job.pk}: {job.get_status_display()} ({job.row_count} filas)"
+                                  + (f" - {job.error}" if job.error else ""))
+                continue
+            if not loop:
+                break
+            time.sleep(interval)
@@ -0,0 +1,186 @@
+import random
+from itertools import accumulate
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils import timezone
+
+from avisos.db import raw_delete
+from avisos.models import (User, Student, ResponsibleStudent, LateArrival, ArchivedLateArrival, LatenessAlert,
+                           StudentDailyLates, StudentLateStats, SyncChange, student_grades)
+
+BENCH_DOMAIN = "bench.invalid"
+BENCH_PASSWORD = "bench"
+# documentos 7xxxxxxx: 70000000 = personal de la escuela, 70000001.. = responsables
+BENCH_ID_BASE = 70_000_000
+
+FIRST_NAMES = ["Sofía", "Mateo", "Valentina", "Benjamín", "Martina", "Joaquín", "Lucía", "Tomás", "Emilia",
+               "Santiago", "Isabella", "Thiago", "Catalina", "Agustín", "Julieta", "Facundo", "Renata",
+               "Máximo", "Camila", "Ignacio", "Ana", "José", "María", "Nicolás", "Paula", "Ramón"]
+LAST_NAMES = ["González", "Rodríguez", "Fernández", "López", "Martínez", "Pérez", "García", "Sánchez",
+              "Romero", "Díaz", "Álvarez", "Torres", "Ruiz", "Suárez", "Gómez", "Acosta", "Benítez",
+              "Medina", "Núñez", "Sosa", "Castro", "Ibáñez", "Ortiz", "Silva", "Muñoz", "Peña"]
+REASONS = ["Tránsito", "Se quedó dormido", "Turno médico", "Problemas con el transporte", "Lluvia",
+           "Corte de calle", "Trámite familiar", "Se sintió mal a primera hora"]
+GRADES = {"INICIAL": range(3, 6), "PRIMARIA": range(1, 7), "SECUNDARIA": range(1, 7)}
+
+
+class Command(BaseCommand):
+    help = ("Genera datos sintéticos en volumen (responsables, alumnos y avisos de varios años) para "
+            "correr 'bench'. Todo lo generado usa emails @bench.invalid y se puede borrar con --flush.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--responsibles", type=int, default=5_000)
+        parser.add_argument("--students", type=int, default=10_000)
+        parser.add_argument("--lates", type=int, default=2_000_000)
+        parser.add_argument("--years", type=float, default=3, help="Años hacia atrás que cubren los avisos.")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42, help="Semilla: mismos parámetros = mismos datos.")
+        parser.add_argument("--flush", action="store_true", help="Borrar antes los datos de un seed anterior.")
+
+    def handle(self, *args, responsibles, students, lates, years, batch_size, seed, flush, **opts):
+        if responsibles < 1 or students < 1:
+            raise CommandError("--responsibles y --students deben ser al menos 1")
+        if responsibles >= 10_000_000:
+            raise CommandError("--responsibles debe ser menor a 10.000.000 (documentos de 8 dígitos)")
+        bench_users = User.objects.filter(email__endswith="@" + BENCH_DOMAIN)
+        self.flushed_from = None
+        if flush:
+            self._flush(bench_users)
+        elif bench_users.exists():
+            raise CommandError("Ya hay datos de un seed anterior: usar --flush para regenerarlos.")
+
+        rng = random.Random(seed)
+        with transaction.atomic():
+            staff, resp_ids = self._seed_users(responsibles, batch_size)
+            links = self._seed_students(students, resp_ids, rng, batch_size)
+        n = self._seed_lates(links, staff, lates, years, rng, batch_size)
+        self.stdout.write(f"Avisos: {n}")
+
+        # los avisos se insertaron (y los del seed anterior se borraron) sin pasar por los contadores:
+        # se recalculan de una vez, desde el primer día que tocó cualquiera de los dos
+        call_command("rebuild_late_stats", stdout=self.stdout)
+        backfill = ["--chunk-days", "92"]
+        first = LateArrival.objects.order_by("reported_at").values_list("reported_at", flat=True).first()
+        if self.flushed_from and first and self.flushed_from < timezone.localdate(first):
+            backfill += ["--from", self.flushed_from.isoformat()]
+        call_command("backfill_daily_lates", *backfill, stdout=self.stdout)
+        call_command("backfill_lateness_alerts", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo. Personal: {staff.id_number} / responsables: {BENCH_ID_BASE + 1}.. (clave '{BENCH_PASSWORD}')"
+        ))
+
+    def _flush(self, bench_users):
+        """
+        Borra lo de un seed anterior. Los avisos y sus tablas por alumno se borran en crudo (sin
+        señales: record_late_changes aviso por aviso tarda horas con millones de filas) y por lotes,
+        cada uno en su transacción, así la app no queda bloqueada. Las tablas por grado/franja y las
+        ventanas de alertas se recalculan enteras al final del seed.
+        """
+        student_ids = list(ResponsibleStudent.objects.filter(responsible__in=bench_users)
+                           .values_list("student_id", flat=True).distinct())
+        firsts = [model.objects.filter(student_id__in=student_ids).order_by("reported_at")
+                  .values_list("reported_at", flat=True).first() for model in (LateArrival, ArchivedLateArrival)]
+        first = min((f for f in firsts if f is not None), default=None)
+        self.flushed_from = timezone.localdate(first) if first else None
+        lates = 0
+        for start in range(0, len(student_ids), 500):
+            chunk = student_ids[start:start + 500]
+            with transaction.atomic():
+                for model in (LateArrival, ArchivedLateArrival, StudentLateStats, StudentDailyLates, LatenessAlert):
+                    n = raw_delete(model, "student", chunk)
+                    if model in (LateArrival, ArchivedLateArrival):
+                        lates += n
+                # ya sin avisos: CASCADE solo se lleva los vínculos
+                Student.objects.filter(pk__in=chunk).delete()
+        with transaction.atomic():
+            LateArrival.objects.filter(reviewed_by__in=bench_users).update(reviewed_by=None)
+            raw_delete(SyncChange, "responsible", bench_users.values_list("pk", flat=True))
+            n, _ = bench_users.delete()
+        self.stdout.write(f"Borrados {len(student_ids)} alumno(s), {lates} aviso(s) y {n} fila(s) relacionadas.")
+
+    def _seed_users(self, responsibles, batch_size):
+        password = make_password(BENCH_PASSWORD)  # un solo hash: hashear 5k claves tarda minutos
+        staff = User.objects.create(
+            id_number=str(BENCH_ID_BASE), full_name="Preceptoría Bench", email=f"staff@{BENCH_DOMAIN}",
+            password=password, is_school_staff=True,
+        )
+        User.objects.bulk_create(
+            (User(id_number=str(BENCH_ID_BASE + i), full_name=f"{FIRST_NAMES[i % len(FIRST_NAMES)]} "
+                  f"{LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}",
+                  email=f"resp{i}@{BENCH_DOMAIN}", password=password)
+             for i in range(1, responsibles + 1)),
+            batch_size=batch_size,
+        )
+        resp_ids = list(User.objects.filter(email__endswith="@" + BENCH_DOMAIN, is_school_staff=False)
+                        .order_by("id_number").values_list("pk", flat=True))
+        self.stdout.write(f"Responsables: {len(resp_ids)}")
+        return staff, resp_ids
+
+    def _seed_students(self, n, resp_ids, rng, batch_size):
+        objs = []
+        for _ in range(n):
+            level = rng.choices(list(GRADES), weights=[1, 3, 3])[0]
+            s = Student(first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                        level=level, grade=rng.choice(GRADES[level]), active=rng.random() > 0.03)
+            s.refresh_search_fields()
+            objs.append(s)
+        Student.objects.bulk_create(objs, batch_size=batch_size)
+        student_ids = list(Student.objects.order_by("-pk").values_list("pk", flat=True)[:n])[::-1]
+
+        # hermanos: alumnos consecutivos comparten responsable; un tercio tiene además un segundo responsable
+        links = {}
+        for i, sid in enumerate(student_ids):
+            first = resp_ids[i * len(resp_ids) // n]
+            links[sid] = [first]
+            second = rng.choice(resp_ids)
+            if second != first and rng.random() < 0.33:
+                links[sid].append(second)
+        ResponsibleStudent.objects.bulk_create(
+            (ResponsibleStudent(responsible_id=r, student_id=sid) for sid, rs in links.items() for r in rs),
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+        self.stdout.write(f"Alumnos: {len(student_ids)}")
+        return links
+
+    def _seed_lates(self, links, staff, total, years, rng, batch_size):
+        if not total:
+            return 0
+        tz = timezone.get_current_timezone()
+        today = timezone.localdate()
+        days = [today - timedelta(days=d) for d in range(int(365 * years))]
+        school_days = [d for d in days if d.weekday() < 5] or [today]
+        student_ids = list(links)
+        grades = student_grades(student_ids)
+        # pocos alumnos concentran la mayoría de las llegadas tarde (como en la realidad)
+        cum = list(accumulate(rng.paretovariate(1.5) for _ in student_ids))
+        now = timezone.now()
+        # sin los contadores de LateArrivalQuerySet.bulk_create: se recalculan al final
+        raw = models.QuerySet(model=LateArrival)
+        created = 0
+        while created < total:
+            size = min(batch_size, total - created)
+            picked = rng.choices(student_ids, cum_weights=cum, k=size)
+            batch = []
+            for sid in picked:
+                day = rng.choice(school_days)
+                reported_at = timezone.make_aware(
+                    datetime.combine(day, time(7, 15)) + timedelta(seconds=rng.randrange(0, 2 * 3600)), tz)
+                if reported_at > now:
+                    reported_at = now - timedelta(seconds=rng.randrange(1, 3600))
+                reviewed = day < today
+                batch.append(LateArrival(
+                    responsible_id=rng.choice(links[sid]), student_id=sid, reason=rng.choice(REASONS),
+                    reported_at=reported_at, level=grades[sid][0], grade=grades[sid][1],
+                    reviewed_by=staff if reviewed else None,
+                    reviewed_at=reported_at + timedelta(hours=1) if reviewed else None,
+                ))
+            with transaction.atomic():
+                raw.bulk_create(batch)
+            created += size
+            if created % (batch_size * 20) == 0 or created == total:
+                self.stdout.write(f"  {created}/{total} avisos")
+        return created
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from avisos.mail import OutboxSender
+
+
+class Command(BaseCommand):
+    help = ("Envía los mails encolados (OutboxEmail) por lotes sobre una conexión SMTP, con reintentos, "
+            "backoff y límites de ritmo/cupo (settings.OUTBOX). Con --loop queda corriendo como worker.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="No terminar: volver a mirar la cola cada --interval.")
+        parser.add_argument("--interval", type=float, default=10, help="Segundos entre vueltas con la cola vacía.")
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument("--max-per-minute", type=int)
+
+    def handle(self, *args, loop, interval, batch_size, max_per_minute, **opts):
+        conf = {}
+        if batch_size:
+            conf["BATCH_SIZE"] = batch_size
+        if max_per_minute:
+            conf["MAX_PER_MINUTE"] = max_per_minute
+        sender = OutboxSender(conf)
+        while True:
+            result = sender.run_once()
+            if result.sent or result.retried or result.failed or result.stopped:
+                self.stdout.write(
+                    f"enviados: {result.sent}, a reintentar: {result.retried}, fallidos: {result.failed}"
+                    + (f" ({result.stopped})" if result.stopped else "")
+                )
+            if not loop:
+                break
+            # lote completo sin cortes: seguir enseguida; si no, esperar
+            if result.stopped or result.sent + result.retried + result.failed < sender.conf["BATCH_SIZE"]:
+                time.sleep(interval)
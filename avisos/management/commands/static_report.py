@@ -0,0 +1,42 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Bytes que ahorran los estáticos generados por collectstatic: variantes WebP/AVIF de las imágenes "
+            "y versiones .br/.gz de CSS/JS, contra los archivos originales.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--admin", dest="include_admin", action="store_true", help="Incluir los estáticos del admin.")
+
+    def handle(self, *args, include_admin, **opts):
+        storage = staticfiles_storage
+        if not getattr(storage, "hashed_files", None):
+            raise CommandError("No hay manifest de estáticos: correr collectstatic antes.")
+        total_before = total_after = 0
+
+        for name, entry in sorted(getattr(storage, "image_variants", {}).items()):
+            full = [v for v in entry["variants"] if v["width"] == entry["width"]]
+            best = min(full, key=lambda v: v["size"], default=None)
+            after = best["size"] if best else entry["size"]
+            total_before += entry["size"]
+            total_after += after
+            self.stdout.write(f"{name}: {entry['size']} -> {after} bytes"
+                              f" ({best['type'] if best else 'sin variante más chica'})")
+
+        for name, hashed in sorted(storage.hashed_files.items()):
+            if not name.endswith((".css", ".js")) or (name.startswith("admin/") and not include_admin):
+                continue
+            size = storage.size(hashed)
+            compressed = {ext: storage.size(hashed + ext) for ext in (".br", ".gz") if storage.exists(hashed + ext)}
+            if not compressed:
+                continue
+            ext, after = min(compressed.items(), key=lambda c: c[1])
+            total_before += size
+            total_after += after
+            self.stdout.write(f"{name}: {size} -> {after} bytes ({ext})")
+
+        saved = total_before - total_after
+        pct = f" ({saved * 100 // total_before}%)" if total_before else ""
+        self.stdout.write(self.style.SUCCESS(f"Total: {total_before} -> {total_after} bytes, "
+                                             f"{saved} menos{pct}."))
@@ -0,0 +1,135 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import FileResponse
+
+logger = logging.getLogger("avisos.timing")
+
+DEFAULT_REQUEST_TIMING = {
+    "SLOW_REQUEST_MS": 500,    # requests más lentos se loguean en WARNING con sus consultas lentas
+    "SLOW_QUERY_MS": 100,      # consultas más lentas se loguean con su SQL
+    "SERVER_TIMING_HEADER": True,
+    "MAX_SQL_CHARS": 2000,
+}
+
+
+def timing_settings():
+    return {**DEFAULT_REQUEST_TIMING, **getattr(settings, "REQUEST_TIMING", {})}
+
+
+class _QueryTimer:
+    """execute_wrapper: cuenta consultas y tiempo de base; guarda solo las lentas."""
+    __slots__ = ("count", "duration", "slow", "slow_threshold")
+
+    def __init__(self, slow_threshold):
+        self.count = 0
+        self.duration = 0.0
+        self.slow = []
+        self.slow_threshold = slow_threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if elapsed >= self.slow_threshold:
+                self.slow.append((elapsed, sql))
+
+
+class RequestTimingMiddleware:
+    """
+    Mide por request: cantidad y tiempo de consultas, tiempo de vista y de render de
+    template. Lo devuelve en el header Server-Timing y lo loguea en "avisos.timing"
+    (una línea JSON por request; WARNING si supera el umbral de lentitud).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        conf = timing_settings()
+        self.slow_request = conf["SLOW_REQUEST_MS"] / 1000
+        self.slow_query = conf["SLOW_QUERY_MS"] / 1000
+        self.header = conf["SERVER_TIMING_HEADER"]
+        self.max_sql = conf["MAX_SQL_CHARS"]
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        request._timing = marks = {}
+        timer = _QueryTimer(self.slow_query)
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        view = tpl = None
+        if "view_start" in marks:
+            view_end = marks.get("view_end", marks.get("render_end", start + total))
+            view = view_end - marks["view_start"]
+            if "view_end" in marks and "render_end" in marks:
+                tpl = marks["render_end"] - marks["view_end"]
+
+        # cuerpo generado al enviarse (CSV, SSE): las consultas corren al consumirlo, después de que
+        # sale el header y fuera del execute_wrapper. Se marca "no medido" en vez de informar ~0.
+        # FileResponse (XLSX) es streaming pero el archivo ya se armó en la vista: eso sí se midió
+        streaming = response.streaming and not isinstance(response, FileResponse)
+        if self.header:
+            response["Server-Timing"] = self._server_timing(total, timer, view, tpl, streaming)
+        self._log(request, response, total, timer, view, tpl, streaming)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing["view_start"] = time.perf_counter()
+        # as_view() devuelve una función "view": preferimos el nombre de la clase
+        target = getattr(view_func, "view_class", view_func)
+        request._timing["view_name"] = getattr(target, "__name__", repr(target))
+
+    def process_template_response(self, request, response):
+        # la vista terminó; lo que sigue es render del template (TemplateResponse)
+        marks = request._timing
+        marks["view_end"] = time.perf_counter()
+        response.add_post_render_callback(lambda r: marks.__setitem__("render_end", time.perf_counter()))
+        return response
+
+    @staticmethod
+    def _server_timing(total, timer, view, tpl, streaming=False):
+        if streaming:
+            parts = ['db;desc="no medido (streaming)"']
+        else:
+            parts = [f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"']
+        if view is not None:
+            parts.append(f"view;dur={view * 1000:.1f}")
+        if tpl is not None:
+            parts.append(f"tpl;dur={tpl * 1000:.1f}")
+        parts.append(f'total;dur={total * 1000:.1f};desc="hasta el primer byte"' if streaming
+                     else f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def _log(self, request, response, total, timer, view, tpl, streaming=False):
+        slow = total >= self.slow_request
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level) and not timer.slow:
+            return
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": request._timing.get("view_name"),
+            "status": response.status_code,
+            "user_id": getattr(getattr(request, "user", None), "pk", None),
+            "total_ms": round(total * 1000, 1),
+            "view_ms": None if view is None else round(view * 1000, 1),
+            "tpl_ms": None if tpl is None else round(tpl * 1000, 1),
+            "db_ms": None if streaming else round(timer.duration * 1000, 1),
+            "queries": None if streaming else timer.count,
+            "streaming": streaming,
+        }
+        if timer.slow:
+            record["slow_queries"] = [
+                {"ms": round(elapsed * 1000, 1), "sql": sql[:self.max_sql]}
+                for elapsed, sql in sorted(timer.slow, key=lambda q: q[0], reverse=True)
+            ]
+            level = logging.WARNING
+        logger.log(level, json.dumps(record, ensure_ascii=False))
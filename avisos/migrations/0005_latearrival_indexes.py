@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0004_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='latearrival',
+            index=models.Index(fields=['responsible', '-reported_at'], name='late_resp_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='latearrival',
+            index=models.Index(fields=['student', '-reported_at'], name='late_student_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='latearrival',
+            index=models.Index(fields=['-reported_at'], name='late_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='latearrival',
+            index=models.Index(condition=models.Q(('reviewed_at__isnull', True)), fields=['reported_at'], name='late_unreviewed_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def build_stats(apps, schema_editor):
+    LateArrival = apps.get_model("avisos", "LateArrival")
+    StudentLateStats = apps.get_model("avisos", "StudentLateStats")
+    window_start = timezone.now() - timedelta(days=30)
+    rows = (LateArrival.objects.order_by()
+            .values("student_id")
+            .annotate(total=Count("id"), last30=Count("id", filter=Q(reported_at__gte=window_start))))
+    StudentLateStats.objects.bulk_create(
+        [StudentLateStats(student_id=r["student_id"], total_count=r["total"], last30_count=r["last30"],
+                          window_start=window_start) for r in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0005_latearrival_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentLateStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='late_stats', serialize=False, to='avisos.student')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('last30_count', models.PositiveIntegerField(default=0)),
+                ('window_start', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
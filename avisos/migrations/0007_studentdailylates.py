@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def build_rollup(apps, schema_editor):
+    LateArrival = apps.get_model("avisos", "LateArrival")
+    StudentDailyLates = apps.get_model("avisos", "StudentDailyLates")
+    rows = (LateArrival.objects.order_by()
+            .annotate(local_day=TruncDate("reported_at"))
+            .values("student_id", "local_day")
+            .annotate(n=Count("id")))
+    StudentDailyLates.objects.bulk_create(
+        [StudentDailyLates(student_id=r["student_id"], day=r["local_day"], count=r["n"]) for r in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0006_studentlatestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentDailyLates',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_lates', to='avisos.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'student'], name='daily_lates_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'day'), name='daily_lates_student_day_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:48
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def fill_search_fields(apps, schema_editor):
+    Student = apps.get_model("avisos", "Student")
+    batch = []
+    for s in Student.objects.only("id", "first_name", "last_name").iterator(chunk_size=2000):
+        s.search_last_first = _normalize(f"{s.last_name} {s.first_name}")
+        s.search_first_last = _normalize(f"{s.first_name} {s.last_name}")
+        batch.append(s)
+        if len(batch) >= 2000:
+            Student.objects.bulk_update(batch, ["search_last_first", "search_first_last"])
+            batch = []
+    Student.objects.bulk_update(batch, ["search_last_first", "search_first_last"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0007_studentdailylates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_first_last',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=201),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='search_last_first',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=201),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+    ]
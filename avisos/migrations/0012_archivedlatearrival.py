@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0011_synchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLateArrival',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('reason', models.TextField(max_length=500)),
+                ('reported_at', models.DateTimeField()),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('responsible', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_lates', to='avisos.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', '-reported_at'], name='archived_student_idx'), models.Index(fields=['-reported_at'], name='archived_reported_idx')],
+            },
+        ),
+    ]
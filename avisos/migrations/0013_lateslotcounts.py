@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:40
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractMinute, TruncDate
+
+SLOT_MINUTES = 15
+
+
+def build_rollup(apps, schema_editor):
+    LateSlotCounts = apps.get_model("avisos", "LateSlotCounts")
+    slot = (ExtractHour("reported_at") * 60 + ExtractMinute("reported_at")) / SLOT_MINUTES
+    counts = defaultdict(int)
+    for name in ("LateArrival", "ArchivedLateArrival"):
+        rows = (apps.get_model("avisos", name).objects.order_by()
+                .annotate(local_day=TruncDate("reported_at"), slot=slot)
+                .values_list("local_day", "student__level", "student__grade", "slot")
+                .annotate(n=Count("id")))
+        for day, level, grade, slot_n, n in rows:
+            counts[(day, level, grade, int(slot_n))] += n
+    LateSlotCounts.objects.bulk_create(
+        [LateSlotCounts(day=day, level=level, grade=grade, slot=slot_n, count=n)
+         for (day, level, grade, slot_n), n in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0012_archivedlatearrival'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LateSlotCounts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('level', models.CharField(max_length=12)),
+                ('grade', models.PositiveSmallIntegerField()),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'level', 'grade', 'slot'), name='slot_counts_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
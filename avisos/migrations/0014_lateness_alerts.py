@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:46
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0013_lateslotcounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatenessRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('scope', models.CharField(choices=[('student', 'Por alumno'), ('grade', 'Por grado')], default='student', max_length=8, verbose_name='Alcance')),
+                ('threshold', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Cantidad mínima')),
+                ('window_days', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(120)], verbose_name='Días')),
+                ('level', models.CharField(blank=True, choices=[('INICIAL', 'INICIAL'), ('PRIMARIA', 'PRIMARIA'), ('SECUNDARIA', 'SECUNDARIA')], max_length=12, verbose_name='Nivel')),
+                ('grade', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Grado/Año')),
+                ('active', models.BooleanField(default=True, verbose_name='Activa')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LateWindowState',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('days', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LatenessAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=40)),
+                ('level', models.CharField(max_length=12)),
+                ('grade', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField()),
+                ('day', models.DateField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True)),
+                ('acknowledged_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lateness_alerts', to='avisos.student')),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='avisos.latenessrule')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('acknowledged_at__isnull', True)), fields=['-created_at'], name='alert_open_idx'), models.Index(fields=['subject', 'rule', '-day'], name='alert_subject_idx')],
+            },
+        ),
+    ]
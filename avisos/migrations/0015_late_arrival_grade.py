@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:11
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_grades(apps, schema_editor):
+    # el grado actual es el mejor dato para los avisos existentes (y el que ya usaban los contadores)
+    Student = apps.get_model("avisos", "Student")
+    student = Student.objects.filter(pk=OuterRef("student_id"))
+    for name in ("LateArrival", "ArchivedLateArrival"):
+        apps.get_model("avisos", name).objects.update(level=Subquery(student.values("level")[:1]),
+                                                     grade=Subquery(student.values("grade")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('avisos', '0014_lateness_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedlatearrival',
+            name='grade',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedlatearrival',
+            name='level',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='latearrival',
+            name='grade',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='latearrival',
+            name='level',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(fill_grades, migrations.RunPython.noop),
+    ]
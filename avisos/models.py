@@ -1,8 +1,14 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.base_user import BaseUserManager
-from django.core.validators import RegexValidator
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
+import re
+import unicodedata
+from collections import defaultdict
+from django.db import connection, models, transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour, ExtractMinute, TruncDate
 from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 
 id8_validator = RegexValidator(regex=r"^\d{8}$", message="Debe ser un número de 8 dígitos.")
 
@@ -49,6 +55,27 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.full_name} ({self.id_number})"
 
+def normalize_search(text):
+    """Minúsculas, sin acentos ni signos y con espacios simples: "Pérez,  Ána" -> "perez ana"."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def student_search_q(text, prefix=""):
+    """
+    Q de búsqueda por prefijo sobre las columnas normalizadas (indexadas), por
+    "apellido nombre" o "nombre apellido". Se arma como rango [q, q+\uffff) para
+    que SQLite use el índice (LIKE 'q%' no lo usa con la colación por defecto).
+    Texto vacío = sin filtro; texto que queda vacío al normalizar ("!!", "--") no coincide con nada.
+    """
+    q = normalize_search(text)
+    if not q:
+        return Q(**{f"{prefix}pk__in": []}) if (text or "").strip() else Q()
+    upper = q + "\uffff"
+    return (Q(**{f"{prefix}search_last_first__gte": q, f"{prefix}search_last_first__lt": upper})
+            | Q(**{f"{prefix}search_first_last__gte": q, f"{prefix}search_first_last__lt": upper}))
+
+
 class Student(models.Model):
     LEVEL_CHOICES = [("INICIAL", "INICIAL"), ("PRIMARIA", "PRIMARIA"), ("SECUNDARIA", "SECUNDARIA")]
     first_name = models.CharField("Nombre", max_length=100)
@@ -57,15 +84,87 @@ class Student(models.Model):
     grade = models.PositiveSmallIntegerField("Grado/Año")
     active = models.BooleanField(default=True)
     responsibles = models.ManyToManyField("User", through="ResponsibleStudent", related_name="students")
+    # columnas de búsqueda normalizadas (ver normalize_search); se completan en save()
+    search_last_first = models.CharField(max_length=201, default="", editable=False, db_index=True)
+    search_first_last = models.CharField(max_length=201, default="", editable=False, db_index=True)
+
+    SEARCH_FIELDS = ["search_last_first", "search_first_last"]
+
     def __str__(self):
         return f"{self.last_name}, {self.first_name} - {self.level} {self.grade}"
 
+    def refresh_search_fields(self):
+        """Llamar antes de bulk_create/bulk_update (no pasan por save())."""
+        self.search_last_first = normalize_search(f"{self.last_name} {self.first_name}")
+        self.search_first_last = normalize_search(f"{self.first_name} {self.last_name}")
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | set(self.SEARCH_FIELDS)
+        super().save(*args, **kwargs)
+
 class ResponsibleStudent(models.Model):
     responsible = models.ForeignKey("User", on_delete=models.CASCADE)
     student = models.ForeignKey("Student", on_delete=models.CASCADE)
     class Meta:
         unique_together = ("responsible", "student")
 
+def local_day_bounds(date_from, date_to=None):
+    """Días locales (TIME_ZONE) -> rango aware semiabierto [inicio, fin)."""
+    date_to = date_to or date_from
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+# ciclo lectivo: de marzo a febrero del año siguiente
+SCHOOL_YEAR_START_MONTH = 3
+
+
+def school_year_of(day):
+    return day.year if day.month >= SCHOOL_YEAR_START_MONTH else day.year - 1
+
+
+def school_year_bounds(year):
+    """Ciclo lectivo `year` -> (primer día, último día)."""
+    return (date(year, SCHOOL_YEAR_START_MONTH, 1),
+            date(year + 1, SCHOOL_YEAR_START_MONTH, 1) - timedelta(days=1))
+
+
+class ReportedAtQuerySet(models.QuerySet):
+    # Evitamos reported_at__date: en SQLite con USE_TZ se traduce a una función
+    # por fila que impide usar índices. Comparar contra un rango sí los usa.
+    def for_local_day(self, day):
+        return self.for_local_range(day, day)
+
+    def for_local_range(self, date_from, date_to):
+        start, end = local_day_bounds(date_from, date_to)
+        return self.filter(reported_at__gte=start, reported_at__lt=end)
+
+
+class LateArrivalQuerySet(ReportedAtQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no pasa por save(): actualizamos los contadores acá,
+        # dentro de la misma transacción
+        with transaction.atomic(using=self.db):
+            snapshot_grades(objs)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            record_late_changes([o for o in objs if o.pk is not None], +1)
+        return objs
+
+    def mark_reviewed(self, user, when=None):
+        """update() de revisión que además deja constancia en SyncChange (update no dispara señales)."""
+        when = when or timezone.now()
+        with transaction.atomic(using=self.db):
+            rows = list(self.values_list("pk", "responsible_id"))
+            n = self.model.objects.filter(pk__in=[pk for pk, _ in rows]).update(reviewed_by=user, reviewed_at=when)
+            SyncChange.record(SyncChange.LATE, [(resp_id, pk) for pk, resp_id in rows])
+        return n
+
+
 class LateArrival(models.Model):
     responsible = models.ForeignKey("User", on_delete=models.CASCADE)
     student = models.ForeignKey("Student", on_delete=models.CASCADE)
@@ -75,3 +174,559 @@ class LateArrival(models.Model):
         "User", null=True, blank=True, on_delete=models.SET_NULL, related_name="reviewed_late_arrivals"
     )
     reviewed_at = models.DateTimeField(null=True, blank=True)
+    # nivel/grado del alumno al momento del aviso: las tablas por grado (LateSlotCounts, ventanas de
+    # alertas) descuentan una baja del mismo grado donde se sumó, aunque el alumno haya pasado de año
+    level = models.CharField(max_length=12, null=True, blank=True, editable=False)
+    grade = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+
+    objects = LateArrivalQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            if adding:
+                snapshot_grades([self])
+            super().save(*args, **kwargs)
+            if adding:
+                record_late_changes([self], +1)
+
+    class Meta:
+        indexes = [
+            # listados por responsable / historial por alumno, siempre ordenados por fecha desc
+            models.Index(fields=["responsible", "-reported_at"], name="late_resp_reported_idx"),
+            models.Index(fields=["student", "-reported_at"], name="late_student_reported_idx"),
+            # rangos de fechas (hoy, reportes)
+            models.Index(fields=["-reported_at"], name="late_reported_idx"),
+            # avisos pendientes de revisión (parcial: solo filas sin revisar)
+            models.Index(
+                fields=["reported_at"],
+                condition=models.Q(reviewed_at__isnull=True),
+                name="late_unreviewed_idx",
+            ),
+        ]
+
+
+class ArchivedLateArrival(models.Model):
+    """
+    Avisos de ciclos lectivos cerrados (archive_school_year). Conserva el id original, así el
+    historial mezcla ambas tablas con el mismo orden (reported_at, id). Los contadores
+    (StudentLateStats, StudentDailyLates) los siguen contando: archivar no los toca, y una baja
+    descuenta igual que en LateArrival (signals.archived_late_arrival_deleted).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    responsible = models.ForeignKey("User", on_delete=models.CASCADE, related_name="+")
+    student = models.ForeignKey("Student", on_delete=models.CASCADE, related_name="archived_lates")
+    reason = models.TextField(max_length=500)
+    reported_at = models.DateTimeField()
+    reviewed_by = models.ForeignKey("User", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    level = models.CharField(max_length=12, null=True, blank=True, editable=False)  # ver LateArrival
+    grade = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # sin los contadores de LateArrivalQuerySet.bulk_create: esos avisos ya se contaron
+    objects = ReportedAtQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["student", "-reported_at"], name="archived_student_idx"),
+            models.Index(fields=["-reported_at"], name="archived_reported_idx"),
+        ]
+
+
+def record_late_changes(arrivals, delta):
+    """Propaga altas (+1) / bajas (-1) de avisos a las tablas derivadas."""
+    if delta > 0:
+        # las altas ya tienen el lock de escritura: aprovechamos para correr la ventana
+        # de 30 días y así los listados (GET) no escriben nunca
+        StudentLateStats.refresh_window()
+    StudentLateStats.apply_changes(arrivals, delta)
+    StudentDailyLates.apply_changes(arrivals, delta)
+    snapshot_grades(arrivals)  # filas viejas o insertadas en crudo, sin nivel/grado guardado
+    LateSlotCounts.apply_changes(arrivals, delta)
+    from .alerts import apply_late_changes
+    # ventanas móviles por alumno/grado y reglas de alerta (solo miran estos avisos)
+    apply_late_changes(arrivals, delta)
+    SyncChange.record(SyncChange.LATE, [(a.responsible_id, a.pk) for a in arrivals], deleted=delta < 0)
+    if delta > 0:
+        from .live import late_feed
+        # despierta los streams de "hoy" de este proceso (los demás se enteran por sondeo)
+        transaction.on_commit(late_feed.publish)
+    elif arrivals:
+        from .conditional import bump_late_counts_version
+        bump_late_counts_version()
+
+
+def upsert_counters(model, objs, unique_fields, counters, amounts=None):
+    """
+    INSERT ... ON CONFLICT (unique_fields) DO UPDATE: si la fila ya existe (también si la acaba de
+    insertar otra transacción que no llegamos a ver) se le suman los contadores, en vez de chocar
+    con IntegrityError o perder el cambio. Se suma lo insertado o, si se pasa, `amounts` (una
+    tupla por obj, en el orden de counters). Nunca deja un contador negativo. SQLite y PostgreSQL.
+    """
+    if not objs:
+        return
+    qn = connection.ops.quote_name
+    fields = [f for f in model._meta.concrete_fields if not (f.primary_key and f.auto_created)]
+    columns = {f.name: qn(f.column) for f in fields}
+    table = qn(model._meta.db_table)
+
+    def add(name):
+        current, amount = f"{table}.{columns[name]}", "%s" if amounts is not None else f"excluded.{columns[name]}"
+        return f"{columns[name]} = CASE WHEN {current} + {amount} > 0 THEN {current} + {amount} ELSE 0 END"
+
+    sql = (f"INSERT INTO {table} ({', '.join(columns.values())}) VALUES ({', '.join(['%s'] * len(fields))}) "
+           f"ON CONFLICT ({', '.join(columns[name] for name in unique_fields)}) "
+           f"DO UPDATE SET {', '.join(add(name) for name in counters)}")
+    params = []
+    for i, obj in enumerate(objs):
+        row = [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields]
+        if amounts is not None:
+            row += [n for n in amounts[i] for _ in range(2)]  # cada monto va dos veces en el CASE
+        params.append(row)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+LAST30_WINDOW = timedelta(days=30)
+# margen antes de volver a correr la ventana de 30 días (evita escribir en cada lectura)
+LAST30_REFRESH_TOLERANCE = timedelta(minutes=15)
+
+
+class StudentLateStats(models.Model):
+    """Contadores por alumno mantenidos al crear/borrar avisos (ver signals.py)."""
+    student = models.OneToOneField("Student", on_delete=models.CASCADE, primary_key=True, related_name="late_stats")
+    total_count = models.PositiveIntegerField(default=0)
+    last30_count = models.PositiveIntegerField(default=0)
+    # last30_count cuenta los avisos con reported_at >= window_start
+    window_start = models.DateTimeField(db_index=True)
+
+    @classmethod
+    def apply_changes(cls, arrivals, delta):
+        """Suma (+1) o resta (-1) los avisos dados. Llamar dentro de una transacción."""
+        by_student = defaultdict(list)
+        for a in arrivals:
+            by_student[a.student_id].append(a.reported_at)
+        if not by_student:
+            return
+
+        stats = {s.student_id: s for s in cls.objects.select_for_update().filter(student_id__in=by_student)}
+        for s in stats.values():
+            times = by_student[s.student_id]
+            s.total_count = max(s.total_count + delta * len(times), 0)
+            s.last30_count = max(s.last30_count + delta * sum(t >= s.window_start for t in times), 0)
+        cls.objects.bulk_update(stats.values(), ["total_count", "last30_count"])
+
+        # sin fila previa: se calcula desde la tabla cruda (ya incluye el cambio). Si otra
+        # transacción la insertó mientras tanto, a la suya se le suma solo este cambio
+        missing = [sid for sid in by_student if sid not in stats]
+        if missing:
+            objs = cls.compute(student_ids=missing)
+            amounts = [(delta * len(by_student[s.student_id]),
+                        delta * sum(t >= s.window_start for t in by_student[s.student_id])) for s in objs]
+            upsert_counters(cls, objs, ["student"], ["total_count", "last30_count"], amounts)
+
+    @classmethod
+    def compute(cls, student_ids=None, now=None):
+        """Instancias (sin guardar) calculadas con una única consulta agrupada."""
+        window_start = (now or timezone.now()) - LAST30_WINDOW
+        qs = LateArrival.objects.all()
+        if student_ids is not None:
+            qs = qs.filter(student_id__in=student_ids)
+        rows = (qs.order_by()
+                .values("student_id")
+                .annotate(total=Count("id"), last30=Count("id", filter=Q(reported_at__gte=window_start))))
+        stats = {
+            r["student_id"]: cls(student_id=r["student_id"], total_count=r["total"], last30_count=r["last30"],
+                                 window_start=window_start)
+            for r in rows
+        }
+        # lo archivado suma al total; a los últimos 30 días nunca (se archiva con más de 30 días de cerrado)
+        archived = ArchivedLateArrival.objects.all()
+        if student_ids is not None:
+            archived = archived.filter(student_id__in=student_ids)
+        for sid, n in archived.order_by().values("student_id").annotate(n=Count("id")).values_list("student_id", "n"):
+            stats.setdefault(sid, cls(student_id=sid, total_count=0, last30_count=0, window_start=window_start))
+            stats[sid].total_count += n
+        return list(stats.values())
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(cls.compute(), batch_size=batch_size)
+            return cls.objects.count()
+
+    @classmethod
+    def refresh_window(cls, now=None, tolerance=LAST30_REFRESH_TOLERANCE):
+        """Corre la ventana de 30 días: solo recalcula alumnos con avisos que salieron de ella."""
+        cutoff = (now or timezone.now()) - LAST30_WINDOW
+        stale = cls.objects.filter(window_start__lt=cutoff - tolerance)
+        with transaction.atomic():
+            oldest = stale.aggregate(m=Min("window_start"))["m"]
+            if oldest is None:
+                return 0
+            expired = set(LateArrival.objects
+                          .filter(reported_at__gte=oldest, reported_at__lt=cutoff)
+                          .order_by().values_list("student_id", flat=True).distinct())
+            stale.update(window_start=cutoff)
+            if expired:
+                counts = dict(LateArrival.objects
+                              .filter(student_id__in=expired, reported_at__gte=cutoff)
+                              .order_by().values("student_id").annotate(n=Count("id"))
+                              .values_list("student_id", "n"))
+                updated = [cls(student_id=sid, last30_count=counts.get(sid, 0), window_start=cutoff) for sid in expired]
+                cls.objects.bulk_update(updated, ["last30_count"])
+            return len(expired)
+
+
+class StudentDailyLates(models.Model):
+    """Cantidad de avisos por alumno y día local: los reportes por rango suman acá."""
+    student = models.ForeignKey("Student", on_delete=models.CASCADE, related_name="daily_lates")
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "day"], name="daily_lates_student_day_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["day", "student"], name="daily_lates_day_idx"),
+        ]
+
+    @classmethod
+    def apply_changes(cls, arrivals, delta):
+        """Suma (+1) o resta (-1) los avisos dados. Llamar dentro de una transacción."""
+        by_key = defaultdict(int)
+        for a in arrivals:
+            by_key[(a.student_id, timezone.localdate(a.reported_at))] += 1
+        if not by_key:
+            return
+        if delta > 0:
+            # upsert: dos altas concurrentes del mismo alumno/día nuevo se suman en vez de chocar
+            upsert_counters(cls, [cls(student_id=sid, day=day, count=delta * n) for (sid, day), n in by_key.items()],
+                            ["student", "day"], ["count"])
+            return
+
+        # bajas: las filas ya existen (las creó el alta)
+        student_ids = {sid for sid, _ in by_key}
+        days = {d for _, d in by_key}
+        existing = {
+            (r.student_id, r.day): r
+            for r in cls.objects.select_for_update().filter(student_id__in=student_ids, day__in=days)
+            if (r.student_id, r.day) in by_key
+        }
+        for key, row in existing.items():
+            row.count = max(row.count + delta * by_key[key], 0)
+        cls.objects.bulk_update([r for r in existing.values() if r.count], ["count"])
+        cls.objects.filter(pk__in=[r.pk for r in existing.values() if not r.count]).delete()
+
+    @classmethod
+    def backfill(cls, date_from, date_to):
+        """Recalcula [date_from, date_to] desde la tabla cruda con una consulta agrupada."""
+        with transaction.atomic():
+            cls.objects.filter(day__gte=date_from, day__lte=date_to).delete()
+            counts = defaultdict(int)
+            for model in (LateArrival, ArchivedLateArrival):
+                rows = (model.objects.for_local_range(date_from, date_to)
+                        .order_by()
+                        .annotate(local_day=TruncDate("reported_at"))
+                        .values("student_id", "local_day")
+                        .annotate(n=Count("id")))
+                for r in rows:
+                    counts[(r["student_id"], r["local_day"])] += r["n"]
+            objs = cls.objects.bulk_create(
+                [cls(student_id=sid, day=day, count=n) for (sid, day), n in counts.items()],
+                batch_size=1000,
+            )
+            return len(objs)
+
+    @classmethod
+    def totals(cls, date_from, date_to, compare_from=None, compare_to=None):
+        """Totales por alumno en el rango (y opcionalmente en un rango de comparación)."""
+        in_range = Q(day__gte=date_from, day__lte=date_to)
+        ranges = in_range
+        annotations = {"total": Coalesce(Sum("count", filter=in_range), 0)}
+        if compare_from and compare_to:
+            in_compare = Q(day__gte=compare_from, day__lte=compare_to)
+            ranges |= in_compare
+            annotations["compare_total"] = Coalesce(Sum("count", filter=in_compare), 0)
+        return (cls.objects.filter(ranges)
+                .values("student_id", "student__last_name", "student__first_name",
+                        "student__level", "student__grade")
+                .annotate(**annotations))
+
+
+def student_grades(student_ids):
+    """{id de alumno: (nivel, grado)} en una consulta."""
+    return {pk: (level, grade) for pk, level, grade in
+            Student.objects.filter(pk__in=student_ids).values_list("pk", "level", "grade")}
+
+
+def snapshot_grades(arrivals):
+    """Completa level/grade (los actuales del alumno) en los avisos que no los tienen; una consulta."""
+    missing = [a for a in arrivals if a.level is None]
+    if not missing:
+        return
+    grades = student_grades({a.student_id for a in missing})
+    for a in missing:
+        a.level, a.grade = grades.get(a.student_id, (None, None))
+
+
+# nivel/grado de un aviso en consultas agrupadas (los insertados en crudo no lo tienen guardado)
+GRADE_AT_REPORT = {"level_at": Coalesce("level", "student__level"), "grade_at": Coalesce("grade", "student__grade")}
+
+
+# franjas horarias del tablero de tendencias (minutos)
+SLOT_MINUTES = 15
+
+
+def time_slot(dt):
+    local = timezone.localtime(dt)
+    return (local.hour * 60 + local.minute) // SLOT_MINUTES
+
+
+class LateSlotCounts(models.Model):
+    """
+    Avisos por día local, nivel/grado (al momento del aviso) y franja horaria. Alimenta el
+    tablero de tendencias: día de la semana, hora, grado y semana salen de acá sumando
+    unas pocas filas por día, sin recorrer los avisos. El grado es el guardado en cada aviso:
+    si el alumno pasa de año, sus avisos viejos (y sus bajas) siguen en el grado que tenía.
+    """
+    day = models.DateField()
+    level = models.CharField(max_length=12)
+    grade = models.PositiveSmallIntegerField()
+    slot = models.PositiveSmallIntegerField()  # (hora * 60 + minutos) // SLOT_MINUTES
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "level", "grade", "slot"], name="slot_counts_uniq"),
+        ]
+
+    @classmethod
+    def apply_changes(cls, arrivals, delta):
+        """
+        Suma (+1) o resta (-1) los avisos dados, en el nivel/grado guardado en cada uno (ver
+        snapshot_grades). Llamar dentro de una transacción.
+        """
+        by_key = defaultdict(int)
+        for a in arrivals:
+            if a.level is not None:
+                by_key[(timezone.localdate(a.reported_at), a.level, a.grade, time_slot(a.reported_at))] += 1
+        if not by_key:
+            return
+        if delta > 0:
+            # upsert: dos altas concurrentes en la misma franja nueva se suman en vez de chocar
+            upsert_counters(cls, [cls(day=day, level=level, grade=grade, slot=slot, count=delta * n)
+                                  for (day, level, grade, slot), n in by_key.items()],
+                            ["day", "level", "grade", "slot"], ["count"])
+            return
+
+        # bajas: las filas ya existen (las creó el alta)
+        existing = {
+            (r.day, r.level, r.grade, r.slot): r
+            for r in cls.objects.select_for_update().filter(day__in={k[0] for k in by_key},
+                                                            slot__in={k[3] for k in by_key})
+            if (r.day, r.level, r.grade, r.slot) in by_key
+        }
+        for key, row in existing.items():
+            row.count = max(row.count + delta * by_key[key], 0)
+        cls.objects.bulk_update([r for r in existing.values() if r.count], ["count"])
+        cls.objects.filter(pk__in=[r.pk for r in existing.values() if not r.count]).delete()
+
+    @classmethod
+    def backfill(cls, date_from, date_to):
+        """Recalcula [date_from, date_to] con una consulta agrupada por tabla (avisos y archivo)."""
+        slot = (ExtractHour("reported_at") * 60 + ExtractMinute("reported_at")) / SLOT_MINUTES
+        with transaction.atomic():
+            cls.objects.filter(day__gte=date_from, day__lte=date_to).delete()
+            counts = defaultdict(int)
+            for model in (LateArrival, ArchivedLateArrival):
+                rows = (model.objects.for_local_range(date_from, date_to)
+                        .order_by()
+                        .annotate(local_day=TruncDate("reported_at"), slot=slot, **GRADE_AT_REPORT)
+                        .values_list("local_day", "level_at", "grade_at", "slot")
+                        .annotate(n=Count("id")))
+                for day, level, grade, slot_n, n in rows:
+                    counts[(day, level, grade, int(slot_n))] += n
+            objs = cls.objects.bulk_create(
+                [cls(day=day, level=level, grade=grade, slot=slot_n, count=n)
+                 for (day, level, grade, slot_n), n in counts.items()],
+                batch_size=1000,
+            )
+            return len(objs)
+
+
+# días que guarda LateWindowState: ninguna regla puede mirar más atrás
+LATENESS_STATE_DAYS = 120
+
+
+class LatenessRule(models.Model):
+    """"N o más avisos en M días corridos", por alumno o por grado (ver avisos.alerts)."""
+    SCOPE_STUDENT, SCOPE_GRADE = "student", "grade"
+    SCOPE_CHOICES = [(SCOPE_STUDENT, "Por alumno"), (SCOPE_GRADE, "Por grado")]
+
+    name = models.CharField("Nombre", max_length=100)
+    scope = models.CharField("Alcance", max_length=8, choices=SCOPE_CHOICES, default=SCOPE_STUDENT)
+    threshold = models.PositiveSmallIntegerField("Cantidad mínima", validators=[MinValueValidator(1)])
+    window_days = models.PositiveSmallIntegerField(
+        "Días", validators=[MinValueValidator(1), MaxValueValidator(LATENESS_STATE_DAYS)])
+    # vacíos = todos los niveles / grados
+    level = models.CharField("Nivel", max_length=12, choices=Student.LEVEL_CHOICES, blank=True)
+    grade = models.PositiveSmallIntegerField("Grado/Año", null=True, blank=True)
+    active = models.BooleanField("Activa", default=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.threshold}+ en {self.window_days} días ({self.get_scope_display().lower()})"
+
+    def applies_to(self, level, grade):
+        return (not self.level or self.level == level) and (self.grade is None or self.grade == grade)
+
+
+class LateWindowState(models.Model):
+    """
+    Avisos por día de los últimos LATENESS_STATE_DAYS de un alumno ("s:<id>") o un grado
+    ("g:<nivel>:<grado>"): las reglas se evalúan contra esto, sin releer el historial.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    days = models.JSONField(default=dict)  # {"AAAA-MM-DD": cantidad}
+
+
+class LatenessAlert(models.Model):
+    rule = models.ForeignKey(LatenessRule, on_delete=models.CASCADE, related_name="alerts")
+    subject = models.CharField(max_length=40)  # clave de LateWindowState
+    student = models.ForeignKey("Student", null=True, blank=True, on_delete=models.CASCADE,
+                                related_name="lateness_alerts")
+    level = models.CharField(max_length=12)
+    grade = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField()  # avisos en la ventana al dispararse
+    day = models.DateField()  # día del aviso que cruzó el umbral
+    created_at = models.DateTimeField(default=timezone.now)
+    acknowledged_by = models.ForeignKey("User", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    acknowledged_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], condition=models.Q(acknowledged_at__isnull=True),
+                         name="alert_open_idx"),
+            # "¿ya avisamos en esta ventana?"
+            models.Index(fields=["subject", "rule", "-day"], name="alert_subject_idx"),
+        ]
+
+    @property
+    def subject_label(self):
+        if self.student_id:
+            return f"{self.student.last_name}, {self.student.first_name}"
+        return f"{self.level} {self.grade}"
+
+
+class OutboxEmail(models.Model):
+    """Mail encolado por avisos.mail.OutboxEmailBackend; lo envía el comando send_outbox."""
+    PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+    STATUS_CHOICES = [(PENDING, "Pendiente"), (SENDING, "Enviando"), (SENT, "Enviado"), (FAILED, "Fallido")]
+
+    created_at = models.DateTimeField(default=timezone.now)
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField()
+    subject = models.CharField(max_length=255, blank=True)
+    # mensaje MIME completo tal como se manda por SMTP (adjuntos y alternativas incluidos)
+    raw = models.BinaryField()
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # lo que el worker levanta: pendientes vencidos, en orden de llegada
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_status_next_idx"),
+            # cupo diario/por minuto de Gmail
+            models.Index(fields=["sent_at"], condition=models.Q(sent_at__isnull=False), name="outbox_sent_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class ExportJob(models.Model):
+    """Exportación armada en segundo plano por el comando run_export_jobs."""
+    KIND_RANGE, KIND_SCHOOL_YEAR = "range", "school_year"
+    KIND_CHOICES = [(KIND_RANGE, "Rango de fechas"), (KIND_SCHOOL_YEAR, "Ciclo lectivo (una hoja por grado)")]
+    FORMAT_CHOICES = [("xlsx", "Excel"), ("csv", "CSV")]
+    PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+    STATUS_CHOICES = [(PENDING, "En cola"), (RUNNING, "Generando"), (DONE, "Listo"), (FAILED, "Error")]
+
+    requested_by = models.ForeignKey("User", on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES, default=KIND_RANGE)
+    fmt = models.CharField(max_length=4, choices=FORMAT_CHOICES, default="xlsx")
+    date_from = models.DateField()
+    date_to = models.DateField()
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=PENDING)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # relativo a settings.EXPORTS_ROOT
+    file_path = models.CharField(max_length=200, blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="exportjob_status_idx"),
+            models.Index(fields=["requested_by", "-created_at"], name="exportjob_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.date_from}..{self.date_to} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    @property
+    def download_name(self):
+        prefix = "ciclo_lectivo" if self.kind == self.KIND_SCHOOL_YEAR else "llegadas_tarde"
+        return f"{prefix}_{self.date_from.isoformat()}_a_{self.date_to.isoformat()}.{self.fmt}"
+
+
+class SyncChange(models.Model):
+    """
+    Registro de cambios por responsable para la sincronización incremental (avisos.sync).
+    El id es el cursor: un cliente pide "lo posterior a N" y recibe solo eso.
+    """
+    STUDENT, LATE = "s", "l"
+    KIND_CHOICES = [(STUDENT, "Alumno"), (LATE, "Aviso")]
+
+    id = models.BigAutoField(primary_key=True)
+    # sin FK real: al borrar un usuario, las cascadas todavía escriben acá (se limpia por antigüedad)
+    responsible = models.ForeignKey("User", on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["responsible", "id"], name="sync_resp_id_idx"),
+            models.Index(fields=["created_at"], name="sync_created_idx"),
+        ]
+
+    @classmethod
+    def record(cls, kind, pairs, deleted=False):
+        """pairs: [(responsible_id, object_id)]. Llamar dentro de la transacción del cambio."""
+        now = timezone.now()
+        cls.objects.bulk_create([
+            cls(responsible_id=resp_id, kind=kind, object_id=obj_id, deleted=deleted, created_at=now)
+            for resp_id, obj_id in dict.fromkeys(pairs) if resp_id is not None
+        ])
+
+    @classmethod
+    def record_students(cls, student_ids):
+        """Alumnos modificados: un cambio para cada responsable vinculado."""
+        cls.record(cls.STUDENT, [
+            (resp_id, sid) for resp_id, sid in ResponsibleStudent.objects
+            .filter(student_id__in=student_ids).values_list("responsible_id", "student_id")
+        ])
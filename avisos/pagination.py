@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "avisos.keyset"
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str = None
+    prev_cursor: str = None
+    next_url: str = None
+    prev_url: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(obj, direction):
+    # opaco y firmado: el cliente no puede armar ni adulterar cursores
+    return signing.dumps({"t": obj.reported_at.isoformat(), "id": obj.pk, "d": direction}, salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        return datetime.fromisoformat(data["t"]), int(data["id"]), data["d"]
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def keyset_paginate(qs, cursor=None, per_page=50):
+    """
+    Paginación por búsqueda sobre (reported_at, id) descendente.
+    A diferencia de OFFSET, la página N cuesta lo mismo que la primera:
+    se filtra por la última clave vista y se aprovecha el índice.
+    """
+    return keyset_paginate_many([qs], cursor, per_page)
+
+
+def keyset_paginate_many(querysets, cursor=None, per_page=50):
+    """Como keyset_paginate sobre la unión de varias tablas (p. ej. avisos + archivo) sin repetir ids."""
+    decoded = decode_cursor(cursor) if cursor else None
+    if decoded is None:
+        direction, came_from, key_filter, ascending = "n", False, None, False
+    else:
+        t, pk, direction = decoded
+        came_from = True
+        ascending = direction == "p"
+        if ascending:
+            key_filter = Q(reported_at__gt=t) | Q(reported_at=t, id__gt=pk)
+        else:
+            key_filter = Q(reported_at__lt=t) | Q(reported_at=t, id__lt=pk)
+
+    order = ("reported_at", "id") if ascending else ("-reported_at", "-id")
+    rows = []
+    for qs in querysets:
+        if key_filter is not None:
+            qs = qs.filter(key_filter)
+        rows.extend(qs.order_by(*order)[:per_page + 1])
+    if len(querysets) > 1:
+        rows.sort(key=lambda r: (r.reported_at, r.pk), reverse=not ascending)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if ascending:
+        rows = rows[::-1]
+
+    if direction == "p":
+        # volviendo hacia atrás: siempre hay página siguiente (de donde venimos)
+        has_next, has_prev = came_from, has_more
+    else:
+        has_next, has_prev = has_more, came_from
+
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=encode_cursor(rows[-1], "n") if rows and has_next else None,
+        prev_cursor=encode_cursor(rows[0], "p") if rows and has_prev else None,
+    )
+
+
+class KeysetPaginationMixin:
+    """Para ListView/TemplateView ordenadas por fecha de aviso (más nuevas primero)."""
+    page_size = 50
+    cursor_param = "cursor"
+
+    def paginate_keyset(self, qs):
+        return self.link_keyset_page(keyset_paginate(qs, self.request.GET.get(self.cursor_param), self.page_size))
+
+    def link_keyset_page(self, page):
+        page.next_url = self._cursor_url(page.next_cursor)
+        page.prev_url = self._cursor_url(page.prev_cursor)
+        return page
+
+    def _cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params[self.cursor_param] = cursor
+        return "?" + params.urlencode()
+
+    def get_context_data(self, **kwargs):
+        if "object_list" not in kwargs and hasattr(self, "object_list"):
+            page = self.paginate_keyset(self.object_list)
+            kwargs["object_list"] = page.object_list
+            kwargs["page"] = page
+        return super().get_context_data(**kwargs)
@@ -0,0 +1,78 @@
+import hashlib
+import logging
+import pickle
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.utils.safestring import mark_safe
+
+from .access import user_is_school
+from .conditional import catalog_version
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_ALIAS = "reports"
+REPORT_CACHE_PREFIX = "avisos:report:"
+# una entrada (ya comprimida) más grande que esto (p. ej. el totalizado de toda la escuela en un
+# padrón enorme) no se guarda: desalojaría de golpe a muchas entradas chicas
+DEFAULT_MAX_ENTRY_BYTES = 2 * 1024 * 1024
+
+
+def report_cache():
+    try:
+        return caches[REPORT_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+class ReportCacheMixin:
+    """
+    Cache compartido de resultados/fragmentos de reportes. La clave es
+    (vista, parámetros normalizados, alcance, versión de datos): todo el personal de la
+    escuela con los mismos filtros comparte la entrada, y cualquier cambio de avisos o
+    alumnos cambia la versión, así que nunca hay que borrar nada (lo viejo lo desaloja el LRU).
+    Requiere ConditionalGetMixin (reusa su data_version).
+    """
+    report_cache_timeout = None  # None = TIMEOUT del alias
+
+    def get_report_scope(self):
+        # el mismo chequeo en vivo que scope_late_arrivals_for: el perfil cacheado puede estar viejo
+        user = self.request.user
+        return "school" if user_is_school(user) else f"user:{user.pk}"
+
+    def report_cache_key(self, name, params):
+        parts = (type(self).__name__, name, params, self.get_report_scope(), catalog_version(), self.data_version)
+        return REPORT_CACHE_PREFIX + hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+    def cached_report(self, name, params, compute):
+        cache = report_cache()
+        key = self.report_cache_key(name, params)
+        stored = cache.get(key)
+        if stored is not None:
+            return _unpack(stored)
+        value = compute()
+        stored = _pack(value)
+        size = len(stored[1]) if stored[0] == "html" else len(pickle.dumps(stored, pickle.HIGHEST_PROTOCOL))
+        limit = getattr(settings, "REPORT_CACHE_MAX_ENTRY_BYTES", DEFAULT_MAX_ENTRY_BYTES)
+        if size <= limit:
+            kwargs = {} if self.report_cache_timeout is None else {"timeout": self.report_cache_timeout}
+            cache.set(key, stored, **kwargs)
+        else:
+            logger.info("Entrada de reporte demasiado grande para el cache (%s bytes): %s %s", size, name, params)
+        return value
+
+
+def _pack(value):
+    # los fragmentos HTML comprimen ~20x (filas repetitivas): entran muchos más en el mismo límite
+    if isinstance(value, str):
+        return "html", zlib.compress(value.encode(), 1)
+    return "obj", value
+
+
+def _unpack(stored):
+    kind, value = stored
+    if kind == "html":
+        return mark_safe(zlib.decompress(value).decode())  # lo generó render_to_string
+    return value
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access import invalidate_access_profiles
+from .conditional import bump_catalog_version
+from .models import (User, Student, ResponsibleStudent, LateArrival, ArchivedLateArrival, SyncChange,
+                     record_late_changes)
+
+
+@receiver(post_delete, sender=LateArrival)
+def late_arrival_deleted(sender, instance, **kwargs):
+    # el Collector ya corre dentro de una transacción; también cubre qs.delete() y cascadas
+    record_late_changes([instance], -1)
+
+
+@receiver(post_delete, sender=ArchivedLateArrival)
+def archived_late_arrival_deleted(sender, instance, **kwargs):
+    # lo archivado se sigue contando: una baja (p. ej. en cascada al borrar el responsable o el
+    # alumno) también descuenta. Archivar borra en crudo (db.raw_delete) y no pasa por acá.
+    record_late_changes([instance], -1)
+
+
+# --- perfil de acceso cacheado (avisos.access) ---
+
+def _invalidate(user_ids):
+    # ya y de nuevo al commit: entre medio otro request pudo cachear datos viejos
+    invalidate_access_profiles(user_ids)
+    transaction.on_commit(lambda: invalidate_access_profiles(user_ids))
+
+
+@receiver(post_save, sender=ResponsibleStudent)
+@receiver(post_delete, sender=ResponsibleStudent)
+def responsible_student_changed(sender, instance, signal, **kwargs):
+    _invalidate([instance.responsible_id])
+    bump_catalog_version()
+    # vínculo borrado (o el alumno, en cascada): para ese responsable el alumno desaparece
+    SyncChange.record(SyncChange.STUDENT, [(instance.responsible_id, instance.student_id)],
+                      deleted=signal is post_delete)
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, **kwargs):
+    # alta/baja de 'active'. Vínculos nuevos y borrados (incluso en cascada) llegan por ResponsibleStudent
+    if not created:
+        _invalidate(list(ResponsibleStudent.objects.filter(student=instance).values_list("responsible_id", flat=True)))
+        SyncChange.record_students([instance.pk])
+    bump_catalog_version()  # nombres, nivel y grado se muestran en listados y reportes
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return  # el login no cambia permisos
+    _invalidate([instance.pk])
+    bump_catalog_version()
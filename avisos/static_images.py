@@ -0,0 +1,159 @@
+# Imágenes estáticas optimizadas en collectstatic: por cada PNG/JPEG se generan variantes
+# WebP/AVIF (y achicadas, si la imagen es más ancha que algún WIDTHS) que quedan con hash en
+# el manifest como cualquier estático; {% picture %} y {% background_css %} (templatetags
+# images) las ofrecen al navegador. Pillow es opcional: sin él solo se copian los originales.
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depende del entorno
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATIC_IMAGES = {
+    "EXTENSIONS": (".png", ".jpg", ".jpeg"),
+    "SKIP_PREFIXES": ("admin/",),
+    # anchos achicados (solo los menores al original; el ancho original siempre va)
+    "WIDTHS": (320, 640, 1280, 1920),
+    "FORMATS": ("avif", "webp"),  # en orden de preferencia; los que Pillow no sepa escribir se omiten
+    "QUALITY": {"avif": 55, "webp": 80, "jpeg": 82},
+}
+IMAGE_MANIFEST_NAME = "staticfiles-images.json"
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "png": "image/png", "jpeg": "image/jpeg"}
+
+
+def static_images_settings():
+    return {**DEFAULT_STATIC_IMAGES, **getattr(settings, "STATIC_IMAGES", {})}
+
+
+def available_formats(conf):
+    if Image is None:
+        return []
+    Image.init()
+    return [fmt for fmt in conf["FORMATS"] if fmt.upper() in Image.SAVE]
+
+
+def variant_name(name, width, fmt):
+    path = PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}-{width}w.{fmt}"))
+
+
+def _encode(image, fmt, conf):
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    out = BytesIO()
+    if fmt == "png":
+        image.save(out, "PNG", optimize=True)
+    elif fmt == "webp":
+        image.save(out, "WEBP", quality=conf["QUALITY"]["webp"], method=6)
+    elif fmt == "jpeg":
+        image.save(out, "JPEG", quality=conf["QUALITY"]["jpeg"], optimize=True, progressive=True)
+    else:
+        image.save(out, fmt.upper(), quality=conf["QUALITY"][fmt])
+    return out.getvalue()
+
+
+def render_variants(name, data, conf, formats):
+    """
+    (ancho, alto, [(nombre, ancho, formato, bytes)]) de una imagen. Una variante que no pesa menos
+    que la versión de siempre (el original, o el mismo ancho en el formato original) no se guarda.
+    """
+    with Image.open(BytesIO(data)) as image:
+        image.load()
+        width, height = image.size
+        source_fmt = "jpeg" if image.format == "JPEG" else "png"
+        variants = []
+        for w in sorted({w for w in conf["WIDTHS"] if w < width} | {width}):
+            if w < width:
+                resized = image.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+                fallback = _encode(resized, source_fmt, conf)
+                variants.append((variant_name(name, w, source_fmt), w, source_fmt, fallback))
+            else:
+                resized, fallback = image, data
+            for fmt in formats:
+                encoded = _encode(resized, fmt, conf)
+                if len(encoded) < len(fallback):
+                    variants.append((variant_name(name, w, fmt), w, fmt, encoded))
+    return width, height, variants
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise (hash en el nombre + .gz/.br) más las variantes de imágenes. El detalle de
+    variantes queda en IMAGE_MANIFEST_NAME junto al manifest de Django. Sin manifest (no se corrió
+    collectstatic: desarrollo, tests) las URLs salen sin hash en vez de fallar.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_variants = self.load_image_manifest()
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return self.clean_name(name)
+        return super().stored_name(name)
+
+    def load_image_manifest(self):
+        try:
+            with self.manifest_storage.open(IMAGE_MANIFEST_NAME) as f:
+                return json.loads(f.read().decode())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def create_compressor(self, **kwargs):
+        # AVIF ya viene comprimido; WhiteNoise todavía no lo tiene en su lista
+        if kwargs.get("extensions") is None:
+            kwargs["extensions"] = (*Compressor.SKIP_COMPRESS_EXTENSIONS, "avif")
+        return super().create_compressor(**kwargs)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            # las variantes se agregan a paths: así también reciben hash y entran al manifest
+            paths = {**paths, **self.build_image_variants(paths)}
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if not dry_run:
+            self.manifest_storage.delete(IMAGE_MANIFEST_NAME)
+            self.manifest_storage._save(IMAGE_MANIFEST_NAME, ContentFile(json.dumps(self.image_variants).encode()))
+
+    def build_image_variants(self, paths):
+        conf = static_images_settings()
+        self.image_variants = {}
+        names = [name for name in paths
+                 if name.lower().endswith(conf["EXTENSIONS"]) and not name.startswith(conf["SKIP_PREFIXES"])]
+        if not names:
+            return {}
+        if Image is None:
+            logger.warning("Pillow no está instalado: las imágenes estáticas se copian sin optimizar.")
+            return {}
+        formats = available_formats(conf)
+
+        def work(name):
+            storage, path = paths[name]
+            with storage.open(path) as f:
+                data = f.read()
+            return name, len(data), render_variants(name, data, conf, formats)
+
+        new_paths = {}
+        with ThreadPoolExecutor() as executor:  # Pillow suelta el GIL al codificar
+            for name, size, (width, height, variants) in executor.map(work, names):
+                entry = {"width": width, "height": height, "size": size, "variants": []}
+                for vname, w, fmt, data in variants:
+                    if self.exists(vname):
+                        self.delete(vname)
+                    self._save(vname, ContentFile(data))
+                    new_paths[vname] = (self, vname)
+                    entry["variants"].append({"name": vname, "width": w, "type": MIME_TYPES[fmt], "size": len(data)})
+                self.image_variants[name] = entry
+                best = min([v["size"] for v in entry["variants"] if v["width"] == width] or [size])
+                logger.info("%s: %s -> %s bytes (%s variantes)", name, size, best, len(variants))
+        return new_paths
@@ -0,0 +1,153 @@
+# Sincronización incremental para la app de responsables. El cliente guarda el token de la
+# última respuesta y lo manda en el siguiente pedido: recibe solo lo creado, revisado o borrado
+# desde entonces (SyncChange). Sin token, o con uno más viejo que la retención del registro,
+# recibe todo de nuevo ("full": true) y reemplaza lo que tenía. Las filas se aplican por id
+# (alta o reemplazo): recibir dos veces el mismo cambio no hace daño.
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import LateArrival, Student, SyncChange
+
+DEFAULT_SYNC = {
+    "PAGE_SIZE": 500,        # cambios por respuesta; si hay más, "more": true
+    "RETENTION_DAYS": 30,    # prune_sync_log borra lo anterior; los tokens vencen un día antes
+    # cambios más nuevos que esto esperan a la próxima sincronización (ver commit_lag).
+    # None: 0 en SQLite, 30 en el resto
+    "COMMIT_LAG_SECONDS": None,
+}
+STUDENT_FIELDS = ("id", "first_name", "last_name", "level", "grade", "active")
+LATE_FIELDS = ("id", "student", "reason", "reported_at", "reviewed_at")
+# nombre en la API -> columna
+_LATE_COLUMNS = {"student": "student_id"}
+
+
+class SyncError(ValueError):
+    pass
+
+
+def sync_settings():
+    return {**DEFAULT_SYNC, **getattr(settings, "SYNC", {})}
+
+
+def commit_lag(conf):
+    """
+    En SQLite las escrituras se serializan: los ids se confirman en orden y el cursor no saltea
+    nada. En PostgreSQL una transacción con el id N puede confirmarse después de otra con N+1; un
+    cliente que sincroniza en el medio pasaría de largo a N. Por eso el cursor solo avanza sobre
+    cambios con más de este margen: para entonces, los de ids anteriores ya se confirmaron (el
+    margen tiene que superar la transacción de escritura más larga).
+    """
+    seconds = conf["COMMIT_LAG_SECONDS"]
+    if seconds is None:
+        seconds = 0 if connection.vendor == "sqlite" else 30
+    return timedelta(seconds=seconds)
+
+
+def make_token(change_id, now=None):
+    return f"{change_id}.{int((now or timezone.now()).timestamp())}"
+
+
+def parse_token(token, conf):
+    """-> id del último cambio visto, o None si hay que mandar todo."""
+    if not token:
+        return None
+    try:
+        change_id, issued = (int(part) for part in token.split("."))
+    except ValueError:
+        raise SyncError("Token inválido.")
+    valid_for = timedelta(days=conf["RETENTION_DAYS"] - 1)
+    if timezone.now().timestamp() - issued > valid_for.total_seconds():
+        return None
+    return change_id
+
+
+def parse_fields(value, allowed):
+    if not value:
+        return list(allowed)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise SyncError(f"Campos desconocidos: {', '.join(sorted(unknown))}. Disponibles: {', '.join(allowed)}.")
+    return ["id"] + [f for f in fields if f != "id"]
+
+
+def sync_payload(user, token=None, student_fields=None, late_fields=None, conf=None):
+    conf = conf or sync_settings()
+    since = parse_token(token, conf)
+    student_fields = parse_fields(student_fields, STUDENT_FIELDS)
+    late_fields = parse_fields(late_fields, LATE_FIELDS)
+
+    log = SyncChange.objects.filter(responsible=user)
+    lag = commit_lag(conf)
+    if lag:
+        log = log.filter(created_at__lte=timezone.now() - lag)
+
+    if since is None:
+        # el cursor se lee antes que los datos: lo que cambie en el medio se vuelve a mandar
+        last = log.aggregate(m=Max("id"))["m"] or 0
+        return {
+            "token": make_token(last),
+            "full": True,
+            "more": False,
+            "students": _section(student_fields, _student_rows(user, student_fields)),
+            "lates": _section(late_fields, _late_rows(user, late_fields)),
+        }
+
+    changes = list(log.filter(id__gt=since)
+                   .order_by("id").values_list("id", "kind", "object_id", "deleted", "created_at")
+                   [:conf["PAGE_SIZE"] + 1])
+    more = len(changes) > conf["PAGE_SIZE"]
+    # el token vence según el cambio más viejo que todavía no recibió el cliente
+    issued = changes.pop()[4] if more else None
+    latest = {}  # (tipo, id) -> borrado; gana el último cambio
+    for _, kind, object_id, deleted, _ in changes:
+        latest[(kind, object_id)] = deleted
+
+    def split(kind):
+        upserts = [oid for (k, oid), deleted in latest.items() if k == kind and not deleted]
+        deleted = {oid for (k, oid), deleted in latest.items() if k == kind and deleted}
+        return upserts, deleted
+
+    student_ids, deleted_students = split(SyncChange.STUDENT)
+    late_ids, deleted_lates = split(SyncChange.LATE)
+    students = _student_rows(user, student_fields, student_ids) if student_ids else []
+    lates = _late_rows(user, late_fields, late_ids) if late_ids else []
+    # ya no visibles (desvinculado, borrado después): para el cliente es una baja
+    deleted_students |= set(student_ids) - {row[0] for row in students}
+    deleted_lates |= set(late_ids) - {row[0] for row in lates}
+    return {
+        "token": make_token(changes[-1][0] if changes else since, issued),
+        "full": False,
+        "more": more,
+        "students": _section(student_fields, students, deleted_students),
+        "lates": _section(late_fields, lates, deleted_lates),
+    }
+
+
+def _section(fields, rows, deleted=()):
+    # filas como listas con los nombres una sola vez: la mitad de bytes que una lista de objetos
+    return {"fields": fields, "rows": rows, "deleted": sorted(deleted)}
+
+
+def _student_rows(user, fields, ids=None):
+    qs = Student.objects.filter(responsiblestudent__responsible=user)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    return [list(row) for row in qs.order_by("pk").values_list(*fields)]
+
+
+def _late_rows(user, fields, ids=None):
+    qs = LateArrival.objects.filter(responsible=user)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    return [list(row) for row in qs.order_by("pk").values_list(*[_LATE_COLUMNS.get(f, f) for f in fields])]
+
+
+def prune_sync_changes(days=None):
+    days = days if days is not None else sync_settings()["RETENTION_DAYS"]
+    deleted, _ = SyncChange.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
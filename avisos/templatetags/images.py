@@ -0,0 +1,74 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+def _variants(name):
+    # sin collectstatic (o sin Pillow) no hay variantes: queda el archivo original
+    return getattr(staticfiles_storage, "image_variants", {}).get(name)
+
+
+def _by_type(entry, name):
+    """{tipo mime: [(url, ancho)]}, con el original como el más ancho de su formato."""
+    groups = {}
+    for v in entry["variants"]:
+        groups.setdefault(v["type"], []).append((static(v["name"]), v["width"]))
+    original_type = "image/jpeg" if name.lower().endswith((".jpg", ".jpeg")) else "image/png"
+    groups.setdefault(original_type, []).append((static(name), entry["width"]))
+    return groups, original_type
+
+
+@register.simple_tag
+def picture(name, sizes="100vw", **attrs):
+    """
+    <picture> con AVIF/WebP y anchos alternativos para el navegador que los entienda; el <img>
+    de adentro es el original. Uso: {% picture "logo.png" alt="CCM" sizes="36px" %}
+    """
+    entry = _variants(name)
+    if not entry:
+        return format_html("<img src=\"{}\"{}>", static(name), _attrs(attrs))
+    groups, original_type = _by_type(entry, name)
+    sources = format_html_join(
+        "", "<source type=\"{}\" srcset=\"{}\" sizes=\"{}\">",
+        ((mime, _srcset(groups[mime]), sizes) for mime in groups if mime != original_type),
+    )
+    img = format_html("<img src=\"{}\" srcset=\"{}\" sizes=\"{}\" width=\"{}\" height=\"{}\"{}>",
+                      static(name), _srcset(groups[original_type]), sizes, entry["width"], entry["height"],
+                      _attrs(attrs))
+    return format_html("<picture>{}{}</picture>", sources, img)
+
+
+@register.simple_tag
+def background_css(selector, name):
+    """
+    Reglas CSS con image-set() (AVIF/WebP/original) para un fondo ya declarado en el CSS; las
+    variantes achicadas van por media query, suponiendo pantallas 2x (celulares). Vacío si no hay
+    variantes: queda el url() del CSS.
+    """
+    entry = _variants(name)
+    if not entry or not entry["variants"]:
+        return ""
+    groups, original_type = _by_type(entry, name)
+    widths = sorted({w for urls in groups.values() for _, w in urls}, reverse=True)
+    order = {mime: i for i, mime in enumerate(["image/avif", "image/webp", original_type])}
+    rules = []
+    for w in widths:
+        options = [(url, mime) for mime in groups for url, width in groups[mime] if width == w]
+        if original_type not in {mime for _, mime in options}:
+            options.append((static(name), original_type))  # nunca sin formato de respaldo
+        image_set = ", ".join(f'url("{url}") type("{mime}")' for url, mime in sorted(options, key=lambda o: order[o[1]]))
+        rule = f"{selector} {{ background-image: image-set({image_set}); }}"
+        rules.append(rule if w == entry["width"] else f"@media (max-width: {w // 2}px) {{ {rule} }}")
+    return mark_safe("\n".join(rules))  # selector y nombres vienen del template, URLs de static()
+
+
+def _srcset(urls):
+    return ", ".join(f"{url} {width}w" for url, width in sorted(urls, key=lambda u: u[1]))
+
+
+def _attrs(attrs):
+    return format_html_join("", " {}=\"{}\"", sorted(attrs.items()))
@@ -0,0 +1,109 @@
+# archivo: avisos/tests/test_access.py
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from avisos.access import get_access_profile
+from avisos.db import raw_delete
+from avisos.context_processors import ui_flags
+from avisos.models import User, Student, ResponsibleStudent, LateArrival
+
+
+class TestAccessProfile(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.resp = User.objects.create_user(
+            id_number="22222222", full_name="Padre A", email="a@test.com", password="pass"
+        )
+        self.st1 = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        self.st2 = Student.objects.create(first_name="Axel", last_name="Alvarez", level="PRIMARIA", grade=3, active=False)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.st1)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.st2)
+
+    def fresh_user(self):
+        # otro request: objeto user nuevo, sin el memo del request anterior
+        return User.objects.get(pk=self.resp.pk)
+
+    def flags(self):
+        request = RequestFactory().get("/")
+        request.user = self.fresh_user()
+        return ui_flags(request)
+
+    def test_perfil_y_cache(self):
+        profile = get_access_profile(self.fresh_user())
+        self.assertEqual(profile.student_ids, {self.st1.id, self.st2.id})
+        self.assertEqual(profile.active_student_ids, {self.st1.id})
+        self.assertFalse(profile.is_school_staff)
+
+        request = RequestFactory().get("/")
+        request.user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(ui_flags(request), {"has_active_students": True, "is_school_staff": False})
+
+    def test_invalida_por_vinculo_alumno_y_usuario(self):
+        self.assertTrue(self.flags()["has_active_students"])
+
+        self.st1.active = False
+        self.st1.save()
+        self.assertFalse(self.flags()["has_active_students"])
+
+        self.st2.active = True
+        self.st2.save()
+        self.assertTrue(self.flags()["has_active_students"])
+
+        ResponsibleStudent.objects.filter(student=self.st2).delete()
+        self.assertFalse(self.flags()["has_active_students"])
+
+        st3 = Student.objects.create(first_name="Beto", last_name="Bruno", level="SECUNDARIA", grade=1)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=st3)
+        self.assertTrue(self.flags()["has_active_students"])
+        st3.delete()
+        self.assertFalse(self.flags()["has_active_students"])
+
+        self.resp.is_school_staff = True
+        self.resp.save(update_fields=["is_school_staff"])
+        self.assertTrue(self.flags()["is_school_staff"])
+
+    def test_vistas_usan_el_perfil(self):
+        self.client.login(username=self.resp.id_number, password="pass")
+        self.client.get(reverse("students_list"))  # calienta el cache
+        resp = self.client.get(reverse("notify_late"))
+        self.assertEqual(resp.status_code, 200)
+        choices = [s.pk for s in resp.context["form"].fields["students"].queryset]
+        self.assertEqual(choices, [self.st1.id])
+
+        # lista de alumnos: sesión + usuario + alumnos; sin consultas de pertenencia
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse("students_list"))
+        self.assertEqual({s.pk for s in resp.context["students"]}, {self.st1.id, self.st2.id})
+
+    def test_escrituras_no_confian_en_el_perfil_cacheado(self):
+        self.client.login(username=self.resp.id_number, password="pass")
+        self.client.get(reverse("students_list"))  # perfil en cache con st1
+        # baja del vínculo sin señales, como si la hubiera hecho otro worker
+        raw_delete(ResponsibleStudent, "student", [self.st1.pk])
+        self.assertIn(self.st1.id, get_access_profile(self.fresh_user()).student_ids)
+
+        data = {"first_name": "X", "last_name": "Y", "level": "PRIMARIA", "grade": 1, "active": "on"}
+        self.assertEqual(self.client.post(reverse("student_update", args=[self.st1.pk]), data).status_code, 404)
+        self.assertEqual(self.client.post(reverse("student_delete", args=[self.st1.pk])).status_code, 404)
+        # sin alumnos activos vinculados (en la base) ni siquiera muestra el formulario
+        resp = self.client.post(reverse("notify_late"), {"students": [self.st1.pk], "reason": "Tarde"})
+        self.assertRedirects(resp, reverse("home"))
+        self.assertFalse(LateArrival.objects.exists())
+        self.assertTrue(Student.objects.filter(pk=self.st1.pk, first_name="Ana").exists())
+
+    def test_lecturas_ven_vinculos_de_otro_worker(self):
+        other = User.objects.create_user(id_number="33333333", full_name="Padre B", email="b@test.com", password="pass")
+        self.client.login(username=other.id_number, password="pass")
+        self.assertRedirects(self.client.get(reverse("notify_late")), reverse("home"))  # perfil en cache sin alumnos
+        # alta del vínculo sin señales, como si la hubiera hecho otro worker
+        st3 = Student.objects.create(first_name="Beto", last_name="Bruno", level="SECUNDARIA", grade=1)
+        ResponsibleStudent.objects.bulk_create([ResponsibleStudent(responsible=other, student=st3)])
+        self.assertFalse(get_access_profile(User.objects.get(pk=other.pk)).has_active_students)
+
+        resp = self.client.get(reverse("students_list"))
+        self.assertEqual([s.pk for s in resp.context["students"]], [st3.pk])
+        self.assertEqual(self.client.get(reverse("notify_late")).status_code, 200)
+        resp = self.client.get(reverse("student_search_api"), {"q": "bruno"})
+        self.assertEqual([r["id"] for r in resp.json()["results"]], [st3.pk])
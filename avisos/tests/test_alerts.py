@@ -0,0 +1,126 @@
+# archivo: avisos/tests/test_alerts.py
+from datetime import datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos import alerts
+from avisos.models import User, Student, LateArrival, LatenessAlert, LatenessRule, LateWindowState
+
+
+class TestLatenessAlerts(TestCase):
+    def setUp(self):
+        self.school = User.objects.create_user(id_number="11111111", full_name="Escuela", email="e@ccm.test",
+                                               password="pass", is_school_staff=True)
+        self.resp = User.objects.create_user(id_number="22222222", full_name="Padre", email="p@test.com", password="pass")
+        self.ana = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        self.beto = Student.objects.create(first_name="Beto", last_name="Bruno", level="PRIMARIA", grade=6)
+        self.rule = LatenessRule.objects.create(name="Crónico", threshold=3, window_days=7)
+        self.start = timezone.localdate() - timedelta(days=30)
+
+    def late(self, student, offset):
+        reported_at = timezone.make_aware(datetime.combine(self.start + timedelta(days=offset), time(8, 10)),
+                                          timezone.get_current_timezone())
+        return LateArrival.objects.create(responsible=self.resp, student=student, reason="x", reported_at=reported_at)
+
+    def test_umbral_por_alumno_una_alerta_por_ventana(self):
+        self.late(self.ana, 0)
+        self.late(self.ana, 2)
+        self.late(self.beto, 3)
+        self.assertFalse(LatenessAlert.objects.exists())
+        self.late(self.ana, 4)
+        alert = LatenessAlert.objects.get()
+        self.assertEqual((alert.student, alert.count, alert.day), (self.ana, 3, self.start + timedelta(days=4)))
+        self.late(self.ana, 5)  # sigue arriba del umbral, misma ventana: no repite
+        self.assertEqual(LatenessAlert.objects.count(), 1)
+        # fuera de la ventana del aviso anterior: alerta nueva
+        for offset in (12, 13, 14):
+            self.late(self.ana, offset)
+        self.assertEqual(LatenessAlert.objects.count(), 2)
+
+    def test_ventana_movil_y_bajas(self):
+        first = self.late(self.ana, 0)
+        self.late(self.ana, 2)
+        first.delete()
+        self.assertEqual(LateWindowState.objects.get(key=f"s:{self.ana.pk}").days,
+                         {(self.start + timedelta(days=2)).isoformat(): 1})
+        self.late(self.ana, 8)  # el del día 0 ya no está y además quedaría fuera de la ventana
+        self.assertFalse(LatenessAlert.objects.exists())
+
+    def test_regla_por_grado(self):
+        LatenessRule.objects.create(name="Grado", scope=LatenessRule.SCOPE_GRADE, threshold=4, window_days=7,
+                                    level="PRIMARIA", grade=6)
+        for student, offset in ((self.ana, 0), (self.beto, 1), (self.ana, 2), (self.beto, 3)):
+            self.late(student, offset)
+        alert = LatenessAlert.objects.get(rule__scope=LatenessRule.SCOPE_GRADE)
+        self.assertEqual((alert.subject, alert.student, alert.count), ("g:PRIMARIA:6", None, 4))
+        self.assertEqual(alert.subject_label, "PRIMARIA 6")
+
+    def test_baja_despues_de_pasar_de_anio(self):
+        first = self.late(self.ana, 0)
+        self.ana.grade = 7
+        self.ana.save()
+        self.late(self.ana, 1)
+        first.delete()
+        self.assertEqual(LateWindowState.objects.get(key="g:PRIMARIA:6").days, {})
+        self.assertEqual(LateWindowState.objects.get(key="g:PRIMARIA:7").days,
+                         {(self.start + timedelta(days=1)).isoformat(): 1})
+
+    def test_backfill_con_reglas_nuevas(self):
+        self.rule.delete()
+        for offset in (0, 1, 2, 20):
+            self.late(self.ana, offset)
+        LateWindowState.objects.all().delete()
+        LatenessRule.objects.create(name="Crónico", threshold=3, window_days=7)
+
+        out = StringIO()
+        call_command("backfill_lateness_alerts", stdout=out)
+        self.assertIn("4 avisos procesados, 1 alertas nuevas", out.getvalue())
+        self.assertEqual(LatenessAlert.objects.get().day, self.start + timedelta(days=2))
+        self.assertEqual(len(LateWindowState.objects.get(key=f"s:{self.ana.pk}").days), 4)
+
+        call_command("backfill_lateness_alerts", stdout=StringIO())  # idempotente
+        self.assertEqual(LatenessAlert.objects.count(), 1)
+        LatenessAlert.objects.update(acknowledged_at=timezone.now())
+        call_command("backfill_lateness_alerts", "--reset", stdout=StringIO())
+        self.assertEqual(LatenessAlert.objects.filter(acknowledged_at__isnull=True).count(), 1)
+
+    def test_backfill_suma_los_avisos_que_entran_durante_la_pasada(self):
+        self.late(self.ana, 0)
+        self.late(self.ana, 1)
+        LateWindowState.objects.all().delete()
+        replay, inserted = alerts._replay, []
+
+        def replay_with_insert(engine, rows):
+            n = replay(engine, rows)
+            if not inserted:
+                inserted.append(self.late(self.ana, 2))  # alta en vivo mientras corre la pasada larga
+            return n
+
+        with mock.patch.object(alerts, "_replay", side_effect=replay_with_insert):
+            n, created = alerts.replay_history()
+        self.assertEqual((n, created), (3, 1))
+        self.assertEqual(LatenessAlert.objects.get().count, 3)
+        self.assertEqual(len(LateWindowState.objects.get(key=f"s:{self.ana.pk}").days), 3)
+
+    def test_vista_y_marcar_vistas(self):
+        for offset in (0, 1, 2):
+            self.late(self.ana, offset)
+        alert = LatenessAlert.objects.get()
+        url = reverse("lateness_alerts")
+        self.client.login(username="22222222", password="pass")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.login(username="11111111", password="pass")
+        resp = self.client.get(url)
+        self.assertContains(resp, "Alvarez, Ana")
+        resp = self.client.post(reverse("lateness_alerts_ack"), {"ids": [alert.pk]}, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.json(), {"acknowledged": 1})
+        alert.refresh_from_db()
+        self.assertEqual(alert.acknowledged_by, self.school)
+        self.assertNotContains(self.client.get(url), "Alvarez, Ana")
+        self.assertContains(self.client.get(url, {"todas": 1}), "Alvarez, Ana")
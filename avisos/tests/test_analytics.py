@@ -0,0 +1,82 @@
+# archivo: avisos/tests/test_analytics.py
+from datetime import datetime, time, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.models import User, Student, LateArrival, LateSlotCounts, school_year_of, school_year_bounds
+from avisos.report_cache import report_cache
+
+
+class TestLateAnalytics(TestCase):
+    def setUp(self):
+        report_cache().clear()
+        self.school = User.objects.create_user(id_number="11111111", full_name="Escuela", email="e@ccm.test",
+                                               password="pass", is_school_staff=True)
+        self.resp = User.objects.create_user(id_number="22222222", full_name="Padre", email="p@test.com", password="pass")
+        self.p6 = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        self.s1 = Student.objects.create(first_name="Beto", last_name="Bruno", level="SECUNDARIA", grade=1)
+        # un ciclo cerrado: fechas fijas dentro del año
+        self.year = school_year_of(timezone.localdate()) - 1
+        start, _ = school_year_bounds(self.year)
+        self.monday = start + timedelta(days=7 - start.weekday())
+        self.lates = [
+            self.late(self.p6, self.monday, time(7, 50)),
+            self.late(self.p6, self.monday + timedelta(days=7), time(7, 55)),
+            self.late(self.s1, self.monday + timedelta(days=2), time(8, 20)),
+        ]
+        self.client.login(username="11111111", password="pass")
+        self.url = reverse("report_lates_analytics")
+
+    def late(self, student, day, at):
+        reported_at = timezone.make_aware(datetime.combine(day, at), timezone.get_current_timezone())
+        return LateArrival.objects.create(responsible=self.resp, student=student, reason="x", reported_at=reported_at)
+
+    def stats(self):
+        resp = self.client.get(self.url, {"school_year": self.year})
+        self.assertEqual(resp.status_code, 200)
+        return resp.context["stats"]
+
+    def counts(self, rows):
+        return {r["label"]: r["count"] for r in rows if r["count"]}
+
+    def test_tendencias_desde_la_tabla_resumen(self):
+        stats = self.stats()
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(self.counts(stats["weekdays"]), {"Lunes": 2, "Miércoles": 1})
+        self.assertEqual(self.counts(stats["slots"]), {"07:45": 2, "08:15": 1})
+        self.assertEqual(self.counts(stats["grades"]), {"PRIMARIA 6": 2, "SECUNDARIA 1": 1})
+        self.assertEqual(self.counts(stats["weeks"]), {self.monday.strftime("%d/%m"): 2,
+                                                       (self.monday + timedelta(days=7)).strftime("%d/%m"): 1})
+
+    def test_bajas_y_backfill(self):
+        self.stats()
+        self.lates[0].delete()  # la baja invalida el resultado cacheado
+        self.assertEqual(self.counts(self.stats()["weekdays"]), {"Lunes": 1, "Miércoles": 1})
+
+        rows = sorted(LateSlotCounts.objects.values_list("day", "level", "grade", "slot", "count"))
+        call_command("backfill_daily_lates", stdout=StringIO())
+        self.assertEqual(sorted(LateSlotCounts.objects.values_list("day", "level", "grade", "slot", "count")), rows)
+
+    def test_baja_despues_de_pasar_de_anio(self):
+        self.p6.level, self.p6.grade = "SECUNDARIA", 1
+        self.p6.save()
+        self.late(self.p6, self.monday + timedelta(days=14), time(7, 50))
+        self.lates[0].delete()  # se sumó en PRIMARIA 6: se resta de ahí
+        self.assertEqual(self.counts(self.stats()["grades"]), {"PRIMARIA 6": 1, "SECUNDARIA 1": 2})
+
+        rows = sorted(LateSlotCounts.objects.values_list("day", "level", "grade", "slot", "count"))
+        call_command("backfill_daily_lates", stdout=StringIO())  # el backfill respeta el grado de cada aviso
+        self.assertEqual(sorted(LateSlotCounts.objects.values_list("day", "level", "grade", "slot", "count")), rows)
+
+    def test_cacheado_sin_consultas_pesadas(self):
+        self.stats()
+        with self.assertNumQueries(3):  # sesión, usuario, MAX(id)
+            self.stats()
+
+    def test_solo_personal(self):
+        self.client.login(username="22222222", password="pass")
+        self.assertEqual(self.client.get(self.url).status_code, 403)
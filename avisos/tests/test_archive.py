@@ -0,0 +1,107 @@
+# archivo: avisos/tests/test_archive.py
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from avisos.models import (User, Student, ResponsibleStudent, LateArrival, ArchivedLateArrival,
+                           StudentLateStats, StudentDailyLates, school_year_of, school_year_bounds)
+from avisos.views import StudentLateHistoryView
+
+
+class TestArchiveSchoolYear(TestCase):
+    def setUp(self):
+        self.school = User.objects.create_user(id_number="11111111", full_name="Escuela", email="e@ccm.test",
+                                               password="pass", is_school_staff=True)
+        self.resp = User.objects.create_user(id_number="22222222", full_name="Padre", email="p@test.com", password="pass")
+        self.st = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.st)
+
+        self.old_year = school_year_of(timezone.localdate()) - 2
+        start, _ = school_year_bounds(self.old_year)
+        tz = timezone.get_current_timezone()
+        self.old = [
+            LateArrival.objects.create(responsible=self.resp, student=self.st, reason=f"Viejo {i}",
+                                       reported_at=timezone.make_aware(datetime.combine(start + timedelta(days=i), time(8)), tz))
+            for i in range(5)
+        ]
+        self.new = [LateArrival.objects.create(responsible=self.resp, student=self.st, reason=f"Nuevo {i}",
+                                               reported_at=timezone.now() - timedelta(days=i)) for i in range(3)]
+
+    def test_borrar_el_responsable_descuenta_lo_archivado(self):
+        other = User.objects.create_user(id_number="33333333", full_name="Madre", email="m@test.com", password="pass")
+        for late in self.old[:3]:
+            late.responsible = other
+            late.save(update_fields=["responsible"])
+        call_command("archive_school_year", stdout=StringIO())
+        other.delete()  # cascada sobre ArchivedLateArrival
+
+        self.assertEqual(ArchivedLateArrival.objects.count(), 2)
+        self.assertEqual(StudentLateStats.objects.get(student=self.st).total_count, 5)
+        self.assertEqual(sum(StudentDailyLates.objects.values_list("count", flat=True)), 5)
+        StudentLateStats.rebuild()
+        self.assertEqual(StudentLateStats.objects.get(student=self.st).total_count, 5)
+
+    def test_mueve_el_ciclo_y_conserva_los_totales(self):
+        daily = sorted(StudentDailyLates.objects.values_list("day", "count"))
+        call_command("archive_school_year", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(set(LateArrival.objects.values_list("pk", flat=True)), {l.pk for l in self.new})
+        self.assertEqual(set(ArchivedLateArrival.objects.values_list("pk", flat=True)), {l.pk for l in self.old})
+        self.assertEqual(StudentLateStats.objects.get(student=self.st).total_count, 8)
+
+        # recalcular desde cero también cuenta lo archivado
+        StudentLateStats.rebuild()
+        call_command("backfill_daily_lates", stdout=StringIO())
+        self.assertEqual(StudentLateStats.objects.get(student=self.st).total_count, 8)
+        self.assertEqual(sorted(StudentDailyLates.objects.values_list("day", "count")), daily)
+
+        self.client.login(username="11111111", password="pass")
+        start, end = school_year_bounds(self.old_year)
+        resp = self.client.get(reverse("report_lates_aggregated"), {"date_from": start, "date_to": end})
+        self.assertContains(resp, "Alvarez")
+
+    def test_historial_une_ambas_tablas(self):
+        call_command("archive_school_year", year=[self.old_year], stdout=StringIO())
+        self.client.login(username="11111111", password="pass")
+        url = reverse("student_late_history", args=[self.st.pk])
+        seen, page_url = [], url
+        with mock.patch.object(StudentLateHistoryView, "page_size", 3):
+            while page_url:
+                page = self.client.get(page_url).context["page"]
+                seen += [l.pk for l in page.object_list]
+                page_url = page.next_url and url + page.next_url
+            # y hacia atrás desde la última página
+            back = self.client.get(url + page.prev_url).context["page"]
+        self.assertEqual([l.pk for l in back.object_list], seen[3:6])
+        expected = [l.pk for l in sorted(self.new + self.old, key=lambda l: (l.reported_at, l.pk), reverse=True)]
+        self.assertEqual(seen, expected)
+        self.assertContains(self.client.get(url), "Nuevo 0")
+
+    def test_reporte_y_exportacion_de_un_ciclo_archivado(self):
+        call_command("archive_school_year", year=[self.old_year], stdout=StringIO())
+        self.client.login(username="11111111", password="pass")
+        start, end = school_year_bounds(self.old_year)
+        params = {"date_from": start, "date_to": end}
+
+        rows = self.client.get(reverse("report_lates_detailed"), params).context["rows"]
+        self.assertEqual({l.pk for l in rows}, {l.pk for l in self.old})
+
+        resp = self.client.get(reverse("report_lates_detailed"), {**params, "export": "csv"})
+        body = b"".join(resp.streaming_content).decode()
+        self.assertEqual(body.count("Viejo"), 5)
+
+        resp = self.client.get(reverse("report_lates_detailed"), {**params, "export": "xlsx"})
+        ws = load_workbook(BytesIO(b"".join(resp.streaming_content))).active
+        self.assertEqual(ws.max_row, 1 + 5)  # encabezado + avisos archivados
+
+    def test_no_archiva_el_ciclo_actual(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_school_year", year=[school_year_of(timezone.localdate())], stdout=StringIO())
+        self.assertFalse(ArchivedLateArrival.objects.exists())
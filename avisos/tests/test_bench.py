@@ -0,0 +1,67 @@
+# archivo: avisos/tests/test_bench.py
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from avisos.management.commands.bench_date_filters import SCRATCH_ALIAS
+from avisos.models import User, Student, LateArrival, LateSlotCounts, StudentLateStats, StudentDailyLates, SyncChange
+
+
+class TestBenchCommands(TestCase):
+    def seed(self, *extra):
+        call_command("seed_benchmark", "--responsibles", "20", "--students", "30", "--lates", "500",
+                     "--years", "0.5", "--batch-size", "200", *extra, stdout=StringIO())
+
+    def test_seed_y_bench(self):
+        self.seed()
+        self.assertEqual(User.objects.filter(is_school_staff=False).count(), 20)
+        self.assertEqual(Student.objects.count(), 30)
+        self.assertEqual(LateArrival.objects.count(), 500)
+        # los contadores derivados quedan consistentes con la tabla cruda
+        self.assertEqual(sum(StudentLateStats.objects.values_list("total_count", flat=True)), 500)
+        self.assertEqual(sum(StudentDailyLates.objects.values_list("count", flat=True)), 500)
+
+        out = StringIO()
+        call_command("bench", "--repeat", "2", "--warmup", "0", stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["meta"]["rows"]["late_arrivals"], 500)
+        for name, stats in report["cases"].items():
+            self.assertLess(stats["status"], 400, name)
+            self.assertGreater(stats["queries"], 0, name)
+            self.assertLessEqual(stats["p50_ms"], stats["p95_ms"], name)
+            self.assertGreater(stats["peak_kb"], 0, name)
+        self.assertGreater(report["cases"]["export_csv_year"]["bytes"], 1000)
+        # notify_post se deshace
+        self.assertEqual(LateArrival.objects.count(), 500)
+
+    def test_seed_repetido_requiere_flush(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+        # menos años: los días viejos del seed anterior también se limpian de las tablas derivadas
+        call_command("seed_benchmark", "--responsibles", "20", "--students", "30", "--lates", "300",
+                     "--years", "0.2", "--batch-size", "200", "--flush", stdout=StringIO())
+        self.assertEqual(Student.objects.count(), 30)
+        self.assertEqual(LateArrival.objects.count(), 300)
+        self.assertEqual(sum(StudentLateStats.objects.values_list("total_count", flat=True)), 300)
+        self.assertEqual(sum(StudentDailyLates.objects.values_list("count", flat=True)), 300)
+        self.assertEqual(sum(LateSlotCounts.objects.values_list("count", flat=True)), 300)
+        self.assertFalse(SyncChange.objects.exclude(responsible__in=User.objects.all()).exists())
+
+    def test_bench_fechas_en_base_temporal(self):
+        with self.assertRaises(CommandError):
+            call_command("bench_date_filters", "--database", "default", stdout=StringIO())
+        out = StringIO()
+        # la base temporal se registra al correr el comando: se habilita para este test
+        with mock.patch.object(type(self), "databases", {"default", SCRATCH_ALIAS}):
+            call_command("bench_date_filters", "--rows", "500", "--days", "60", "--repeat", "1",
+                         stdout=out, stderr=StringIO())
+        self.assertIn("rango 30 días", out.getvalue())
+        # la base por defecto no se tocó: ni filas, ni usuario, ni registro de sync
+        self.assertFalse(LateArrival.objects.exists())
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(SyncChange.objects.exists())
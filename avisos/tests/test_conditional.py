@@ -0,0 +1,71 @@
+# archivo: avisos/tests/test_conditional.py
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.models import LateArrival
+from avisos.tests.test_reports import BaseReportSetup
+
+
+class TestConditionalGet(BaseReportSetup):
+    def setUp(self):
+        super().setUp()
+        self.today_url = reverse("school_today_lates")
+        self.late = LateArrival.objects.create(responsible=self.resp_a, student=self.st_a1, reason="Hoy")
+
+    def revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_hoy_304_sin_render_hasta_que_cambia(self):
+        self.login(self.school)
+        resp = self.client.get(self.today_url)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        self.assertIn("no-cache", resp["Cache-Control"])
+        self.assertIn("private", resp["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.revalidate(self.today_url, etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+        # solo sesión/usuario y los agregados de versión: nada del listado
+        self.assertFalse([q for q in ctx.captured_queries if "ORDER BY" in q["sql"]])
+
+        # revisar un aviso cambia la versión
+        self.late.reviewed_by, self.late.reviewed_at = self.school, timezone.now()
+        self.late.save()
+        resp = self.revalidate(self.today_url, etag)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+
+        # un aviso nuevo también
+        LateArrival.objects.create(responsible=self.resp_b, student=self.st_b1, reason="Otro")
+        self.assertEqual(self.revalidate(self.today_url, etag).status_code, 200)
+
+    def test_cambios_de_catalogo_y_alcance(self):
+        self.login(self.school)
+        etag = self.client.get(self.today_url)["ETag"]
+        # renombrar un alumno no toca los avisos pero sí la página
+        self.st_a1.first_name = "Anita"
+        self.st_a1.save()
+        resp = self.revalidate(self.today_url, etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Anita")
+
+        # el ETag es por usuario: otro no puede reutilizarlo
+        other = self.client.get(reverse("notifications_list"))["ETag"]
+        self.login(self.resp_a)
+        self.assertEqual(self.revalidate(reverse("notifications_list"), other).status_code, 200)
+
+    def test_reportes(self):
+        self.login(self.school)
+        etag = self.client.get(self.url_detalle)["ETag"]
+        self.assertEqual(self.revalidate(self.url_detalle, etag).status_code, 304)
+        # otra URL (otro rango / página) es otro ETag
+        self.assertEqual(self.revalidate(self.url_detalle, etag, date_from="2020-01-01").status_code, 200)
+
+        etag = self.client.get(self.url_agg)["ETag"]
+        self.assertEqual(self.revalidate(self.url_agg, etag).status_code, 304)
+        LateArrival.objects.filter(reason="Viejo").delete()
+        self.assertEqual(self.revalidate(self.url_agg, etag).status_code, 200)
@@ -0,0 +1,52 @@
+# archivo: avisos/tests/test_db_maintenance.py
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from avisos.db import DEFAULT_SQLITE_PRAGMAS, sqlite_file_stats
+from avisos.models import User, SyncChange
+
+
+@skipUnless(connection.vendor == "sqlite", "solo SQLite")
+class TestDbMaintenance(TransactionTestCase):
+    # VACUUM no puede correr dentro de la transacción de un TestCase
+
+    def test_limpieza_y_reporte(self):
+        expired = SessionStore()
+        expired.set_expiry(-60)
+        expired.create()
+        alive = SessionStore()
+        alive.create()
+        user = User.objects.create_user(id_number="22222222", full_name="Padre", email="p@test.com", password="x")
+        SyncChange.objects.create(responsible=user, kind=SyncChange.LATE, object_id=1,
+                                  created_at=timezone.now() - timedelta(days=365))
+
+        out = StringIO()
+        call_command("db_maintenance", "--enable-incremental-vacuum", "--vacuum-seconds", "1", stdout=out)
+        output = out.getvalue()
+
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), [alive.session_key])
+        self.assertFalse(SyncChange.objects.exists())
+        self.assertEqual(sqlite_file_stats(connection)["auto_vacuum"], "INCREMENTAL")
+        for line in ("Antes:", "PRAGMA optimize", "incremental_vacuum", "wal_checkpoint", "Después:"):
+            self.assertIn(line, output)
+        # vuelve al busy_timeout de la app
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+
+    def test_sin_sqlite_pragmas_en_settings(self):
+        with override_settings():
+            del settings.SQLITE_PRAGMAS
+            call_command("db_maintenance", "--vacuum-seconds", "0", stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], DEFAULT_SQLITE_PRAGMAS["busy_timeout"])
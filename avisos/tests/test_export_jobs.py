@@ -0,0 +1,117 @@
+# archivo: avisos/tests/test_export_jobs.py
+import csv
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from avisos.export_jobs import claim_next_job, purge_expired_jobs, run_job
+from avisos.forms import ExportJobForm
+from avisos.models import ExportJob, Student
+from avisos.tests.test_reports import BaseReportSetup
+
+
+class TestExportJobs(BaseReportSetup):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        override = override_settings(EXPORTS_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.today = timezone.localdate()
+        self.year_ago = self.today - timedelta(days=365)
+
+    def job(self, user, **kwargs):
+        kwargs.setdefault("date_from", self.year_ago)
+        kwargs.setdefault("date_to", self.today)
+        return ExportJob.objects.create(requested_by=user, **kwargs)
+
+    def download(self, job):
+        resp = self.client.get(reverse("export_job_download", args=[job.pk]))
+        self.assertEqual(resp.status_code, 200)
+        return b"".join(resp.streaming_content)
+
+    def test_libro_de_ciclo_una_hoja_por_grado(self):
+        job = self.job(self.school, kind=ExportJob.KIND_SCHOOL_YEAR)
+        job = run_job(claim_next_job(), workers=1)
+        self.assertEqual(job.status, ExportJob.DONE, job.error)
+        self.assertEqual(job.row_count, 7)
+
+        self.login(self.school)
+        wb = load_workbook(BytesIO(self.download(job)), read_only=True)
+        self.assertEqual(wb.sheetnames, ["Primaria 3", "Primaria 6", "Secundaria 1"])
+        rows = list(wb["Primaria 6"].iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], "Alumno")
+        self.assertEqual(len(rows), 4)
+
+    def test_hojas_por_el_grado_al_momento_del_aviso(self):
+        # Ana pasó de 6 a 7 después de sus avisos: siguen en la hoja de 6 (y con ese grado)
+        Student.objects.filter(pk=self.st_a1.pk).update(grade=7)
+        for user in (self.school, self.resp_a):
+            job = run_job(self.job(user, kind=ExportJob.KIND_SCHOOL_YEAR), workers=1)
+            self.login(user)
+            wb = load_workbook(BytesIO(self.download(job)), read_only=True)
+            self.assertNotIn("Primaria 7", wb.sheetnames)
+            rows = list(wb["Primaria 6"].iter_rows(values_only=True))[1:]
+            self.assertEqual({row[1] for row in rows}, {"Primaria 6"})
+            self.assertEqual(len(rows), 3)
+
+    def test_responsable_solo_sus_avisos(self):
+        job = run_job(self.job(self.resp_a, kind=ExportJob.KIND_SCHOOL_YEAR), workers=1)
+        self.login(self.resp_a)
+        wb = load_workbook(BytesIO(self.download(job)), read_only=True)
+        self.assertEqual(wb.sheetnames, ["Primaria 3", "Primaria 6"])
+        self.assertEqual(job.row_count, 4)
+
+    def test_pedido_estado_y_descarga(self):
+        self.login(self.resp_b)
+        resp = self.client.post(reverse("export_jobs"), {
+            "kind": ExportJob.KIND_RANGE, "fmt": "csv",
+            "date_from": self.year_ago.isoformat(), "date_to": self.today.isoformat(),
+        })
+        job = ExportJob.objects.get(requested_by=self.resp_b)
+        self.assertRedirects(resp, reverse("export_job_detail", args=[job.pk]))
+        self.assertContains(self.client.get(resp.url), "En cola")
+
+        call_command("run_export_jobs", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.DONE)
+        self.assertContains(self.client.get(resp.url), reverse("export_job_download", args=[job.pk]))
+        rows = list(csv.reader(StringIO(self.download(job).decode("utf-8-sig"))))
+        self.assertEqual(len(rows), 1 + 3)
+
+        # el archivo es solo de quien lo pidió
+        self.login(self.resp_a)
+        self.assertEqual(self.client.get(reverse("export_job_download", args=[job.pk])).status_code, 404)
+
+    @override_settings(EXPORT_INLINE_MAX_ROWS=2)
+    def test_exportacion_grande_pasa_a_segundo_plano(self):
+        self.login(self.school)
+        resp = self.client.get(self.url_detalle, {"export": "xlsx"})
+        job = ExportJob.objects.get(requested_by=self.school)
+        self.assertRedirects(resp, reverse("export_job_detail", args=[job.pk]))
+        self.assertEqual((job.kind, job.fmt), (ExportJob.KIND_RANGE, "xlsx"))
+
+    def test_ciclo_lectivo_fuerza_excel_y_fechas(self):
+        form = ExportJobForm({"kind": ExportJob.KIND_SCHOOL_YEAR, "fmt": "csv", "school_year": 2024})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["fmt"], "xlsx")
+        self.assertEqual(form.cleaned_data["date_from"].isoformat(), "2024-03-01")
+        self.assertEqual(form.cleaned_data["date_to"].isoformat(), "2025-02-28")
+        self.assertFalse(ExportJobForm({"kind": ExportJob.KIND_RANGE, "fmt": "csv"}).is_valid())
+
+    def test_vencidas_se_borran_con_el_archivo(self):
+        job = run_job(self.job(self.school), workers=1)
+        path = f"{self.root}/{job.file_path}"
+        ExportJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(purge_expired_jobs(), 1)
+        self.assertFalse(ExportJob.objects.exists())
+        with self.assertRaises(FileNotFoundError):
+            open(path)
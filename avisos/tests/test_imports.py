@@ -0,0 +1,87 @@
+# archivo: avisos/tests/test_imports.py
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import Workbook
+
+from avisos.imports import ImportFileError, run_import
+from avisos.models import User, Student, ResponsibleStudent, LateArrival, StudentLateStats
+
+ROSTER_CSV = """documento;nombre_completo;email;nombre;apellido;nivel;grado;activo
+22222222;Padre A;a@test.com;Ana;Alvarez;Primaria;6;si
+22222222;Padre A;a@test.com;Axel;Alvarez;PRIMARIA;3;no
+44444444;Madre A;ma@test.com;Ana;Alvarez;PRIMARIA;6;
+123;Sin Doc;x@test.com;Beto;Bruno;PRIMARIA;1;
+55555555;Otro;otro@test.com;Beto;Bruno;TERCIARIO;1;
+"""
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+class TestImports(TestCase):
+    def test_padron_csv(self):
+        progress = []
+        result = run_import(csv_file(ROSTER_CSV), "padron.csv", "roster", chunk_size=2,
+                            progress=lambda r: progress.append(r.processed))
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(result.processed, 5)
+        self.assertEqual([line for line, _ in result.rejected], [5, 6])
+        self.assertIn("documento", result.rejected[0][1])
+        self.assertIn("level", result.rejected[1][1])
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertFalse(User.objects.get(id_number="22222222").has_usable_password())
+        # Ana figura con los dos responsables: un solo alumno, dos vínculos
+        ana = Student.objects.get(first_name="Ana")
+        self.assertEqual(ResponsibleStudent.objects.filter(student=ana).count(), 2)
+        self.assertFalse(Student.objects.get(first_name="Axel").active)
+
+        # re-importar actualiza en lugar de duplicar
+        result = run_import(csv_file(ROSTER_CSV.replace("Axel;Alvarez;PRIMARIA;3;no", "Axel;Alvarez;PRIMARIA;4;si")),
+                            "padron.csv", "roster")
+        self.assertEqual(Student.objects.count(), 2)
+        axel = Student.objects.get(first_name="Axel")
+        self.assertEqual((axel.grade, axel.active), (4, True))
+
+    def test_historial_xlsx_idempotente(self):
+        run_import(csv_file(ROSTER_CSV), "padron.csv", "roster")
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["Documento", "Nombre", "Apellido", "Fecha", "Motivo"])
+        ws.append([22222222, "Ana", "Alvarez", "01/03/2024 07:45", "Tránsito"])
+        ws.append([22222222, "ana", "ALVAREZ", "02/03/2024 08:10", "Dormida"])
+        ws.append([44444444, "Ana", "Alvarez", "fecha rota", "x"])
+        ws.append([99999999, "Nadie", "Nada", "02/03/2024 08:10", "x"])
+        buf = io.BytesIO()
+        wb.save(buf)
+
+        for _ in range(2):
+            buf.seek(0)
+            result = run_import(buf, "historial.xlsx", "lates")
+        self.assertEqual(LateArrival.objects.count(), 2)
+        self.assertEqual(result.created["avisos repetidos (salteados)"], 2)
+        self.assertEqual([line for line, _ in result.rejected], [4, 5])
+        self.assertEqual(StudentLateStats.objects.get(student__first_name="Ana").total_count, 2)
+
+    def test_columnas_faltantes(self):
+        with self.assertRaises(ImportFileError):
+            run_import(csv_file("documento,email\n1,2\n"), "x.csv", "roster")
+
+    def test_vista_solo_escuela(self):
+        school = User.objects.create_user(id_number="11111111", full_name="Escuela", email="e@test.com",
+                                          password="pass", is_school_staff=True)
+        url = reverse("import_data")
+        parent = User.objects.create_user(id_number="33333333", full_name="Padre", email="p@test.com", password="pass")
+        self.client.force_login(parent)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(school)
+        upload = SimpleUploadedFile("padron.csv", ROSTER_CSV.encode("utf-8"), content_type="text/csv")
+        resp = self.client.post(url, {"kind": "roster", "file": upload})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["result"].rejected_total, 2)
+        self.assertContains(resp, "Fila")
@@ -0,0 +1,124 @@
+# archivo: avisos/tests/test_late_stats.py
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+
+from avisos.models import (User, Student, ResponsibleStudent, LateArrival, StudentLateStats, StudentDailyLates,
+                           LateSlotCounts, LateWindowState)
+
+
+class LateStatsSetupMixin:
+    def setUp(self):
+        self.resp = User.objects.create_user(
+            id_number="22222222", full_name="Padre A", email="a@test.com", password="pass"
+        )
+        self.st1 = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        self.st2 = Student.objects.create(first_name="Beto", last_name="Bruno", level="SECUNDARIA", grade=1)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.st1)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.st2)
+        self.now = timezone.now()
+
+    def late(self, student, days, **kwargs):
+        return LateArrival(responsible=self.resp, student=student, reason="x",
+                           reported_at=self.now - timedelta(days=days), **kwargs)
+
+    def stats(self, student):
+        s = StudentLateStats.objects.get(student=student)
+        return s.total_count, s.last30_count
+
+    def assert_matches_raw(self):
+        expected = {s.student_id: (s.total_count, s.last30_count) for s in StudentLateStats.compute()}
+        actual = {s.student_id: (s.total_count, s.last30_count)
+                  for s in StudentLateStats.objects.filter(total_count__gt=0)}
+        self.assertEqual(actual, expected)
+
+
+class TestStudentLateStats(LateStatsSetupMixin, TestCase):
+    def test_create_y_delete(self):
+        a = self.late(self.st1, 1)
+        a.save()
+        self.late(self.st1, 40).save()
+        self.assertEqual(self.stats(self.st1), (2, 1))
+        a.delete()
+        self.assertEqual(self.stats(self.st1), (1, 0))
+        self.assert_matches_raw()
+
+    def test_bulk_create_y_queryset_delete(self):
+        LateArrival.objects.bulk_create(
+            [self.late(self.st1, d) for d in (1, 2, 45)] + [self.late(self.st2, d) for d in (3, 60)]
+        )
+        self.assertEqual(self.stats(self.st1), (3, 2))
+        self.assertEqual(self.stats(self.st2), (2, 1))
+        LateArrival.objects.filter(student=self.st1, reported_at__lt=self.now - timedelta(days=1, hours=12)).delete()
+        self.assertEqual(self.stats(self.st1), (1, 1))
+        self.assert_matches_raw()
+
+    def test_borrar_alumno_o_responsable(self):
+        LateArrival.objects.bulk_create([self.late(self.st1, 1), self.late(self.st2, 2)])
+        self.st1.delete()
+        self.assertFalse(StudentLateStats.objects.filter(student_id=self.st1.id).exists())
+        self.resp.delete()
+        self.assertEqual(self.stats(self.st2), (0, 0))
+
+    def test_refresh_window(self):
+        LateArrival.objects.bulk_create([self.late(self.st1, 29), self.late(self.st1, 2), self.late(self.st2, 1)])
+        self.assertEqual(self.stats(self.st1), (2, 2))
+        # 5 días después, el aviso de hace 29 días salió de la ventana
+        later = self.now + timedelta(days=5)
+        self.assertEqual(StudentLateStats.refresh_window(now=later), 1)
+        self.assertEqual(self.stats(self.st1), (2, 1))
+        self.assertEqual(self.stats(self.st2), (1, 1))
+        # sin cambios pendientes: no hace nada
+        self.assertEqual(StudentLateStats.refresh_window(now=later), 0)
+
+    def test_rebuild_command(self):
+        LateArrival.objects.bulk_create([self.late(self.st1, d) for d in (1, 31)])
+        StudentLateStats.objects.update(total_count=99, last30_count=99)
+        call_command("rebuild_late_stats", stdout=StringIO())
+        self.assertEqual(self.stats(self.st1), (2, 1))
+
+
+class TestStudentDailyLates(LateStatsSetupMixin, TestCase):
+    def rollup(self):
+        return {(r.student_id, r.day): r.count for r in StudentDailyLates.objects.all()}
+
+    def test_altas_bajas_y_backfill(self):
+        a = self.late(self.st1, 3)
+        a.save()
+        LateArrival.objects.bulk_create([self.late(self.st1, 3), self.late(self.st2, 10)])
+        d3 = timezone.localdate(self.now - timedelta(days=3))
+        d10 = timezone.localdate(self.now - timedelta(days=10))
+        self.assertEqual(self.rollup(), {(self.st1.id, d3): 2, (self.st2.id, d10): 1})
+
+        a.delete()
+        LateArrival.objects.filter(student=self.st2).delete()
+        self.assertEqual(self.rollup(), {(self.st1.id, d3): 1})
+
+        StudentDailyLates.objects.all().delete()
+        call_command("backfill_daily_lates", stdout=StringIO())
+        self.assertEqual(self.rollup(), {(self.st1.id, d3): 1})
+
+
+class TestNewKeyRace(TestCase):
+    """Dos altas concurrentes para claves que todavía no existen (alumno, día, franja)."""
+
+    def test_la_segunda_alta_suma_aunque_no_vio_la_fila(self):
+        resp = User.objects.create_user(id_number="22222222", full_name="Padre A", email="a@test.com", password="pass")
+        st = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        now = timezone.now()
+        LateArrival.objects.create(responsible=resp, student=st, reason="x", reported_at=now)
+        # la segunda transacción buscó antes de que la primera confirmara: no encuentra filas
+        with mock.patch.object(StudentLateStats.objects, "select_for_update", return_value=StudentLateStats.objects.none()), \
+             mock.patch.object(StudentDailyLates.objects, "select_for_update", return_value=StudentDailyLates.objects.none()), \
+             mock.patch.object(LateSlotCounts.objects, "select_for_update", return_value=LateSlotCounts.objects.none()):
+            LateArrival.objects.create(responsible=resp, student=st, reason="y", reported_at=now)
+
+        stats = StudentLateStats.objects.get(student=st)
+        self.assertEqual((stats.total_count, stats.last30_count), (2, 2))
+        self.assertEqual(StudentDailyLates.objects.get(student=st).count, 2)
+        self.assertEqual(LateSlotCounts.objects.get().count, 2)
+        self.assertEqual(LateWindowState.objects.get(key=f"s:{st.pk}").days, {timezone.localdate(now).isoformat(): 2})
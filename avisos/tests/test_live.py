@@ -0,0 +1,76 @@
+# archivo: avisos/tests/test_live.py
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.live import new_lates_since
+from avisos.models import LateArrival
+from avisos.tests.test_reports import BaseReportSetup
+
+
+def parse_events(text):
+    return [json.loads(line[len("data: "):]) for line in text.splitlines() if line.startswith("data: ")]
+
+
+class TestLiveFeed(BaseReportSetup):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("school_today_stream")
+        self.first = LateArrival.objects.create(responsible=self.resp_a, student=self.st_a1, reason="Hoy 1")
+
+    def test_filas_enriquecidas_desde_cursor(self):
+        second = LateArrival.objects.create(responsible=self.resp_b, student=self.st_b1, reason="Hoy 2")
+        rows = new_lates_since(self.first.pk)
+        self.assertEqual([r["id"] for r in rows], [second.pk])
+        self.assertEqual(rows[0]["student"], "Bruno, Beto")
+        self.assertEqual(rows[0]["total_count"], 4)
+        self.assertEqual(rows[0]["last30_count"], 4)
+        # solo hoy: los avisos viejos no aparecen aunque tengan id > 0
+        self.assertEqual([r["id"] for r in new_lates_since(0)], [self.first.pk, second.pk])
+
+    def test_permisos_y_cursor_con_wsgi(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 302)
+        self.login(self.resp_a)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.login(self.school)
+        resp = self.client.get(self.url, {"after": 0})
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        self.assertEqual([e["id"] for e in parse_events(resp.content.decode())], [self.first.pk])
+        # Last-Event-ID (reconexión de EventSource) tiene prioridad sobre ?after
+        resp = self.client.get(self.url, {"after": 0}, HTTP_LAST_EVENT_ID=str(self.first.pk))
+        self.assertEqual(parse_events(resp.content.decode()), [])
+
+    def test_pagina_de_hoy_arranca_desde_el_ultimo_id(self):
+        self.login(self.school)
+        resp = self.client.get(reverse("school_today_lates"))
+        self.assertEqual(resp.context["live_after"], self.first.pk)
+        self.assertContains(resp, reverse("school_today_stream"))
+
+    @override_settings(LIVE_FEED={"POLL_SECONDS": 30, "MAX_SECONDS": 60})
+    async def test_stream_asgi_empuja_lo_nuevo(self):
+        await self.async_client.aforce_login(self.school)
+        resp = await self.async_client.get(self.url, {"after": self.first.pk})
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        stream = aiter(resp.streaming_content)
+
+        async def next_chunk():
+            # muy por debajo de POLL_SECONDS: tiene que llegar por el pub/sub, no por sondeo
+            return (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+
+        self.assertTrue((await next_chunk()).startswith("retry: 30000"))
+
+        def create():
+            with self.captureOnCommitCallbacks(execute=True):
+                return LateArrival.objects.create(responsible=self.resp_b, student=self.st_b1, reason="En vivo")
+
+        late = await sync_to_async(create)()
+        events = parse_events(await next_chunk())
+        self.assertEqual([e["id"] for e in events], [late.pk])
+        self.assertEqual(events[0]["reason"], "En vivo")
+        await stream.aclose()
@@ -0,0 +1,69 @@
+# archivo: avisos/tests/test_notify.py
+import json
+
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+
+from avisos.models import LateArrival, StudentLateStats
+from avisos.tests.test_reports import BaseReportSetup
+
+
+class TestNotifyLate(BaseReportSetup):
+    def test_form_crea_todos_en_un_insert(self):
+        self.login(self.resp_a)
+        before = LateArrival.objects.count()
+        resp = self.client.post(reverse("notify_late"),
+                                {"students": [self.st_a1.id, self.st_a2.id], "reason": " Paro de colectivos "})
+        self.assertRedirects(resp, reverse("notifications_list"))
+        self.assertEqual(LateArrival.objects.count(), before + 2)
+        self.assertEqual(set(LateArrival.objects.filter(reason="Paro de colectivos").values_list("student_id", flat=True)),
+                         {self.st_a1.id, self.st_a2.id})
+        self.assertEqual(StudentLateStats.objects.get(student=self.st_a1).total_count, 4)
+
+
+class TestNotifyLateBatchApi(BaseReportSetup):
+    def post(self, payload):
+        return self.client.post(reverse("notify_late_batch"), data=json.dumps(payload),
+                                content_type="application/json")
+
+    def test_lote_con_errores_por_item(self):
+        self.login(self.resp_a)
+        when = (timezone.now() - timedelta(hours=1)).isoformat()
+        resp = self.post({"items": [
+            {"student": self.st_a1.id, "reason": "Tránsito", "reported_at": when},
+            {"student": self.st_b1.id, "reason": "No es mío"},
+            {"student": self.st_a2.id},
+            {"student": self.st_a2.id, "reason": "Futuro", "reported_at": (timezone.now() + timedelta(days=1)).isoformat()},
+            {"student": self.st_a2.id, "reason": "Médico"},
+        ]})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([c["index"] for c in data["created"]], [0, 4])
+        self.assertEqual([e["index"] for e in data["errors"]], [1, 2, 3])
+        self.assertIn("student", data["errors"][0]["errors"])
+        self.assertIn("reason", data["errors"][1]["errors"])
+        self.assertIn("reported_at", data["errors"][2]["errors"])
+
+        created = LateArrival.objects.get(pk=data["created"][0]["id"])
+        self.assertEqual(created.responsible, self.resp_a)
+        self.assertEqual(created.reported_at.isoformat(), when)
+
+    def test_escuela_puede_avisar_por_cualquier_alumno(self):
+        self.login(self.school)
+        self.st_b1.active = False
+        self.st_b1.save()
+        resp = self.post({"items": [{"student": self.st_a1.id, "reason": "x"}, {"student": self.st_b1.id, "reason": "y"}]})
+        data = resp.json()
+        self.assertEqual(len(data["created"]), 1)
+        self.assertEqual(data["errors"][0]["index"], 1)  # inactivo
+
+    def test_requests_invalidos(self):
+        self.assertEqual(self.post({"items": []}).status_code, 403)  # sin login
+        self.login(self.resp_a)
+        self.assertEqual(self.post({"items": []}).status_code, 400)
+        resp = self.client.post(reverse("notify_late_batch"), data="{no", content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+        resp = self.post({"items": [{"student": self.st_b1.id, "reason": "x"}]})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["created"], [])
@@ -0,0 +1,170 @@
+# archivo: avisos/tests/test_outbox.py
+import socketserver
+import threading
+from email import message_from_bytes
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.mail import OutboxSender
+from avisos.models import User, OutboxEmail
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP mínimo en 127.0.0.1 para los tests: guarda lo recibido y responde lo configurado."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.rcpt_replies = {}  # destinatario -> respuesta a RCPT
+        self.data_replies = {}  # destinatario -> respuesta a DATA
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 fake ESMTP")
+        rcpts = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode().strip()
+            verb = cmd[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 fake")
+            elif verb == "MAIL":
+                rcpts = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                addr = cmd.split(":", 1)[1].strip().strip("<>")
+                answer = server.rcpt_replies.get(addr, "250 OK")
+                if answer.startswith("250"):
+                    rcpts.append(addr)
+                self.reply(answer)
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                data = b""
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b""):
+                        break
+                    data += chunk
+                answer = next((server.data_replies[r] for r in rcpts if r in server.data_replies), "250 OK")
+                if answer.startswith("250"):
+                    server.messages.append((rcpts, message_from_bytes(data)))
+                self.reply(answer)
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # RSET, NOOP
+                self.reply("250 OK")
+
+
+@override_settings(EMAIL_BACKEND="avisos.mail.OutboxEmailBackend")
+class TestOutbox(TestCase):
+    def setUp(self):
+        self.smtp = FakeSMTPServer()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        self.smtp_settings = override_settings(
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=self.smtp.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_TIMEOUT=5,
+        )
+        self.smtp_settings.enable()
+        self.addCleanup(self.smtp_settings.disable)
+        self.sleeps = []
+
+    def sender(self, **conf):
+        clock = iter(range(0, 10_000)).__next__  # cada llamada avanza un "segundo"
+        return OutboxSender({"MAX_PER_MINUTE": 6000, **conf}, sleep=self.sleeps.append, clock=clock)
+
+    def queue(self, *recipients):
+        for to in recipients:
+            mail.send_mail("Asunto", "Cuerpo", "ccm@test.com", [to])
+
+    def test_reset_de_clave_solo_encola(self):
+        User.objects.create_user(id_number="11111111", full_name="Padre", email="padre@test.com", password="x")
+        resp = self.client.post(reverse("password_reset"), {"email": "padre@test.com"})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(self.smtp.connections, 0)  # el request no habla SMTP
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ["padre@test.com"])
+        self.assertIn(b"/a/reset/", bytes(email.raw))
+
+        result = self.sender().run_once()
+        self.assertEqual(result.sent, 1)
+        (rcpts, msg), = self.smtp.messages
+        self.assertEqual(rcpts, ["padre@test.com"])
+        self.assertIn("/a/reset/", msg.get_payload(decode=True).decode())
+
+    def test_lote_en_una_conexion_con_ritmo(self):
+        self.queue("a@test.com", "b@test.com", "c@test.com")
+        result = self.sender(MAX_PER_MINUTE=30).run_once()  # uno cada 2 segundos
+        self.assertEqual((result.sent, result.retried, result.failed), (3, 0, 0))
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists())
+        # nada más para mandar
+        self.assertEqual(self.sender().run_once().sent, 0)
+
+    def test_reintentos_y_rechazos(self):
+        self.smtp.rcpt_replies = {"lleno@test.com": "452 4.2.2 mailbox full", "nadie@test.com": "550 5.1.1 no such user"}
+        self.queue("lleno@test.com", "nadie@test.com", "ok@test.com")
+        with self.assertLogs("avisos.mail", "WARNING"):
+            result = self.sender(BACKOFF_SECONDS=60).run_once()
+        self.assertEqual((result.sent, result.retried, result.failed), (1, 1, 1))
+
+        full = OutboxEmail.objects.get(recipients=["lleno@test.com"])
+        self.assertEqual((full.status, full.attempts), (OutboxEmail.PENDING, 1))
+        self.assertGreater(full.next_attempt_at, timezone.now())
+        self.assertIn("452", full.last_error)
+        self.assertEqual(OutboxEmail.objects.get(recipients=["nadie@test.com"]).status, OutboxEmail.FAILED)
+
+        # al vencer el backoff se reintenta; al agotar intentos queda como fallido
+        OutboxEmail.objects.filter(pk=full.pk).update(next_attempt_at=timezone.now())
+        with self.assertLogs("avisos.mail", "WARNING"):
+            result = self.sender(MAX_ATTEMPTS=2).run_once()
+        self.assertEqual(result.failed, 1)
+        full.refresh_from_db()
+        self.assertEqual((full.status, full.attempts), (OutboxEmail.FAILED, 2))
+
+    def test_cupo_de_gmail(self):
+        self.queue("a@test.com", "b@test.com", "c@test.com")
+        # cupo diario propio
+        result = self.sender(MAX_PER_DAY=2).run_once()
+        self.assertEqual(result.sent, 2)
+        self.assertEqual(self.sender(MAX_PER_DAY=2).run_once().stopped, "cupo diario agotado")
+
+        # el servidor avisa que se pasó el cupo: se corta el lote y el resto queda como estaba
+        self.queue("d@test.com", "e@test.com")
+        self.smtp.data_replies = {"c@test.com": "550 5.4.5 Daily user sending quota exceeded"}
+        result = self.sender().run_once()
+        self.assertIn("5.4.5", result.stopped)
+        self.assertEqual(result.sent, 0)
+        pending = OutboxEmail.objects.filter(status=OutboxEmail.PENDING)
+        self.assertEqual(pending.count(), 3)
+        self.assertEqual(sorted(pending.values_list("attempts", flat=True)), [0, 0, 1])
+
+    def test_sin_servidor_reencola_todo(self):
+        self.queue("a@test.com", "b@test.com")
+        self.smtp.shutdown()
+        self.smtp.server_close()
+        result = self.sender().run_once()
+        self.assertIn("sin conexión SMTP", result.stopped)
+        self.assertEqual(result.retried, 2)
+        self.assertFalse(OutboxEmail.objects.filter(status=OutboxEmail.SENDING).exists())
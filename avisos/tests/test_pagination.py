@@ -0,0 +1,78 @@
+# archivo: avisos/tests/test_pagination.py
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+
+from avisos.models import LateArrival
+from avisos.pagination import keyset_paginate
+from avisos.views import LateArrivalReportView
+from avisos.tests.test_reports import BaseReportSetup
+
+
+class TestKeysetPaginate(BaseReportSetup):
+    def ids(self, page):
+        return [n.id for n in page]
+
+    def test_recorre_hacia_adelante_y_atras(self):
+        # mismo reported_at para forzar el desempate por id
+        same = timezone.now() - timedelta(days=3)
+        for _ in range(3):
+            LateArrival.objects.create(responsible=self.resp_a, student=self.st_a2, reason="Igual", reported_at=same)
+        qs = LateArrival.objects.all()
+        expected = list(qs.order_by("-reported_at", "-id").values_list("id", flat=True))
+        self.assertEqual(len(expected), 10)
+
+        seen, pages, page = [], [], keyset_paginate(qs, None, 3)
+        while True:
+            pages.append(page)
+            seen += self.ids(page)
+            if not page.has_next:
+                break
+            page = keyset_paginate(qs, page.next_cursor, 3)
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(p) for p in pages], [3, 3, 3, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        # volver desde la última página reproduce las anteriores
+        back = keyset_paginate(qs, pages[-1].prev_cursor, 3)
+        self.assertEqual(self.ids(back), self.ids(pages[2]))
+        self.assertTrue(back.has_next)
+        back = keyset_paginate(qs, keyset_paginate(qs, back.prev_cursor, 3).prev_cursor, 3)
+        self.assertEqual(self.ids(back), self.ids(pages[0]))
+        self.assertFalse(back.has_previous)
+
+    def test_cursor_invalido_vuelve_a_la_primera(self):
+        page = keyset_paginate(LateArrival.objects.all(), "basura", 3)
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_previous)
+
+
+class TestPaginatedViews(BaseReportSetup):
+    def test_reporte_detallado_mantiene_filtros_y_alcance(self):
+        self.login(self.resp_a)
+        d1 = (timezone.now() - timedelta(days=365)).date().isoformat()
+        d2 = timezone.now().date().isoformat()
+        url = reverse("report_lates_detailed")
+        with mock.patch.object(LateArrivalReportView, "page_size", 3):
+            resp = self.client.get(url, {"date_from": d1, "date_to": d2})
+            page = resp.context["page"]
+            self.assertEqual(len(resp.context["rows"]), 3)
+            self.assertIn(f"date_from={d1}", page.next_url)
+            resp = self.client.get(url + page.next_url)
+        rows = resp.context["rows"]
+        # resp_a tiene 4 avisos: queda 1 en la segunda página, siempre propio
+        self.assertEqual(len(rows), 1)
+        self.assertTrue(all(r.responsible_id == self.resp_a.id for r in rows))
+        self.assertFalse(resp.context["page"].has_next)
+
+    def test_listados_paginados(self):
+        self.login(self.resp_a)
+        resp = self.client.get(reverse("notifications_list"))
+        self.assertEqual(len(resp.context["notifications"]), 4)
+        self.assertFalse(resp.context["page"].has_other_pages)
+
+        self.login(self.school)
+        resp = self.client.get(reverse("student_late_history", args=[self.st_a1.id]))
+        self.assertEqual(len(resp.context["lates"]), 3)
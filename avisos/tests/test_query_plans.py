@@ -0,0 +1,116 @@
+# archivo: avisos/tests/test_query_plans.py
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+
+from avisos.models import User, Student, ResponsibleStudent, LateArrival
+
+TABLE = LateArrival._meta.db_table
+# cualquier SCAN sobre avisos_latearrival falla, también "SCAN ... USING INDEX x": recorrer el
+# índice entero (p. ej. reported_at__date, que no admite rango) cuesta lo mismo que la tabla.
+# Solo SEARCH (búsqueda por clave/rango en un índice) pasa.
+FULL_SCAN_RE = re.compile(rf"^SCAN {TABLE}\b")
+
+
+def explain(sql):
+    with connection.cursor() as cur:
+        cur.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cur.fetchall()]
+
+
+class TestLateArrivalQueryPlans(TestCase):
+    """Cada consulta sobre LateArrival que disparan las vistas debe usar un índice."""
+
+    def setUp(self):
+        self.school = User.objects.create_user(
+            id_number="11111111", full_name="Escuela Uno", email="escuela@ccm.test", password="pass", is_school_staff=True
+        )
+        self.resp = User.objects.create_user(
+            id_number="22222222", full_name="Padre A", email="a@test.com", password="pass"
+        )
+        self.student = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.student)
+        now = timezone.now()
+        for days in (0, 1, 5, 40):
+            LateArrival.objects.create(
+                responsible=self.resp, student=self.student, reason="Tránsito", reported_at=now - timedelta(days=days)
+            )
+
+    def assert_no_full_scan(self, user, url, params=None):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params or {})
+        self.assertIn(resp.status_code, (200, 302))
+
+        checked = 0
+        for q in ctx.captured_queries:
+            sql = q["sql"]
+            if not sql.lstrip().upper().startswith("SELECT") or f'"{TABLE}"' not in sql:
+                continue
+            plan = explain(sql)
+            checked += 1
+            scans = [line for line in plan if FULL_SCAN_RE.match(line)]
+            self.assertFalse(scans, f"{url}: full scan de {TABLE}\n{sql}\n" + "\n".join(plan))
+        return checked
+
+    def test_home(self):
+        self.assertGreater(self.assert_no_full_scan(self.resp, reverse("home")), 0)
+
+    def test_notifications_list(self):
+        self.assertGreater(self.assert_no_full_scan(self.resp, reverse("notifications_list")), 0)
+
+    def test_student_history(self):
+        url = reverse("student_late_history", args=[self.student.id])
+        self.assertGreater(self.assert_no_full_scan(self.school, url), 0)
+
+    def test_school_today(self):
+        self.assertGreater(self.assert_no_full_scan(self.school, reverse("school_today_lates")), 0)
+
+    def test_report_detailed(self):
+        today = timezone.localdate()
+        params = {"date_from": (today - timedelta(days=30)).isoformat(), "date_to": today.isoformat()}
+        self.assertGreater(self.assert_no_full_scan(self.school, reverse("report_lates_detailed"), params), 0)
+        self.assertGreater(self.assert_no_full_scan(self.resp, reverse("report_lates_detailed"), params), 0)
+
+    def test_report_aggregated(self):
+        # lee contadores precalculados: de la tabla cruda solo el MAX(id) del ETag (por PK)
+        for user in (self.school, self.resp):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse("report_lates_aggregated"))
+            raw = [q["sql"] for q in ctx.captured_queries if f'"{TABLE}"' in q["sql"]]
+            self.assertEqual(raw, [f'SELECT MAX("{TABLE}"."id") AS "m" FROM "{TABLE}"'])
+
+    def test_date_ranges_use_search(self):
+        # los filtros por día local deben resolverse con búsqueda por rango en el índice
+        today = timezone.localdate()
+        for qs in (LateArrival.objects.for_local_day(today),
+                   LateArrival.objects.for_local_range(today - timedelta(days=30), today)):
+            sql, params = qs.query.sql_with_params()
+            with connection.cursor() as cur:
+                cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = [row[-1] for row in cur.fetchall()]
+            self.assertTrue(any(line.startswith(f"SEARCH {TABLE} USING") and "reported_at>" in line for line in plan),
+                            "\n".join(plan))
+
+    def test_detecta_recorrido_del_indice(self):
+        # el filtro viejo por __date recorre late_reported_idx entero: el chequeo tiene que verlo
+        sql, params = LateArrival.objects.filter(reported_at__date=timezone.localdate()).query.sql_with_params()
+        with connection.cursor() as cur:
+            cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = [row[-1] for row in cur.fetchall()]
+        self.assertTrue([line for line in plan if FULL_SCAN_RE.match(line)], "\n".join(plan))
+
+    def test_busqueda_alumnos_usa_indice(self):
+        from avisos.models import student_search_q
+        sql, params = Student.objects.filter(student_search_q("alva")).query.sql_with_params()
+        with connection.cursor() as cur:
+            cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = [row[-1] for row in cur.fetchall()]
+        self.assertFalse([l for l in plan if l == f"SCAN {Student._meta.db_table}"], "\n".join(plan))
+        self.assertTrue(any("search_last_first" in l for l in plan), "\n".join(plan))
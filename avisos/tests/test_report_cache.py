@@ -0,0 +1,77 @@
+# archivo: avisos/tests/test_report_cache.py
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from avisos.access import get_access_profile
+from avisos.models import User, LateArrival
+from avisos.report_cache import report_cache
+from avisos.tests.test_reports import BaseReportSetup
+from avisos.views import LateArrivalAggregatedView
+
+
+class TestReportCache(BaseReportSetup):
+    def setUp(self):
+        super().setUp()
+        report_cache().clear()
+        self.school2 = User.objects.create_user(
+            id_number="44444444", full_name="Escuela Dos", email="escuela2@ccm.test", password="pass",
+            is_school_staff=True,
+        )
+
+    def get(self, user, url, params=None):
+        self.login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params or {})
+        self.assertEqual(resp.status_code, 200)
+        return resp, [q["sql"] for q in ctx.captured_queries]
+
+    def test_totalizado_compartido_por_el_personal(self):
+        first, _ = self.get(self.school, self.url_agg, {"q": "alvarez"})
+        second, queries = self.get(self.school2, self.url_agg, {"q": "Álvarez"})  # mismo filtro normalizado
+        self.assertEqual(first.context["rows_html"], second.context["rows_html"])
+        # con el fragmento en cache no se consulta la lista de alumnos
+        self.assertFalse([q for q in queries if "ORDER BY" in q])
+
+        # un aviso nuevo cambia la versión: se recalcula
+        LateArrival.objects.create(responsible=self.resp_a, student=self.st_a2, reason="Nuevo")
+        third, queries = self.get(self.school2, self.url_agg, {"q": "alvarez"})
+        self.assertNotEqual(first.context["rows_html"], third.context["rows_html"])
+        self.assertTrue([q for q in queries if "ORDER BY" in q])
+
+    def test_alcance_y_catalogo(self):
+        school, _ = self.get(self.school, self.url_agg)
+        resp, _ = self.get(self.resp_a, self.url_agg)
+        # el responsable no reutiliza la entrada de la escuela
+        self.assertNotIn("Bruno", resp.context["rows_html"])
+        self.assertIn("Bruno", school.context["rows_html"])
+
+        self.st_b1.last_name = "Brunetti"
+        self.st_b1.save()
+        school, _ = self.get(self.school2, self.url_agg)
+        self.assertIn("Brunetti", school.context["rows_html"])
+
+    def test_personal_dado_de_baja_no_usa_la_entrada_de_la_escuela(self):
+        school, _ = self.get(self.school, self.url_agg)
+        self.assertIn("Bruno", school.context["rows_html"])
+        get_access_profile(self.school)  # perfil "escuela" en el cache
+        # sin señales, como un cambio hecho desde otro worker: el perfil cacheado queda viejo
+        User.objects.filter(pk=self.school.pk).update(is_school_staff=False)
+        view = LateArrivalAggregatedView()
+        view.setup(RequestFactory().get(self.url_agg))
+        view.request.user = User.objects.get(pk=self.school.pk)
+        self.assertEqual(view.get_report_scope(), f"user:{self.school.pk}")
+        resp, _ = self.get(self.school, self.url_agg)
+        self.assertNotIn("Bruno", resp.context["rows_html"])
+
+    def test_detallado_cachea_la_pagina(self):
+        first, _ = self.get(self.school, self.url_detalle)
+        second, queries = self.get(self.school2, self.url_detalle)
+        self.assertEqual([r.pk for r in first.context["rows"]], [r.pk for r in second.context["rows"]])
+        self.assertFalse([q for q in queries if "ORDER BY" in q])
+
+    @override_settings(REPORT_CACHE_MAX_ENTRY_BYTES=100)
+    def test_entradas_grandes_no_se_guardan(self):
+        self.get(self.school, self.url_agg)
+        _, queries = self.get(self.school2, self.url_agg)
+        self.assertTrue([q for q in queries if "ORDER BY" in q])
@@ -94,7 +94,29 @@ class TestDetailedReport(BaseReportSetup):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp["Content-Type"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         # XLSX es un zip: debería iniciar con 'PK'
-        self.assertTrue(resp.content[:2] == b"PK")
+        content = b"".join(resp.streaming_content)
+        self.assertTrue(content[:2] == b"PK")
+
+        from io import BytesIO
+        from openpyxl import load_workbook
+        ws = load_workbook(BytesIO(content), read_only=True).active
+        data = list(ws.iter_rows(values_only=True))
+        self.assertEqual(data[0], ("Alumno", "Grado", "Fecha y hora", "Motivo"))
+        self.assertEqual(len(data), 1 + 7)
+
+    def test_export_csv(self):
+        self.login(self.resp_a)
+        d1 = (timezone.now() - timedelta(days=365)).date().isoformat()
+        d2 = timezone.now().date().isoformat()
+        resp = self.client.get(self.url_detalle, {"date_from": d1, "date_to": d2, "export": "csv"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertTrue(resp["Content-Type"].startswith("text/csv"))
+        lines = b"".join(resp.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "Alumno,Grado,Fecha y hora,Motivo")
+        # solo los 4 registros de resp_a
+        self.assertEqual(len(lines), 1 + 4)
+        self.assertTrue(all(l.startswith('"Alvarez, ') for l in lines[1:]))
 
 
 class TestAggregatedReport(BaseReportSetup):
@@ -142,3 +164,87 @@ class TestAggregatedReport(BaseReportSetup):
         self.assertEqual(r["student__first_name"], "Beto")
         self.assertEqual(r["total"], 3)
         self.assertEqual(r["last30"], 3)
+
+    def test_aggregated_rango_fechas(self):
+        self.login(self.school)
+        # un aviso de B1 un año antes, para la comparación interanual
+        LateArrival.objects.create(responsible=self.resp_b, student=self.st_b1, reason="Viejo",
+                                   reported_at=timezone.now() - timedelta(days=366))
+        today = timezone.localdate()
+        d1 = (today - timedelta(days=8)).isoformat()
+        resp = self.client.get(self.url_agg, {"date_from": d1, "date_to": today.isoformat()})
+        self.assertEqual(resp.status_code, 200)
+        by_student = {r["student__last_name"] + r["student__first_name"]: r for r in resp.context["rows"]}
+        # últimos 8 días: A1 (5 días), A2 (2 días), B1 (1 y 7 días)
+        self.assertEqual(by_student["AlvarezAna"]["total"], 1)
+        self.assertEqual(by_student["AlvarezAxel"]["total"], 1)
+        self.assertEqual(by_student["BrunoBeto"]["total"], 2)
+        self.assertEqual(by_student["BrunoBeto"]["last30"], 3)
+
+        d1 = (today - timedelta(days=370)).isoformat()
+        d2 = (today - timedelta(days=360)).isoformat()
+        resp = self.client.get(self.url_agg, {"date_from": d1, "date_to": d2})
+        rows = list(resp.context["rows"])
+        self.assertEqual([(r["student__first_name"], r["total"]) for r in rows], [("Beto", 1)])
+
+        # comparación interanual: el rango actual ve el aviso de hace un año
+        resp = self.client.get(self.url_agg, {"date_from": (today - timedelta(days=5)).isoformat(),
+                                              "date_to": today.isoformat()})
+        by_student = {r["student__first_name"]: r for r in resp.context["rows"]}
+        self.assertEqual(by_student["Beto"]["compare_total"], 1)
+        self.assertEqual(by_student["Beto"]["total"], 1)
+
+    def test_aggregated_rango_incompleto(self):
+        self.login(self.school)
+        resp = self.client.get(self.url_agg, {"date_from": timezone.localdate().isoformat()})
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.context["form"].is_valid())
+        # sin rango válido se muestran los totales generales
+        self.assertEqual(len(list(resp.context["rows"])), 3)
+
+    def test_aggregated_busqueda_sin_acentos(self):
+        st = Student.objects.create(first_name="José", last_name="Pérez", level="PRIMARIA", grade=2)
+        LateArrival.objects.create(responsible=self.resp_b, student=st, reason="x")
+        self.login(self.school)
+        for q in ("perez", "PÉREZ", "jose per", "Pérez, José"):
+            rows = list(self.client.get(self.url_agg, {"q": q}).context["rows"])
+            self.assertEqual([r["student_id"] for r in rows], [st.id], q)
+
+    def test_typeahead_alumnos(self):
+        url = reverse("student_search_api")
+        self.login(self.resp_a)
+        data = self.client.get(url, {"q": "alva"}).json()["results"]
+        self.assertEqual({r["name"] for r in data}, {"Alvarez, Ana", "Alvarez, Axel"})
+        # el responsable no ve alumnos ajenos
+        self.assertEqual(self.client.get(url, {"q": "brun"}).json()["results"], [])
+        self.login(self.school)
+        self.assertEqual(self.client.get(url, {"q": "brun"}).json()["results"][0]["id"], self.st_b1.id)
+        self.assertEqual(self.client.get(url, {"q": "b"}).json()["results"], [])
+        # solo signos: normaliza a vacío, no es "cualquier alumno"
+        self.assertEqual(self.client.get(url, {"q": "!!"}).json()["results"], [])
+
+    def test_aggregated_busqueda_solo_signos(self):
+        self.login(self.school)
+        self.assertTrue(list(self.client.get(self.url_agg).context["rows"]))
+        for q in ("!!", "--"):
+            self.assertEqual(list(self.client.get(self.url_agg, {"q": q}).context["rows"]), [], q)
+            self.assertNotIn("Bruno", self.client.get(self.url_agg, {"q": q}).context["rows_html"], q)
+
+
+class TestLocalDayRange(BaseReportSetup):
+    def test_limites_del_dia_local(self):
+        from datetime import datetime, time
+        day = timezone.localdate() - timedelta(days=100)
+        tz = timezone.get_current_timezone()
+        # 23:59 local cuenta para ese día; 00:00 del día siguiente ya no
+        inside = timezone.make_aware(datetime.combine(day, time(23, 59)), tz)
+        outside = timezone.make_aware(datetime.combine(day + timedelta(days=1), time(0, 0)), tz)
+        LateArrival.objects.create(responsible=self.resp_a, student=self.st_a1, reason="Noche", reported_at=inside)
+        LateArrival.objects.create(responsible=self.resp_a, student=self.st_a1, reason="Madrugada", reported_at=outside)
+
+        self.assertEqual(list(LateArrival.objects.for_local_day(day).values_list("reason", flat=True)), ["Noche"])
+        self.assertEqual(LateArrival.objects.for_local_range(day, day + timedelta(days=1)).count(), 2)
+        self.assertEqual(
+            LateArrival.objects.for_local_range(day, day).count(),
+            LateArrival.objects.filter(reported_at__date=day).count(),
+        )
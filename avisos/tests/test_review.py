@@ -0,0 +1,75 @@
+# archivo: avisos/tests/test_review.py
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.models import LateArrival
+from avisos.tests.test_reports import BaseReportSetup
+
+
+class TestSchoolReview(BaseReportSetup):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.today = [
+            LateArrival.objects.create(responsible=r, student=st, reason="Hoy", reported_at=now)
+            for r, st in ((self.resp_a, self.st_a1), (self.resp_b, self.st_b1), (self.school, self.st_b1))
+        ]
+        self.url = reverse("school_review_lates")
+
+    def pending(self):
+        return set(LateArrival.objects.filter(pk__in=[l.pk for l in self.today], reviewed_at__isnull=True)
+                   .values_list("pk", flat=True))
+
+    def test_get_no_escribe(self):
+        self.login(self.school)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("school_today_lates"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(all(q["sql"].startswith("SELECT") for q in ctx.captured_queries))
+        self.assertEqual(resp.context["pending_count"], 2)
+        self.assertEqual(len(self.pending()), 3)
+
+    def test_marcar_por_ids_y_hasta_id(self):
+        self.login(self.school)
+        a, b, own = self.today
+        resp = self.client.post(self.url, {"ids": [a.pk]})
+        self.assertRedirects(resp, reverse("school_today_lates"))
+        self.assertEqual(self.pending(), {b.pk, own.pk})
+        a.refresh_from_db()
+        self.assertEqual(a.reviewed_by, self.school)
+        first_review = a.reviewed_at
+
+        resp = self.client.post(self.url, {"up_to_id": own.pk}, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.json(), {"reviewed": 1})  # b; el propio nunca, a ya estaba
+        self.assertEqual(self.pending(), {own.pk})
+        a.refresh_from_db()
+        self.assertEqual(a.reviewed_at, first_review)
+
+        # idempotente
+        resp = self.client.post(self.url, {"up_to_id": own.pk}, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.json(), {"reviewed": 0})
+
+    def test_contador_coincide_con_lo_que_se_marca(self):
+        # con una página que no muestra todo, el botón cuenta lo que el POST va a marcar
+        from avisos.views import SchoolTodayLatesView
+
+        self.login(self.school)
+        with mock.patch.object(SchoolTodayLatesView, "page_size", 1):
+            resp = self.client.get(reverse("school_today_lates"))
+        self.assertEqual(len(resp.context["lates"]), 1)
+        max_id, pending_count = resp.context["max_id"], resp.context["pending_count"]
+        resp = self.client.post(self.url, {"up_to_id": max_id}, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.json(), {"reviewed": pending_count})
+
+    def test_validaciones(self):
+        self.login(self.school)
+        self.assertEqual(self.client.post(self.url, {}).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {"ids": ["x"]}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.login(self.resp_a)
+        self.assertEqual(self.client.post(self.url, {"up_to_id": 999}).status_code, 403)
+        self.assertEqual(len(self.pending()), 3)
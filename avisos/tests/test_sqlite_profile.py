@@ -0,0 +1,127 @@
+# archivo: avisos/tests/test_sqlite_profile.py
+import os
+import tempfile
+import threading
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase
+
+
+IS_SQLITE = connection.vendor == "sqlite"
+
+
+@skipUnless(IS_SQLITE, "solo SQLite")
+class TestSqlitePragmas(TestCase):
+    def test_conexion_configurada(self):
+        with connection.cursor() as cur:
+            cur.execute("PRAGMA synchronous")
+            self.assertEqual(cur.fetchone()[0], 1)  # NORMAL
+            cur.execute("PRAGMA busy_timeout")
+            self.assertEqual(cur.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+
+
+class TestSqliteSettings(SimpleTestCase):
+    def test_database_url_sqlite_lleva_las_opciones(self):
+        import runpy
+        from unittest import mock
+
+        with mock.patch.dict(os.environ, {"DATABASE_URL": "sqlite:////tmp/avisos-url.sqlite3"}):
+            databases = runpy.run_path(os.path.join(settings.BASE_DIR, "config", "settings.py"))["DATABASES"]
+        options = databases["default"]["OPTIONS"]
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(options["timeout"], 20)
+
+
+BURST_ALIAS = "burst"
+
+
+@skipUnless(IS_SQLITE, "solo SQLite")
+class TestMorningBurst(SimpleTestCase):
+    """
+    Ráfaga de la mañana sobre un archivo SQLite real, por las conexiones de Django: varios
+    "padres" insertando a la vez (leer sus alumnos + insertar, en transaction.atomic) mientras el
+    personal lee el listado. La base usa el ENGINE/OPTIONS de "default" (transaction_mode, timeout)
+    y connection_created le aplica los PRAGMA: sin eso aparece "database is locked".
+    """
+    writers, per_writer, readers = 8, 40, 3
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # la base se registra acá (el runner arma las de test antes): se habilita solo esa
+        cls.tmp = tempfile.TemporaryDirectory()
+        # :memory: no sirve: no tiene WAL ni locks entre conexiones
+        config = {**settings.DATABASES[DEFAULT_DB_ALIAS], "NAME": os.path.join(cls.tmp.name, "burst.sqlite3"),
+                  "TEST": {}}
+        connections.settings[BURST_ALIAS] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS], BURST_ALIAS: config,
+        })[BURST_ALIAS]
+        cls.databases = frozenset({BURST_ALIAS})
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[BURST_ALIAS].close()
+        del connections[BURST_ALIAS]
+        del connections.settings[BURST_ALIAS]
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def test_conexion_de_django_configurada(self):
+        conn = connections[BURST_ALIAS]
+        with conn.cursor() as cur:
+            cur.execute("PRAGMA journal_mode")
+            self.assertEqual(cur.fetchone()[0], "wal")
+            cur.execute("PRAGMA busy_timeout")
+            self.assertEqual(cur.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+            cur.execute("PRAGMA synchronous")
+            self.assertEqual(cur.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.transaction_mode, "IMMEDIATE")
+        self.assertEqual(conn.get_connection_params()["timeout"], 20)
+
+    def test_rafaga_sin_errores_de_lock(self):
+        errors, done = [], threading.Event()
+
+        def writer(n):
+            try:
+                for i in range(self.per_writer):
+                    try:
+                        with transaction.atomic(using=BURST_ALIAS), connections[BURST_ALIAS].cursor() as cur:
+                            cur.execute("SELECT count(*) FROM late WHERE student_id = %s", [n])
+                            cur.fetchone()
+                            cur.execute("INSERT INTO late (student_id, reason) VALUES (%s, %s)", [n, f"aviso {i}"])
+                    except OperationalError as e:
+                        errors.append(str(e))
+            finally:
+                connections[BURST_ALIAS].close()
+
+        def reader():
+            try:
+                while not done.is_set():
+                    try:
+                        with connections[BURST_ALIAS].cursor() as cur:
+                            cur.execute("SELECT student_id, count(*) FROM late GROUP BY student_id")
+                            cur.fetchall()
+                    except OperationalError as e:
+                        errors.append(str(e))
+            finally:
+                connections[BURST_ALIAS].close()
+
+        with connections[BURST_ALIAS].cursor() as cur:
+            cur.execute("CREATE TABLE late (id INTEGER PRIMARY KEY, student_id INTEGER, reason TEXT)")
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(self.writers)]
+        reader_threads = [threading.Thread(target=reader) for _ in range(self.readers)]
+        for t in reader_threads + threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        for t in reader_threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        with connections[BURST_ALIAS].cursor() as cur:
+            cur.execute("SELECT count(*) FROM late")
+            self.assertEqual(cur.fetchone()[0], self.writers * self.per_writer)
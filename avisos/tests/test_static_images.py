@@ -0,0 +1,78 @@
+# archivo: avisos/tests/test_static_images.py
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+from whitenoise.compress import brotli_installed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from avisos.static_images import Image
+
+TAGS = ('{% load images %}{% picture "logo.png" alt="CCM" sizes="36px" %}'
+        '|{% background_css "body.bg-image" "fondo_ccm.png" %}')
+
+
+class TestStaticImagesWithoutManifest(SimpleTestCase):
+    def test_sin_collectstatic_quedan_los_originales(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        with override_settings(STATIC_ROOT=root):
+            html = Template(TAGS).render(Context())
+        self.assertEqual(html, '<img src="/static/logo.png" alt="CCM">|')
+
+
+@unittest.skipUnless(Image, "Pillow no está instalado")
+class TestStaticImages(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.root, ignore_errors=True)
+        # 32 < ancho del fondo: también sale una versión achicada
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.root, STATIC_IMAGES={"WIDTHS": (32,)}))
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_variantes_con_hash_en_el_manifest(self):
+        entry = staticfiles_storage.image_variants["fondo_ccm.png"]
+        self.assertEqual((entry["width"], entry["height"]), (307, 599))
+        by_width = {(v["width"], v["type"]) for v in entry["variants"]}
+        self.assertIn((32, "image/png"), by_width)
+        self.assertIn((307, "image/webp"), by_width)
+        for v in entry["variants"]:
+            self.assertLess(v["size"], entry["size"])
+            hashed = staticfiles_storage.stored_name(v["name"])
+            self.assertNotEqual(hashed, v["name"])
+            self.assertTrue((Path(self.root) / hashed).exists())
+        # el CSS apunta al fondo con hash
+        css = (Path(self.root) / staticfiles_storage.stored_name("css/app.css")).read_text()
+        self.assertIn(staticfiles_storage.stored_name("fondo_ccm.png"), css)
+
+    def test_template_tags(self):
+        picture, background = Template(TAGS).render(Context()).split("|")
+        self.assertIn('<source type="image/webp" srcset="/static/logo-32w.', picture)
+        self.assertIn(".webp 75w", picture)
+        self.assertIn(f'<img src="{staticfiles_storage.url("logo.png")}"', picture)
+        self.assertIn('width="75" height="75" alt="CCM"', picture)
+        self.assertIn('body.bg-image { background-image: image-set(', background)
+        self.assertIn('type("image/png")', background)
+        self.assertIn("@media (max-width: 16px)", background)
+
+    def test_cache_de_un_anio_y_brotli(self):
+        middleware = WhiteNoiseMiddleware(lambda request: None)
+        url = staticfiles_storage.url("fondo_ccm-307w.webp")
+        self.assertTrue(middleware.immutable_file_test(str(Path(self.root) / url[len("/static/"):]), url))
+        css = staticfiles_storage.stored_name("css/app.css")
+        self.assertTrue(staticfiles_storage.exists(css + ".gz"))
+        if brotli_installed:
+            self.assertTrue(staticfiles_storage.exists(css + ".br"))
+
+        out = StringIO()
+        call_command("static_report", stdout=out)
+        self.assertIn("fondo_ccm.png: 192254 ->", out.getvalue())
+        self.assertIn("Total:", out.getvalue())
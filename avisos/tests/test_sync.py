@@ -0,0 +1,126 @@
+# archivo: avisos/tests/test_sync.py
+import gzip
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from avisos.models import User, Student, ResponsibleStudent, LateArrival, SyncChange
+from avisos.sync import make_token
+
+
+class TestSyncApi(TestCase):
+    def setUp(self):
+        self.resp = User.objects.create_user(id_number="22222222", full_name="Padre", email="p@test.com", password="pass")
+        self.other = User.objects.create_user(id_number="33333333", full_name="Otro", email="o@test.com", password="pass")
+        self.school = User.objects.create_user(id_number="11111111", full_name="Escuela", email="e@ccm.test",
+                                               password="pass", is_school_staff=True)
+        self.st1 = Student.objects.create(first_name="Ana", last_name="Alvarez", level="PRIMARIA", grade=6)
+        self.st2 = Student.objects.create(first_name="Beto", last_name="Bruno", level="PRIMARIA", grade=3)
+        ResponsibleStudent.objects.create(responsible=self.resp, student=self.st1)
+        ResponsibleStudent.objects.create(responsible=self.other, student=self.st2)
+        self.late = LateArrival.objects.create(responsible=self.resp, student=self.st1, reason="Tránsito")
+        LateArrival.objects.create(responsible=self.other, student=self.st2, reason="Ajeno")
+        self.client.login(username="22222222", password="pass")
+        self.url = reverse("sync_api")
+
+    def sync(self, token=None, **params):
+        if token:
+            params["token"] = token
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def test_primera_sincronizacion_completa(self):
+        data = self.sync()
+        self.assertTrue(data["full"])
+        self.assertEqual([r[0] for r in data["students"]["rows"]], [self.st1.pk])
+        self.assertEqual(data["lates"]["fields"], ["id", "student", "reason", "reported_at", "reviewed_at"])
+        self.assertEqual([r[:3] for r in data["lates"]["rows"]], [[self.late.pk, self.st1.pk, "Tránsito"]])
+
+    def test_solo_cambios_desde_el_token(self):
+        token = self.sync()["token"]
+        data = self.sync(token)
+        self.assertFalse(data["full"])
+        self.assertEqual((data["students"]["rows"], data["lates"]["rows"]), ([], []))
+
+        new = LateArrival.objects.create(responsible=self.resp, student=self.st1, reason="Médico")
+        LateArrival.objects.create(responsible=self.other, student=self.st2, reason="No es mío")
+        self.client.logout()
+        self.client.login(username="11111111", password="pass")
+        self.client.post(reverse("school_review_lates"), {"ids": [self.late.pk]})
+        self.client.logout()
+        self.client.login(username="22222222", password="pass")
+
+        data = self.sync(token, late_fields="reviewed_at")
+        self.assertEqual(data["lates"]["fields"], ["id", "reviewed_at"])
+        rows = dict(data["lates"]["rows"])
+        self.assertEqual(set(rows), {self.late.pk, new.pk})
+        self.assertIsNotNone(rows[self.late.pk])
+
+        token, new_pk = data["token"], new.pk
+        new.delete()
+        self.st1.last_name = "Alvarado"
+        self.st1.save()
+        data = self.sync(token, student_fields="last_name")
+        self.assertEqual(data["lates"]["deleted"], [new_pk])
+        self.assertEqual(data["students"]["rows"], [[self.st1.pk, "Alvarado"]])
+
+        # desvincular: el alumno desaparece para ese responsable
+        ResponsibleStudent.objects.filter(responsible=self.resp).delete()
+        data = self.sync(data["token"])
+        self.assertEqual(data["students"]["deleted"], [self.st1.pk])
+
+    @override_settings(SYNC={"PAGE_SIZE": 2})
+    def test_paginado_por_cursor(self):
+        token = self.sync()["token"]
+        created = [LateArrival.objects.create(responsible=self.resp, student=self.st1, reason=str(i)).pk
+                   for i in range(3)]
+        first = self.sync(token)
+        second = self.sync(first["token"])
+        self.assertTrue(first["more"])
+        self.assertFalse(second["more"])
+        self.assertEqual([r[0] for r in first["lates"]["rows"] + second["lates"]["rows"]], created)
+
+    @override_settings(SYNC={"COMMIT_LAG_SECONDS": 30})
+    def test_los_cambios_recientes_esperan_el_margen(self):
+        # con varios escritores (PostgreSQL) un id más bajo puede confirmarse después:
+        # el cursor no pasa de lo que tiene menos de COMMIT_LAG_SECONDS
+        SyncChange.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        full = self.sync()
+        self.assertEqual([r[0] for r in full["lates"]["rows"]], [self.late.pk])
+        new = LateArrival.objects.create(responsible=self.resp, student=self.st1, reason="Médico")
+        data = self.sync(full["token"])
+        self.assertEqual(data["lates"]["rows"], [])
+        self.assertEqual(data["token"].split(".")[0], full["token"].split(".")[0])
+
+        SyncChange.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        data = self.sync(data["token"])
+        self.assertEqual([r[0] for r in data["lates"]["rows"]], [new.pk])
+
+        # una sincronización completa tampoco deja el cursor por delante de lo reciente
+        recent = LateArrival.objects.create(responsible=self.resp, student=self.st1, reason="Tránsito")
+        data = self.sync(self.sync()["token"])
+        self.assertEqual(data["lates"]["rows"], [])
+        SyncChange.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual([r[0] for r in self.sync(data["token"])["lates"]["rows"]], [recent.pk])
+
+    def test_token_vencido_o_invalido(self):
+        old = make_token(SyncChange.objects.order_by("id").last().pk, timezone.now() - timedelta(days=60))
+        self.assertTrue(self.sync(old)["full"])
+        self.assertEqual(self.client.get(self.url, {"token": "basura"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"late_fields": "password"}).status_code, 400)
+
+    def test_gzip_y_sin_cambios_barato(self):
+        token = self.sync()["token"]
+        with self.assertNumQueries(3):  # sesión, usuario, registro de cambios
+            resp = self.client.get(self.url, {"token": token}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertLess(len(resp.content), 300)
+
+        for i in range(50):
+            LateArrival.objects.create(responsible=self.resp, student=self.st1, reason="Demora en el transporte")
+        resp = self.client.get(self.url, {"token": token}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(resp.content))["lates"]["rows"]), 50)
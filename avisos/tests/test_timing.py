@@ -0,0 +1,58 @@
+# archivo: avisos/tests/test_timing.py
+import json
+import re
+
+from django.test import override_settings
+from django.urls import reverse
+
+from avisos.tests.test_reports import BaseReportSetup
+
+
+class TestRequestTiming(BaseReportSetup):
+    def test_server_timing_header(self):
+        self.login(self.school)
+        resp = self.client.get(self.url_agg)
+        header = resp["Server-Timing"]
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries", view;dur=[\d.]+, tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+        # vistas sin TemplateResponse (redirect): sin tpl
+        resp = self.client.get(reverse("logout"))
+        self.assertNotIn("tpl;", resp["Server-Timing"])
+
+    def test_log_estructurado_de_lentos(self):
+        self.login(self.school)
+        with override_settings(REQUEST_TIMING={"SLOW_REQUEST_MS": 0, "SLOW_QUERY_MS": 0}):
+            # el middleware lee la configuración al crearse: rearmamos el handler
+            self.client.handler.load_middleware()
+            with self.assertLogs("avisos.timing", level="WARNING") as logs:
+                self.client.get(self.url_detalle)
+        self.client.handler.load_middleware()
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["path"], self.url_detalle)
+        self.assertEqual(record["view"], "LateArrivalReportView")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertEqual(len(record["slow_queries"]), record["queries"])
+        self.assertTrue(record["slow_queries"][0]["sql"].startswith("SELECT"))
+
+    def test_streaming_no_informa_sql(self):
+        # la exportación CSV consulta mientras se envía: el middleware no lo ve
+        self.login(self.school)
+        with override_settings(REQUEST_TIMING={"SLOW_REQUEST_MS": 0}):
+            self.client.handler.load_middleware()
+            with self.assertLogs("avisos.timing", level="WARNING") as logs:
+                resp = self.client.get(self.url_detalle, {"export": "csv"})
+                b"".join(resp.streaming_content)
+        self.client.handler.load_middleware()
+        self.assertTrue(resp["Server-Timing"].startswith('db;desc="no medido (streaming)"'))
+        self.assertNotIn("queries", resp["Server-Timing"])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record["streaming"], record["db_ms"], record["queries"]), (True, None, None))
+
+    def test_xlsx_armado_en_la_vista_si_informa_sql(self):
+        self.login(self.school)
+        resp = self.client.get(self.url_detalle, {"export": "xlsx"})
+        b"".join(resp.streaming_content)
+        self.assertNotIn("no medido", resp["Server-Timing"])
+        queries = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', resp["Server-Timing"])
+        self.assertGreater(int(queries.group(1)), 0)
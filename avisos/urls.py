@@ -28,8 +28,14 @@ urlpatterns = [
         name="register_students",
     ),
     path("ack-late/", views.NotifyLateView.as_view(), name="notify_late"),
+    path("api/ack-late/lote/", views.NotifyLateBatchApiView.as_view(), name="notify_late_batch"),
     path("ack/", views.NotificationsListView.as_view(), name="notifications_list"),
     path("ccm/hoy/", views.SchoolTodayLatesView.as_view(), name="school_today_lates"),
+    path("ccm/hoy/en-vivo/", views.SchoolTodayStreamView.as_view(), name="school_today_stream"),
+    path("ccm/hoy/revisar/", views.SchoolReviewLatesView.as_view(), name="school_review_lates"),
+    path("ccm/importar/", views.ImportDataView.as_view(), name="import_data"),
+    path("ccm/alertas/", views.LatenessAlertListView.as_view(), name="lateness_alerts"),
+    path("ccm/alertas/vistas/", views.LatenessAlertAckView.as_view(), name="lateness_alerts_ack"),
     path(
         "ccm/asignar/",
         views.SchoolStaffAssignView.as_view(),
@@ -45,6 +51,12 @@ urlpatterns = [
         views.LateArrivalReportView.as_view(),
         name="report_lates_detailed",
     ),
+    path("rpt/tendencias/", views.LateAnalyticsView.as_view(), name="report_lates_analytics"),
+    path("rpt/exportaciones/", views.ExportJobListView.as_view(), name="export_jobs"),
+    path("rpt/exportaciones/<int:pk>/", views.ExportJobDetailView.as_view(), name="export_job_detail"),
+    path("rpt/exportaciones/<int:pk>/descargar/", views.ExportJobDownloadView.as_view(), name="export_job_download"),
+    path("api/sync/", views.SyncApiView.as_view(), name="sync_api"),
+    path("api/alumnos/buscar/", views.StudentSearchApiView.as_view(), name="student_search_api"),
     path(
         "rpt/llegadas-totalizado/",
         views.LateArrivalAggregatedView.as_view(),
@@ -1,18 +1,38 @@
-from openpyxl.utils import get_column_letter
-from django.http import HttpResponse
-from openpyxl import Workbook
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.views.generic import TemplateView, CreateView, UpdateView, FormView, ListView, DeleteView
+from django.views.generic import View, TemplateView, CreateView, UpdateView, FormView, ListView, DeleteView, DetailView
 from django.shortcuts import redirect, get_object_or_404
-from django.db.models import Count, Q
+from django.template.loader import render_to_string
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.core.exceptions import PermissionDenied
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.auth.views import redirect_to_login
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Coalesce
 from datetime import timedelta
-
-from .forms import SignupForm, UserUpdateForm, StudentForm, NotifyLateForm, SchoolStaffToggleForm, LateArrivalReportFilterForm, LateArrivalAggregatedFilterForm
-from .models import User, Student, ResponsibleStudent, LateArrival
+from pathlib import Path
+from itertools import chain
+import json
+
+from .forms import SignupForm, UserUpdateForm, StudentForm, NotifyLateForm, SchoolStaffToggleForm, LateArrivalReportFilterForm, LateArrivalAggregatedFilterForm, LateArrivalBatchItemForm, ImportUploadForm, ExportJobForm, LateAnalyticsFilterForm
+from .models import User, Student, ResponsibleStudent, LateArrival, StudentLateStats, StudentDailyLates, ArchivedLateArrival, ExportJob, LatenessAlert, normalize_search, student_search_q, school_year_bounds
+from .exports import XLSX_CONTENT_TYPE, export_rows, xlsx_response, csv_response
+from .pagination import KeysetPaginationMixin, keyset_paginate_many
+from .report_cache import ReportCacheMixin
+from .access import get_access_profile, owned_students, scope_late_arrivals_for, user_is_school
+from .imports import run_import, ImportFileError
+from .conditional import ConditionalGetMixin, late_arrivals_version, late_counts_version
+from .analytics import late_analytics
+from .live import late_event_stream, live_settings, new_lates_since, sse_event
+from .sync import SyncError, sync_payload
 from django.contrib.auth import logout
 from django.forms import formset_factory
 
@@ -33,7 +53,7 @@ class HomeView(LoginRequiredMixin, TemplateView):
         ctx = super().get_context_data(**kwargs)
         ctx["latest_lates"] = LateArrival.objects.filter(responsible=self.request.user).order_by("-reported_at")[:5]
         # Flag escolar para mostrar botón especial
-        ctx["is_school_staff"] = self.request.user.is_superuser or getattr(self.request.user, "is_school_staff", False)
+        ctx["is_school_staff"] = get_access_profile(self.request.user).is_school_staff
         return ctx
 
 class SignupView(CreateView):
@@ -75,11 +95,8 @@ class NotifyLateView(LoginRequiredMixin, FormView):
     success_url = reverse_lazy("notifications_list")
 
     def dispatch(self, request, *args, **kwargs):
-        has_students = Student.objects.filter(
-            responsiblestudent__responsible=request.user,
-            active=True
-        ).exists()
-        if not has_students:
+        # en la base, no el perfil cacheado: un alumno recién vinculado puede no estar en el de este worker
+        if not owned_students(request.user).filter(active=True).exists():
             messages.warning(request, "No tenés alumnos activos para avisar llegadas tarde.")
             return redirect("home")
         return super().dispatch(request, *args, **kwargs)
@@ -90,18 +107,15 @@ class NotifyLateView(LoginRequiredMixin, FormView):
         return kwargs
 
     def form_valid(self, form):
-        from .models import LateArrival
         students = form.cleaned_data["students"]
         reason = form.cleaned_data["reason"].strip()
 
-        created = 0
-        for student in students:
-            LateArrival.objects.create(
-                responsible=self.request.user,
-                student=student,
-                reason=reason,
-            )
-            created += 1
+        # un solo INSERT (y una sola transacción) para todos los alumnos elegidos
+        with transaction.atomic():
+            created = len(LateArrival.objects.bulk_create([
+                LateArrival(responsible=self.request.user, student=student, reason=reason)
+                for student in students
+            ]))
 
         if created:
             messages.success(self.request, f"Se registraron {created} aviso(s).")
@@ -109,8 +123,69 @@ class NotifyLateView(LoginRequiredMixin, FormView):
             messages.info(self.request, "No se registró ningún aviso.")
 
         return redirect(self.get_success_url())
-    
-class NotificationsListView(LoginRequiredMixin, ListView):
+
+
+class NotifyLateBatchApiView(LoginRequiredMixin, View):
+    """
+    POST JSON {"items": [{"student": id, "reason": "...", "reported_at": "ISO-8601" (opcional)}, ...]}
+    Pensado para una tablet en la entrada: muchos avisos en un request.
+    Los ítems válidos se guardan juntos; los inválidos vuelven con sus errores.
+    """
+    raise_exception = True
+    max_items = 500
+
+    def post(self, request, *args, **kwargs):
+        try:
+            items = json.loads(request.body or b"{}").get("items")
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "JSON inválido."}, status=400)
+        if not isinstance(items, list) or not items:
+            return JsonResponse({"error": "Se espera una lista 'items' no vacía."}, status=400)
+        if len(items) > self.max_items:
+            return JsonResponse({"error": f"Máximo {self.max_items} ítems por lote."}, status=400)
+
+        errors, valid = [], []
+        for i, item in enumerate(items):
+            form = LateArrivalBatchItemForm(item if isinstance(item, dict) else {})
+            if form.is_valid():
+                valid.append((i, form.cleaned_data))
+            else:
+                errors.append({"index": i, "errors": form.errors.get_json_data()})
+
+        # pertenencia validada con una sola consulta para todo el lote
+        allowed = allowed_student_ids(request.user, {data["student"] for _, data in valid})
+        to_create = []
+        for i, data in valid:
+            if data["student"] not in allowed:
+                errors.append({"index": i, "errors": {"student": [
+                    {"message": "Alumno inexistente, inactivo o no asociado.", "code": "invalid_choice"}
+                ]}})
+                continue
+            obj = LateArrival(responsible=request.user, student_id=data["student"], reason=data["reason"].strip())
+            if data.get("reported_at"):
+                obj.reported_at = data["reported_at"]
+            to_create.append((i, obj))
+
+        with transaction.atomic():
+            LateArrival.objects.bulk_create([obj for _, obj in to_create])
+
+        errors.sort(key=lambda e: e["index"])
+        created = [{"index": i, "id": obj.pk} for i, obj in to_create]
+        status = 400 if errors and not created else 200
+        return JsonResponse({"created": created, "errors": errors}, status=status)
+
+
+def allowed_student_ids(user, student_ids):
+    """Alumnos activos sobre los que el usuario puede avisar (escuela: todos)."""
+    if not student_ids:
+        return set()
+    qs = Student.objects.filter(pk__in=student_ids, active=True)
+    if not user_is_school(user):
+        qs = qs.filter(responsiblestudent__responsible=user)
+    return set(qs.values_list("pk", flat=True))
+
+
+class NotificationsListView(LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     model = LateArrival
     template_name = "avisos/notifications_list.html"
     context_object_name = "notifications"
@@ -118,14 +193,18 @@ class NotificationsListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         return (LateArrival.objects
                 .filter(responsible=self.request.user)
+                .select_related("student", "reviewed_by")
                 .order_by("-reported_at"))
 
+    def get_data_version(self):
+        return late_arrivals_version(LateArrival.objects.filter(responsible=self.request.user))
+
 
 class StudentsListView(LoginRequiredMixin, ListView):
     template_name = "alumnos/list.html"
     context_object_name = "students"
     def get_queryset(self):
-        return Student.objects.filter(responsiblestudent__responsible=self.request.user).distinct()
+        return owned_students(self.request.user)
 
 class StudentCreateView(LoginRequiredMixin, CreateView):
     model = Student
@@ -145,7 +224,7 @@ class StudentUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "alumnos/form.html"
     success_url = reverse_lazy("students_list")
     def get_queryset(self):
-        return Student.objects.filter(responsiblestudent__responsible=self.request.user).distinct()
+        return owned_students(self.request.user)
     def form_valid(self, form):
         messages.success(self.request, "Alumno actualizado correctamente.")
         return super().form_valid(form)
@@ -155,7 +234,7 @@ class StudentDeleteView(LoginRequiredMixin, DeleteView):
     template_name = "alumnos/confirm_delete.html"
     success_url = reverse_lazy("students_list")
     def get_queryset(self):
-        return Student.objects.filter(responsiblestudent__responsible=self.request.user).distinct()
+        return owned_students(self.request.user)
     def delete(self, request, *args, **kwargs):
         messages.success(self.request, "Alumno eliminado.")
         return super().delete(request, *args, **kwargs)
@@ -173,50 +252,45 @@ class LateArrivalDeleteView(LoginRequiredMixin, DeleteView):
         messages.success(self.request, "Aviso eliminado.")
         return super().delete(request, *args, **kwargs)
 
-class SchoolTodayLatesView(LoginRequiredMixin, SchoolOnlyMixin, ListView):
+class SchoolTodayLatesView(LoginRequiredMixin, SchoolOnlyMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     template_name = "avisos/school_today_lates.html"
     context_object_name = "lates"
+    page_size = 100
 
     def get_queryset(self):
         today = timezone.localdate()
         return (LateArrival.objects
                 .select_related("student", "responsible", "reviewed_by")
-                .filter(reported_at__date=today)
+                .for_local_day(today)
                 .order_by("-reported_at"))
 
-    def dispatch(self, request, *args, **kwargs):
-        today = timezone.localdate()
-        qs_hoy_pend = LateArrival.objects.filter(
-            reported_at__date=today,
-            reviewed_at__isnull=True
-        ).exclude(responsible=request.user) # no revisar los propios avisos
-        if qs_hoy_pend.exists():
-            qs_hoy_pend.update(
-                reviewed_by_id=request.user.id,
-                reviewed_at=timezone.now()
-            )
-        return super().dispatch(request, *args, **kwargs)
-    
+    def get_data_version(self):
+        today = LateArrival.objects.for_local_day(timezone.localdate())
+        # los contadores de los alumnos de hoy cambian también por avisos de otros días
+        stats = (StudentLateStats.objects.filter(student_id__in=today.values("student_id"))
+                 .aggregate(total=Sum("total_count"), last30=Sum("last30_count")))
+        return timezone.localdate().isoformat(), late_arrivals_version(today), stats["total"], stats["last30"]
+
     def get_context_data(self, **kwargs):
             ctx = super().get_context_data(**kwargs)
             lates = list(ctx["lates"])  # materializamos
 
+            # en vivo solo en la primera página; el stream sigue desde el último id de hoy
+            if not ctx["page"].has_previous:
+                ctx["live_after"] = self.object_list.aggregate(m=Max("id"))["m"] or 0
+
             if not lates:
                 ctx["lates"] = lates
                 return ctx
 
-            last30 = timezone.now() - timedelta(days=30)
+            # contadores precalculados (StudentLateStats), sin agregar sobre la tabla cruda
             student_ids = {l.student_id for l in lates}
-
-            agg = (LateArrival.objects
+            counts_by_student = {
+                sid: {"total": total, "last30": last30}
+                for sid, total, last30 in StudentLateStats.objects
                 .filter(student_id__in=student_ids)
-                .values("student_id")
-                .annotate(
-                    total=Count("id"),
-                    last30=Count("id", filter=Q(reported_at__gte=last30))
-                ))
-
-            counts_by_student = {row["student_id"]: row for row in agg}
+                .values_list("student_id", "total_count", "last30_count")
+            }
 
             # adjuntamos atributos a cada aviso para fácil uso en template
             for l in lates:
@@ -224,16 +298,100 @@ class SchoolTodayLatesView(LoginRequiredMixin, SchoolOnlyMixin, ListView):
                 l.total_count = row["total"]
                 l.last30_count = row["last30"]
 
+            # para "marcar todo como visto": hasta el aviso más nuevo que se está mirando, contado
+            # con el mismo filtro que usa SchoolReviewLatesView (abarca también otras páginas)
+            ctx["max_id"] = max(l.id for l in lates)
+            ctx["pending_count"] = pending_review(self.request.user).filter(pk__lte=ctx["max_id"]).count()
             ctx["lates"] = lates
             return ctx
 
-class StudentLateHistoryView(LoginRequiredMixin, SchoolOnlyMixin, ListView):
+
+def pending_review(user):
+    """Avisos de hoy sin revisar que `user` puede marcar como vistos (nunca los propios)."""
+    return (LateArrival.objects.for_local_day(timezone.localdate())
+            .filter(reviewed_at__isnull=True)
+            .exclude(responsible=user))
+
+
+class SchoolReviewLatesView(LoginRequiredMixin, SchoolOnlyMixin, View):
+    """
+    Marca avisos de hoy como vistos: los ids elegidos ("ids") o todos los pendientes
+    hasta un id ("up_to_id", el más nuevo que se estaba mirando). Idempotente: solo
+    toca filas sin revisar, y nunca los avisos propios.
+    """
+    def post(self, request, *args, **kwargs):
+        pending = pending_review(request.user)
+        try:
+            ids = [int(v) for v in request.POST.getlist("ids")]
+            up_to_id = int(request.POST["up_to_id"]) if request.POST.get("up_to_id") else None
+        except ValueError:
+            return HttpResponseBadRequest("ids inválidos")
+
+        if ids:
+            pending = pending.filter(pk__in=ids)
+        elif up_to_id is not None:
+            pending = pending.filter(pk__lte=up_to_id)
+        else:
+            return HttpResponseBadRequest("Indicar ids o up_to_id")
+
+        reviewed = pending.mark_reviewed(request.user)
+
+        if "application/json" in request.headers.get("Accept", ""):
+            return JsonResponse({"reviewed": reviewed})
+        if reviewed:
+            messages.success(request, f"{reviewed} aviso(s) marcados como vistos.")
+        return redirect("school_today_lates")
+
+
+class SchoolTodayStreamView(View):
+    """
+    Avisos nuevos de hoy por Server-Sent Events (desde ?after=<id> o Last-Event-ID).
+    Con ASGI el stream queda abierto; con WSGI se responde lo pendiente y el navegador
+    vuelve a pedir a los POLL_SECONDS (EventSource reconecta solo).
+    """
+    async def get(self, request, *args, **kwargs):
+        # vista async: nada de LoginRequiredMixin/SchoolOnlyMixin (tocan request.user en modo sync)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if not (user.is_superuser or getattr(user, "is_school_staff", False)):
+            raise PermissionDenied
+        try:
+            cursor = int(request.headers.get("Last-Event-ID") or request.GET.get("after") or 0)
+        except ValueError:
+            return HttpResponseBadRequest("cursor inválido")
+
+        conf = live_settings()
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(late_event_stream(cursor, conf), content_type="text/event-stream")
+        else:
+            rows = await sync_to_async(new_lates_since)(cursor, limit=conf["BATCH"])
+            body = f"retry: {conf['POLL_SECONDS'] * 1000}\n\n" + "".join(sse_event(r) for r in rows)
+            response = HttpResponse(body, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: no bufferear el stream
+        return response
+
+
+class StudentLateHistoryView(LoginRequiredMixin, SchoolOnlyMixin, ConditionalGetMixin, KeysetPaginationMixin, ListView):
     template_name = "avisos/student_late_history.html"
     context_object_name = "lates"
 
     def get_queryset(self):
         student_id = self.kwargs["student_id"]
-        return LateArrival.objects.filter(student_id=student_id).select_related("student","responsible").order_by("-reported_at")
+        return LateArrival.objects.filter(student_id=student_id).select_related("student","responsible","reviewed_by").order_by("-reported_at")
+
+    def paginate_keyset(self, qs):
+        # ciclos ya archivados: la misma página sigue de corrido en la tabla de archivo
+        archived = (ArchivedLateArrival.objects.filter(student_id=self.kwargs["student_id"])
+                    .select_related("student", "responsible", "reviewed_by"))
+        page = keyset_paginate_many([qs, archived], self.request.GET.get(self.cursor_param), self.page_size)
+        return self.link_keyset_page(page)
+
+    def get_data_version(self):
+        student_id = self.kwargs["student_id"]
+        return (late_arrivals_version(LateArrival.objects.filter(student_id=student_id)),
+                late_arrivals_version(ArchivedLateArrival.objects.filter(student_id=student_id)))
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -242,6 +400,24 @@ class StudentLateHistoryView(LoginRequiredMixin, SchoolOnlyMixin, ListView):
         return ctx
 
 
+class ImportDataView(LoginRequiredMixin, SchoolOnlyMixin, FormView):
+    template_name = "avisos/import_data.html"
+    form_class = ImportUploadForm
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        try:
+            result = run_import(upload.file, upload.name, form.cleaned_data["kind"])
+        except ImportFileError as e:
+            form.add_error("file", str(e))
+            return self.form_invalid(form)
+        if result.rejected_total:
+            messages.warning(self.request, f"Importación con {result.rejected_total} fila(s) rechazada(s).")
+        else:
+            messages.success(self.request, f"Importación completa: {result.processed} fila(s).")
+        return self.render_to_response(self.get_context_data(form=self.form_class(), result=result))
+
+
 # === NUEVO: Asignar personal de escuela (primero solo superuser, luego school_staff también) ===
 class SchoolStaffAssignView(LoginRequiredMixin, FormView):
     template_name = "avisos/school_staff_assign.html"
@@ -271,22 +447,45 @@ class SchoolStaffAssignView(LoginRequiredMixin, FormView):
         return super().form_valid(form)
     
 
-def user_is_school(user):
-    return user.is_authenticated and (user.is_superuser or getattr(user, "is_school_staff", False))
-
-def scope_late_arrivals_for(user, qs):
-    return qs if user_is_school(user) else qs.filter(responsible=user)
+def one_year_before(d):
+    try:
+        return d.replace(year=d.year - 1)
+    except ValueError:  # 29/02
+        return d.replace(year=d.year - 1, day=28)
 
 
 from django.utils import timezone
 from datetime import timedelta
 
-class LateArrivalReportView(LoginRequiredMixin, TemplateView):
+class LateArrivalReportView(LoginRequiredMixin, ConditionalGetMixin, ReportCacheMixin, KeysetPaginationMixin, TemplateView):
     template_name = "avisos/reports_detailed.html"
 
     def get(self, request, *args, **kwargs):
+        form, querysets, d1, d2 = self.get_filtered()
+        if form.is_valid():
+            # 3) Exportar a Excel / CSV si corresponde
+            export = request.GET.get("export")
+            if export in ("1", "xlsx", "csv"):
+                return self._export(querysets, d1, d2, fmt="csv" if export == "csv" else "xlsx")
+
+        # 4) Render normal con form (ya “bound” con defaults) y filas, paginadas por cursor
+        #    sobre avisos + archivo; la página se comparte entre usuarios del mismo alcance (ReportCacheMixin)
+        cursor = request.GET.get(self.cursor_param)
+        page = self.cached_report("page", (d1, d2, cursor, self.page_size),
+                                  lambda: keyset_paginate_many(querysets, cursor, self.page_size))
+        page = self.link_keyset_page(page)
+        context = self.get_context_data(form=form, rows=page.object_list, page=page)
+        return self.render_to_response(context)
+
+
+    def get_filtered(self):
+        if not hasattr(self, "_filtered"):
+            self._filtered = self._build_filtered()
+        return self._filtered
+
+    def _build_filtered(self):
         # 1) Construimos los datos del form con defaults (hoy-30 .. hoy)
-        data = request.GET.copy()
+        data = self.request.GET.copy()
         today = timezone.localdate()
         default_from = (today - timedelta(days=30)).isoformat()
         default_to = today.isoformat()
@@ -297,27 +496,27 @@ class LateArrivalReportView(LoginRequiredMixin, TemplateView):
             data["date_to"] = default_to
 
         form = LateArrivalReportFilterForm(data)
-        qs = LateArrival.objects.select_related("student", "responsible").all()
+        # la tabla caliente y el archivo (ciclos ya cerrados por archive_school_year)
+        querysets = [model.objects.select_related("student", "responsible").all()
+                     for model in (LateArrival, ArchivedLateArrival)]
 
         # 2) Filtramos por rango (siempre válido porque seteamos defaults)
         if form.is_valid():
             d1 = form.cleaned_data["date_from"]
             d2 = form.cleaned_data["date_to"]
-            qs = qs.filter(reported_at__date__gte=d1, reported_at__date__lte=d2)
-            qs = scope_late_arrivals_for(request.user, qs).order_by("-reported_at")
-
-            # 3) Exportar a Excel si corresponde
-            if request.GET.get("export") == "1":
-                return self._export_excel(qs, d1, d2)
+            querysets = [scope_late_arrivals_for(self.request.user, qs.for_local_range(d1, d2)).order_by("-reported_at")
+                         for qs in querysets]
         else:
             # fallback imposible en práctica, pero por seguridad
-            qs = qs.none()
+            querysets = [qs.none() for qs in querysets]
             d1, d2 = default_from, default_to
+        return form, querysets, d1, d2
 
-        # 4) Render normal con form (ya “bound” con defaults) y filas
-        context = self.get_context_data(form=form, rows=qs)
-        return self.render_to_response(context)
-
+    def get_data_version(self):
+        form, querysets, d1, d2 = self.get_filtered()
+        # sin fechas explícitas el rango por defecto se mueve con el día
+        versions = [late_arrivals_version(qs) for qs in querysets] if form.is_valid() else None
+        return timezone.localdate().isoformat(), versions
 
     def get_context_data(self, **kwargs):
         # NO devolver HttpResponse aquí; solo dict
@@ -327,64 +526,224 @@ class LateArrivalReportView(LoginRequiredMixin, TemplateView):
         context.setdefault("rows", LateArrival.objects.none())
         return context
 
-    def _export_excel(self, qs, d1, d2):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Llegadas tarde"
+    def _export(self, querysets, d1, d2, fmt="xlsx"):
+        # muchas filas: que lo arme run_export_jobs y no el request (timeouts del proxy)
+        if sum(qs.count() for qs in querysets) > settings.EXPORT_INLINE_MAX_ROWS:
+            job = ExportJob.objects.create(requested_by=self.request.user, fmt=fmt, date_from=d1, date_to=d2)
+            return redirect("export_job_detail", pk=job.pk)
+        # se arma por streaming: memoria constante sin importar la cantidad de filas;
+        # lo archivado es siempre más viejo, así que avisos + archivo quedan ordenados por fecha
+        rows = chain.from_iterable(export_rows(qs) for qs in querysets)
+        filename = f"llegadas_tarde_{d1.isoformat()}_a_{d2.isoformat()}.{fmt}"
+        if fmt == "csv":
+            return csv_response(rows, filename)
+        return xlsx_response(rows, filename)
+
+
+class LatenessAlertListView(LoginRequiredMixin, SchoolOnlyMixin, ListView):
+    """Alertas de impuntualidad crónica: las pendientes (o todas con ?todas=1), más nuevas primero."""
+    template_name = "avisos/lateness_alerts.html"
+    context_object_name = "alerts"
+    paginate_by = 50
 
-        headers = ["Alumno", "Grado", "Fecha y hora", "Motivo"]
-        ws.append(headers)
+    def get_queryset(self):
+        qs = LatenessAlert.objects.select_related("rule", "student", "acknowledged_by").order_by("-created_at", "-id")
+        if not self.request.GET.get("todas"):
+            qs = qs.filter(acknowledged_at__isnull=True)
+        return qs
 
-        for n in qs:
-            alumno = f"{n.student.last_name}, {n.student.first_name}"
-            grado = f"{n.student.level} {n.student.grade}"
-            fecha_hora = n.reported_at.strftime("%d/%m/%Y %H:%M")
-            ws.append([alumno, grado, fecha_hora, n.reason])
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["show_all"] = bool(self.request.GET.get("todas"))
+        return ctx
+
+
+class LatenessAlertAckView(LoginRequiredMixin, SchoolOnlyMixin, View):
+    """Marca alertas como vistas (ids elegidos). Idempotente: solo toca las pendientes."""
+    def post(self, request, *args, **kwargs):
+        try:
+            ids = [int(v) for v in request.POST.getlist("ids")]
+        except ValueError:
+            return HttpResponseBadRequest("ids inválidos")
+        if not ids:
+            return HttpResponseBadRequest("Indicar ids")
+        acknowledged = LatenessAlert.objects.filter(pk__in=ids, acknowledged_at__isnull=True).update(
+            acknowledged_by=request.user, acknowledged_at=timezone.now())
+
+        if "application/json" in request.headers.get("Accept", ""):
+            return JsonResponse({"acknowledged": acknowledged})
+        if acknowledged:
+            messages.success(request, f"{acknowledged} alerta(s) marcadas como vistas.")
+        return redirect("lateness_alerts")
+
+
+class ExportJobListView(LoginRequiredMixin, FormView):
+    """Exportaciones en segundo plano del usuario + formulario para pedir una nueva."""
+    template_name = "avisos/export_jobs.html"
+    form_class = ExportJobForm
+
+    def get_initial(self):
+        initial = super().get_initial()
+        for key in ("date_from", "date_to", "fmt"):
+            if self.request.GET.get(key):
+                initial[key] = self.request.GET[key]
+        return initial
 
-        # Anchos de columna
-        for col in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 28
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["jobs"] = self.request.user.export_jobs.order_by("-created_at")[:20]
+        return ctx
 
-        resp = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    def form_valid(self, form):
+        data = form.cleaned_data
+        job = ExportJob.objects.create(
+            requested_by=self.request.user, kind=data["kind"], fmt=data["fmt"],
+            date_from=data["date_from"], date_to=data["date_to"],
         )
-        filename = f"llegadas_tarde_{d1.isoformat()}_a_{d2.isoformat()}.xlsx"
-        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-        wb.save(resp)
-        return resp
+        return redirect("export_job_detail", pk=job.pk)
+
+
+class ExportJobDetailView(LoginRequiredMixin, DetailView):
+    template_name = "avisos/export_job_detail.html"
+    context_object_name = "job"
+
+    def get_queryset(self):
+        return self.request.user.export_jobs.all()
+
+
+class ExportJobDownloadView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        job = get_object_or_404(request.user.export_jobs, pk=pk, status=ExportJob.DONE)
+        path = Path(settings.EXPORTS_ROOT) / job.file_path
+        if not path.is_file():
+            raise Http404("El archivo ya no está disponible.")
+        content_type = XLSX_CONTENT_TYPE if job.fmt == "xlsx" else "text/csv; charset=utf-8"
+        return FileResponse(path.open("rb"), as_attachment=True, filename=job.download_name, content_type=content_type)
+
+
+class LateAnalyticsView(LoginRequiredMixin, SchoolOnlyMixin, ConditionalGetMixin, ReportCacheMixin, TemplateView):
+    """Tendencias del ciclo lectivo (día de la semana, hora, grado, semana) desde LateSlotCounts."""
+    template_name = "avisos/reports_analytics.html"
+
+    def get_form(self):
+        if not hasattr(self, "_form"):
+            self._form = LateAnalyticsFilterForm(self.request.GET or None)
+        return self._form
+
+    def get_data_version(self):
+        # altas: id máximo (consulta por PK); bajas: generación en el cache
+        return (LateArrival.objects.aggregate(m=Max("id"))["m"], late_counts_version(),
+                timezone.localdate().isoformat())
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        form = self.get_form()
+        year = form.selected_year()
+        d1, d2 = school_year_bounds(year)
+        ctx.update(form=form, school_year=year, date_from=d1, date_to=d2,
+                   stats=self.cached_report("analytics", (d1, d2), lambda: late_analytics(d1, d2)))
+        return ctx
+
+
+@method_decorator(gzip_page, name="dispatch")
+class SyncApiView(LoginRequiredMixin, View):
+    """
+    GET ?token=...&student_fields=id,last_name&late_fields=id,student,reported_at
+    Alumnos y avisos propios que cambiaron desde el token (ver avisos.sync). Sin cambios,
+    la respuesta es un par de cientos de bytes y una consulta por índice.
+    """
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            payload = sync_payload(
+                request.user,
+                token=request.GET.get("token"),
+                student_fields=request.GET.get("student_fields"),
+                late_fields=request.GET.get("late_fields"),
+            )
+        except SyncError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        response = JsonResponse(payload, json_dumps_params={"separators": (",", ":")})
+        response["Cache-Control"] = "private, no-store"
+        return response
+
+
+class StudentSearchApiView(LoginRequiredMixin, View):
+    """Autocompletado del buscador de alumnos: GET ?q=pere -> [{id, name, level, grade}]."""
+    raise_exception = True
+    limit = 10
+
+    def get(self, request, *args, **kwargs):
+        qtext = request.GET.get("q", "")
+        if len(qtext.strip()) < 2:
+            return JsonResponse({"results": []})
+        qs = Student.objects.filter(student_search_q(qtext))
+        if not user_is_school(request.user):
+            qs = qs.filter(pk__in=owned_students(request.user).values("pk"))
+        rows = qs.order_by("search_last_first").values_list("id", "last_name", "first_name", "level", "grade")[:self.limit]
+        return JsonResponse({"results": [
+            {"id": pk, "name": f"{last}, {first}", "level": level, "grade": grade}
+            for pk, last, first, level, grade in rows
+        ]})
 
 
 # ====== REPORTE TOTALIZADO (solo pantalla, con búsqueda y link) ======
-class LateArrivalAggregatedView(LoginRequiredMixin, TemplateView):
+class LateArrivalAggregatedView(LoginRequiredMixin, ConditionalGetMixin, ReportCacheMixin, TemplateView):
     template_name = "avisos/reports_aggregated.html"
 
+    def get_student_scope(self):
+        if user_is_school(self.request.user):
+            return Q()
+        # el responsable ve los totales de sus propios alumnos
+        return Q(student__responsiblestudent__responsible=self.request.user)
+
+    def get_data_version(self):
+        # toda alta/baja de avisos mueve max(id) o la suma de totales; la ventana de 30 días, window_start
+        stats = (StudentLateStats.objects.filter(self.get_student_scope())
+                 .aggregate(n=Count("student_id"), total=Sum("total_count"), last30=Sum("last30_count"),
+                            window=Max("window_start")))
+        stats["window"] = stats["window"] and stats["window"].isoformat()
+        return LateArrival.objects.aggregate(m=Max("id"))["m"], tuple(stats.values())
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         form = LateArrivalAggregatedFilterForm(self.request.GET or None)
 
-        base_qs = LateArrival.objects.select_related("student")
-        base_qs = scope_late_arrivals_for(self.request.user, base_qs)
+        student_scope = self.get_student_scope()
 
-        # filtro por nombre/apellido (%like%)
+        # búsqueda por nombre/apellido (sin acentos, por prefijo, indexada) y rango opcional
         qtext = ""
+        d1 = d2 = None
         if form.is_valid():
             qtext = (form.cleaned_data.get("q") or "").strip()
-            if qtext:
-                base_qs = base_qs.filter(
-                    Q(student__last_name__icontains=qtext) | Q(student__first_name__icontains=qtext)
-                )
-
-        last30 = timezone.now() - timedelta(days=30)
-
-        # agregación por alumno+grado
-        agg = (base_qs.values("student_id", "student__last_name", "student__first_name",
-                              "student__level", "student__grade")
-               .annotate(
-                   total=Count("id"),
-                   last30=Count("id", filter=Q(reported_at__gte=last30))
-               )
-               .order_by("student__last_name", "student__first_name"))
+            d1 = form.cleaned_data.get("date_from")
+            d2 = form.cleaned_data.get("date_to")
+        name_q = student_search_q(qtext, prefix="student__")
+
+        order = ("student__last_name", "student__first_name")
+        if d1 and d2:
+            # suma sobre la tabla diaria: cuesta alumnos x días, no filas crudas
+            p1, p2 = one_year_before(d1), one_year_before(d2)
+            agg = (StudentDailyLates.totals(d1, d2, p1, p2)
+                   .filter(student_scope, name_q)
+                   .annotate(last30=Coalesce(Max("student__late_stats__last30_count"), 0))
+                   .order_by(*order))
+            ctx["compare_range"] = (p1, p2)
+        else:
+            # contadores precalculados por alumno (misma forma de fila que antes)
+            agg = (StudentLateStats.objects.filter(student_scope, name_q, total_count__gt=0)
+                   .values("student_id", "student__last_name", "student__first_name",
+                           "student__level", "student__grade")
+                   .annotate(total=F("total_count"), last30=F("last30_count"))
+                   .order_by(*order))
 
         ctx["form"] = form
-        ctx["rows"] = agg  # lista de dicts
+        ctx["rows"] = agg  # lista de dicts (lazy: con el fragmento en cache ni se consulta)
+        ctx["rows_html"] = self.cached_report(
+            # bool(qtext): "" (todos) y "!!" (ninguno) normalizan igual
+            "rows", (normalize_search(qtext), bool(qtext), d1, d2),
+            lambda: render_to_string("avisos/_aggregated_rows.html",
+                                     {"rows": agg, "compare_range": ctx.get("compare_range")}),
+        )
         return ctx